@@ -0,0 +1,223 @@
+"""Token-budgeted retrieval context for the recommendation prompt."""
+
+import re
+import typing as t
+from dataclasses import dataclass
+
+import numpy as np
+
+from cache.url_cache import normalize_product_name
+from common import logger
+
+log = logger.create_logger()
+
+# Word pieces of up to six characters plus punctuation, close to what a BPE
+# tokenizer produces for catalog text.
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+
+_HEADER = "#|name|category|for|usage|colour|season"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def format_search_results(results: t.List[t.Dict[str, t.Any]]) -> str:
+    """Format search results for LLM processing."""
+    formatted_items = []
+
+    for i, result in enumerate(results, 1):
+        metadata = result.get('metadata', {})
+        formatted_item = f"""
+Item {i}:
+- Name: {metadata.get('productDisplayName', 'N/A')}
+- Category: {metadata.get('masterCategory', 'N/A')} → {metadata.get('subCategory', 'N/A')} → {metadata.get('articleType', 'N/A')}
+- Demographics: {metadata.get('gender', 'N/A')}
+- Usage: {metadata.get('usage', 'N/A')} wear
+- Color: {metadata.get('baseColour', 'N/A')}
+- Season: {metadata.get('season', 'N/A')}
+- Score: {result.get('score', 0.0):.3f}
+"""
+        formatted_items.append(formatted_item)
+
+    return "\n".join(formatted_items)
+
+
+def _cell(value: t.Any) -> str:
+    return str(value).replace("|", "/") if value not in (None, "") else "-"
+
+
+def _row(position: int, metadata: dict[str, t.Any], variant_colours: list[str]) -> str:
+    colour = _cell(metadata.get("baseColour"))
+    if variant_colours:
+        colour += f" (also {', '.join(variant_colours)})"
+    category = "/".join(
+        _cell(metadata.get(field)) for field in ("masterCategory", "subCategory", "articleType")
+    )
+    return "|".join([
+        str(position),
+        _cell(metadata.get("productDisplayName")),
+        category,
+        _cell(metadata.get("gender")),
+        _cell(metadata.get("usage")),
+        colour,
+        _cell(metadata.get("season")),
+    ])
+
+
+@dataclass
+class ContextReport:
+    """What one context build kept and how many prompt tokens it cost."""
+    candidates: int
+    items: int
+    duplicates: int
+    tokens: int
+    baseline_items: int
+    baseline_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.baseline_tokens - self.tokens
+
+    def __str__(self) -> str:
+        return (
+            f"{self.items} distinct items from {self.candidates} candidates "
+            f"({self.duplicates} near-duplicates collapsed) in {self.tokens} tokens, "
+            f"vs {self.baseline_tokens} for {self.baseline_items} verbose items "
+            f"(saved {self.tokens_saved})"
+        )
+
+
+class ContextBuilder:
+    """Picks diverse, relevant hits with MMR and renders them as a compact table.
+
+    Hits whose embedding is within `duplicate_threshold` of an already selected
+    hit (or whose name normalizes identically) are folded into it as colour
+    variants. Rows are added in MMR order until `token_budget` is spent.
+    Hits carrying their stored "embedding" are used as is; `embed` maps the
+    texts of any others to L2-normalized vectors, and passing the embedding
+    cache's encode keeps repeat items free.
+    """
+
+    def __init__(
+        self,
+        embed: t.Callable[[list[str]], np.ndarray],
+        token_budget: int = 200,
+        duplicate_threshold: float = 0.92,
+        diversity: float = 0.3,
+        baseline_items: int = 5,
+        count_tokens: t.Callable[[str], int] = estimate_tokens,
+    ):
+        self.embed = embed
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.diversity = diversity
+        self.baseline_items = baseline_items
+        self.count_tokens = count_tokens
+        self.requests = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def _item_text(result: dict[str, t.Any]) -> str:
+        metadata = result.get("metadata", {})
+        return metadata.get("text") or metadata.get("productDisplayName") or ""
+
+    def warm(self, result_lists: t.Iterable[list[dict[str, t.Any]]]) -> None:
+        """Embeds the items of many result lists in one call, ahead of `build`."""
+        texts = [
+            self._item_text(result)
+            for results in result_lists
+            for result in results
+            if result.get("embedding") is None
+        ]
+        if texts:
+            self.embed(texts)
+
+    def _embeddings(self, results: list[dict[str, t.Any]]) -> np.ndarray:
+        missing = [i for i, result in enumerate(results) if result.get("embedding") is None]
+        encoded = self.embed([self._item_text(results[i]) for i in missing]) if missing else []
+        vectors = [result.get("embedding") for result in results]
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+        return np.asarray(np.stack(vectors), dtype=np.float32)
+
+    def select(self, results: list[dict[str, t.Any]]) -> list[tuple[int, list[int]]]:
+        """MMR order of representative hits, each with the hits collapsed into it."""
+        if not results:
+            return []
+        embeddings = self._embeddings(results)
+        similarity = embeddings @ embeddings.T
+        names = [normalize_product_name(r.get("metadata", {}).get("productDisplayName", "")) for r in results]
+        for i, name in enumerate(names):
+            for j in range(i):
+                if name and name == names[j]:
+                    similarity[i, j] = similarity[j, i] = 1.0
+
+        # Store scores differ in scale between backends, so rank on a 0-1 range.
+        scores = np.array([r.get("score", 0.0) for r in results], dtype=np.float32)
+        spread = scores.max() - scores.min()
+        relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+        selected: list[int] = []
+        groups: dict[int, list[int]] = {}
+        remaining = list(range(len(results)))
+        while remaining:
+            if selected:
+                to_selected = similarity[np.ix_(remaining, selected)]
+                nearest = to_selected.max(axis=1)
+                duplicate = nearest >= self.duplicate_threshold
+                for row in np.flatnonzero(duplicate):
+                    groups[selected[int(to_selected[row].argmax())]].append(remaining[row])
+                remaining = [r for r, dup in zip(remaining, duplicate) if not dup]
+                nearest = nearest[~duplicate]
+                if not remaining:
+                    break
+            else:
+                nearest = np.zeros(len(remaining), dtype=np.float32)
+            mmr = (1 - self.diversity) * relevance[remaining] - self.diversity * nearest
+            pick = remaining.pop(int(mmr.argmax()))
+            selected.append(pick)
+            groups[pick] = []
+        return [(i, groups[i]) for i in selected]
+
+    def build(self, results: list[dict[str, t.Any]]) -> tuple[str, ContextReport]:
+        """Renders the context table within the token budget."""
+        lines = [_HEADER]
+        tokens = self.count_tokens(_HEADER)
+        items = duplicates = 0
+        for representative, collapsed in self.select(results):
+            metadata = results[representative].get("metadata", {})
+            colour = metadata.get("baseColour")
+            variants = []
+            for i in collapsed:
+                variant = results[i].get("metadata", {}).get("baseColour")
+                if variant and variant != colour and variant not in variants:
+                    variants.append(variant)
+            row = _row(items + 1, metadata, variants)
+            row_tokens = self.count_tokens(row) + 1
+            if tokens + row_tokens > self.token_budget:
+                break
+            lines.append(row)
+            tokens += row_tokens
+            items += 1
+            duplicates += len(collapsed)
+
+        baseline = results[:self.baseline_items]
+        report = ContextReport(
+            candidates=len(results),
+            items=items,
+            duplicates=duplicates,
+            tokens=tokens,
+            baseline_items=len(baseline),
+            baseline_tokens=self.count_tokens(format_search_results(baseline)),
+        )
+        self.requests += 1
+        self.tokens_saved += report.tokens_saved
+        return "\n".join(lines), report
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "requests": self.requests,
+            "tokens_saved": self.tokens_saved,
+            "mean_tokens_saved": self.tokens_saved / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,137 @@
+"""Deterministic query rewriter that fills the search template without an LLM."""
+
+import time
+import typing as t
+from collections import Counter
+
+from common import logger
+from data.term_matcher import TermMatcher, tokenize
+
+log = logger.create_logger()
+
+_STOPWORDS = {
+    "a", "an", "the", "for", "in", "on", "of", "with", "and", "or", "to", "my", "me",
+    "i", "im", "want", "need", "looking", "show", "find", "some", "something", "any",
+    "please", "wear", "wearing", "outfit", "outfits", "good", "nice", "best", "new",
+    "color", "colour", "coloured", "colored", "style", "stylish", "like", "would",
+}
+
+# (articleType) -> (masterCategory, subCategory)
+ArticleHierarchy = dict[str, tuple[str, str]]
+
+
+def article_hierarchy_from_metadata(metadata: t.Iterable[dict[str, t.Any]]) -> ArticleHierarchy:
+    """Most common (masterCategory, subCategory) for each articleType."""
+    counts: dict[str, Counter] = {}
+    for meta in metadata:
+        article = meta.get("articleType")
+        if article:
+            counts.setdefault(article, Counter())[
+                (meta.get("masterCategory"), meta.get("subCategory"))
+            ] += 1
+    return {article: counter.most_common(1)[0][0] for article, counter in counts.items()}
+
+
+def article_hierarchy_from_collection(collection) -> ArticleHierarchy:
+    """Same as `article_hierarchy_from_metadata`, grouped server-side in Mongo."""
+    pipeline = [
+        {
+            "$group": {
+                "_id": {
+                    "articleType": "$metadata.articleType",
+                    "masterCategory": "$metadata.masterCategory",
+                    "subCategory": "$metadata.subCategory",
+                },
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"count": -1}},
+    ]
+    hierarchy: ArticleHierarchy = {}
+    for row in collection.aggregate(pipeline):
+        key = row["_id"]
+        hierarchy.setdefault(key["articleType"], (key["masterCategory"], key["subCategory"]))
+    return hierarchy
+
+
+class LexicalQueryRewriter:
+    """Maps query words onto the catalog vocabulary and fills the rewrite template.
+
+    Returns None when too little of the query is recognised, so the caller can
+    fall back to the LLM.
+    """
+
+    def __init__(
+        self,
+        matcher: TermMatcher,
+        hierarchy: t.Optional[ArticleHierarchy] = None,
+        min_coverage: float = 0.6,
+    ):
+        self.matcher = matcher
+        self.hierarchy = hierarchy or {}
+        self.min_coverage = min_coverage
+        self._counters = {"fast_path_hits": 0, "fallbacks": 0, "llm_calls": 0}
+        self._fast_path_seconds = 0.0
+        self._llm_seconds = 0.0
+
+    def _attributes(self, query: str) -> tuple[dict[str, str], float]:
+        tokens = tokenize(query)
+        content = {i for i, token in enumerate(tokens) if token not in _STOPWORDS}
+        covered: set[int] = set()
+        attributes: dict[str, str] = {}
+        for start, end, field, value in self.matcher.match_tokens(tokens):
+            covered.update(range(start, end))
+            attributes.setdefault(field, value)
+        coverage = len(covered & content) / len(content) if content else 0.0
+        return attributes, coverage
+
+    def _render(self, attributes: dict[str, str]) -> t.Optional[str]:
+        article = attributes.get("articleType")
+        if article is None:
+            return None
+        master, sub = self.hierarchy.get(article, (None, None))
+        master = attributes.get("masterCategory", master)
+        sub = attributes.get("subCategory", sub)
+        if master is None or sub is None:
+            return None
+
+        description = f"Looking for a {article} in the {master} - {sub} category."
+        clauses = []
+        audience = " ".join(
+            value for value in (attributes.get("gender"), attributes.get("usage")) if value
+        )
+        if audience:
+            clauses.append(f"Ideal for {audience} wear")
+        if "baseColour" in attributes:
+            clauses.append(f"preferably in {attributes['baseColour']} color")
+        if "season" in attributes:
+            clauses.append(f"suitable for {attributes['season']} season")
+        if clauses:
+            sentence = ", ".join(clauses)
+            description += f" {sentence[0].upper()}{sentence[1:]}."
+        return description
+
+    def rewrite(self, query: str) -> t.Optional[str]:
+        """Returns the templated description, or None if the LLM should handle the query."""
+        start = time.perf_counter()
+        attributes, coverage = self._attributes(query)
+        rewritten = self._render(attributes) if coverage >= self.min_coverage else None
+        self._fast_path_seconds += time.perf_counter() - start
+        self._counters["fast_path_hits" if rewritten else "fallbacks"] += 1
+        return rewritten
+
+    def record_llm_latency(self, seconds: float) -> None:
+        """Records how long a fallback LLM rewrite took, to estimate time saved."""
+        self._counters["llm_calls"] += 1
+        self._llm_seconds += seconds
+
+    def stats(self) -> dict[str, t.Any]:
+        hits = self._counters["fast_path_hits"]
+        total = hits + self._counters["fallbacks"]
+        mean_llm = self._llm_seconds / self._counters["llm_calls"] if self._counters["llm_calls"] else 0.0
+        return {
+            **self._counters,
+            "hit_ratio": hits / total if total else 0.0,
+            "mean_fast_path_us": self._fast_path_seconds / total * 1e6 if total else 0.0,
+            "estimated_seconds_saved": max(0.0, hits * mean_llm - self._fast_path_seconds),
+        }
@@ -1,27 +1,152 @@
 """Contains the search agent for the financial search."""
 
+import asyncio
+import typing as t
 from datetime import datetime
-import requests
+import httpx
 import json
 
-def _search_serper(query: str, num_results=1) -> list[str]:
+from cache.url_cache import ProductUrlCache
+from common import logger
+from common.metrics import pipeline_metrics
+from common.constants import _SERPER_API_KEY
 
-    url = "https://google.serper.dev/shopping"
+log = logger.create_logger()
 
-    payload = json.dumps({
-    "q": query,
-    "gl": "in"
-    })
+_SERPER_URL = "https://google.serper.dev/shopping"
+_DEFAULT_TIMEOUT = 5.0
+
+
+def _build_payload(query: str) -> dict[str, str]:
+    return {"q": query, "gl": "in"}
+
+
+def _extract_link(data: dict[str, t.Any]) -> t.Optional[str]:
+    shopping = data.get("shopping") or []
+    if not shopping:
+        return None
+    return shopping[0].get("link")
+
+
+@pipeline_metrics.timed("serper_search")
+def _search_serper(query: str, num_results=1, url: str = _SERPER_URL, timeout: float = _DEFAULT_TIMEOUT) -> list[str]:
+    import requests
+
+    payload = json.dumps(_build_payload(query))
     headers = {
-    'X-API-KEY': 'a7c4396a7edac6dce34aeace51826617c1e3cb7b',
+    'X-API-KEY': _SERPER_API_KEY,
     'Content-Type': 'application/json'
     }
 
-    response = requests.request("POST", url, headers=headers, data=payload)
+    response = requests.request("POST", url, headers=headers, data=payload, timeout=timeout)
 
     data = response.json()
     return data["shopping"][0]["link"]
 
+
+class AsyncSerperClient:
+    """Resolves product links concurrently over one pooled keep-alive connection set."""
+
+    def __init__(
+        self,
+        api_key: str = _SERPER_API_KEY,
+        url: str = _SERPER_URL,
+        max_concurrency: int = 8,
+        timeout: float = _DEFAULT_TIMEOUT,
+        batch_size: int = 1,
+        cache: t.Optional[ProductUrlCache] = None,
+    ):
+        """
+        Args:
+            api_key: Serper API key
+            url: Serper shopping endpoint
+            max_concurrency: Maximum number of requests in flight at once
+            timeout: Per-request timeout in seconds
+            batch_size: Number of queries sent in a single request body
+            cache: Optional product-url cache consulted before the network
+        """
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            headers={"X-API-KEY": api_key, "Content-Type": "application/json"},
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+
+    @pipeline_metrics.timed("serper_search")
+    async def _post(self, payload: t.Any) -> t.Any:
+        async with self._semaphore:
+            response = await self._client.post(self.url, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    async def search(self, query: str) -> t.Optional[str]:
+        """Returns the first shopping link for a query, or None if the lookup fails."""
+        try:
+            return _extract_link(await self._post(_build_payload(query)))
+        except Exception as e:
+            log.error(f"Error searching serper for `{query}`: {e}")
+            return None
+
+    async def _search_batch(self, queries: list[str]) -> list[t.Optional[str]]:
+        try:
+            data = await self._post([_build_payload(query) for query in queries])
+            return [_extract_link(item) for item in data]
+        except Exception as e:
+            log.error(f"Error searching serper for batch of {len(queries)}: {e}")
+            return [None] * len(queries)
+
+    async def _fetch_many(self, queries: list[str]) -> list[t.Optional[str]]:
+        if self.batch_size == 1:
+            return list(await asyncio.gather(*(self.search(query) for query in queries)))
+
+        batches = [
+            queries[i:i + self.batch_size]
+            for i in range(0, len(queries), self.batch_size)
+        ]
+        results = await asyncio.gather(*(self._search_batch(batch) for batch in batches))
+        return [link for batch in results for link in batch]
+
+    async def search_many(self, queries: list[str]) -> list[t.Optional[str]]:
+        """Resolves every query concurrently, keeping the input order.
+
+        Cached links are returned immediately; stale ones are refreshed in the
+        background and only misses wait on the network.
+        """
+        if self.cache is None:
+            return await self._fetch_many(queries)
+
+        links: list[t.Optional[str]] = [None] * len(queries)
+        missing, stale = [], []
+        cached = await asyncio.to_thread(self.cache.get_many, queries)
+        for i, (query, (link, fresh)) in enumerate(zip(queries, cached)):
+            if link is None:
+                missing.append(i)
+            else:
+                links[i] = link
+                if not fresh:
+                    stale.append(query)
+
+        if stale:
+            self.cache.refresh_in_background(stale, self._fetch_many)
+        if missing:
+            fetched = await self._fetch_many([queries[i] for i in missing])
+            for i, link in zip(missing, fetched):
+                links[i] = link
+            await asyncio.to_thread(
+                self.cache.set_many,
+                [(queries[i], link) for i, link in zip(missing, fetched) if link],
+            )
+        return links
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
 # query ="Basics Men Blue T-shirt"
 # data=_search_serper(query,1)
 # print(data["shopping"][0]["link"])
@@ -0,0 +1,42 @@
+"""Fixtures shared by the benchmarks: a synthetic catalog and a stand-in LLM."""
+
+import asyncio
+import zlib
+
+import numpy as np
+
+from data.filters import VALID_FILTERS
+from vector_store.local_store import LocalVectorStore
+
+_METADATA_FIELDS = ("gender", "masterCategory", "subCategory", "articleType", "baseColour", "season", "usage")
+
+
+def synthetic_store(items: int, dimension: int = 384, seed: int = 0) -> LocalVectorStore:
+    """Random vectors with metadata drawn from VALID_FILTERS, so extracted filters have matches."""
+    rng = np.random.default_rng(seed)
+    metadata = [
+        {
+            "productDisplayName": f"Item {i}",
+            **{field: VALID_FILTERS[field][rng.integers(len(VALID_FILTERS[field]))] for field in _METADATA_FIELDS},
+        }
+        for i in range(items)
+    ]
+    embeddings = rng.standard_normal((items, dimension), dtype=np.float32)
+    return LocalVectorStore([str(i) for i in range(items)], embeddings, metadata)
+
+
+def fake_llm(latency: float, unique_rewrites: bool = False):
+    """Replacement for `main.generate_llm_response` that waits `latency` seconds.
+
+    With `unique_rewrites`, the rewrite carries a per-prompt token so every
+    query is a fresh encode instead of an embedding cache hit.
+    """
+    async def generate_llm_response(client, prompt, *args, **kwargs):
+        await asyncio.sleep(latency)
+        style = f", style {zlib.crc32(prompt.encode())}" if unique_rewrites else ""
+        return (
+            f"Looking for a Tshirts in the Apparel - Topwear category{style}. "
+            "<response>Try the [Item 1].</response>"
+        )
+
+    return generate_llm_response
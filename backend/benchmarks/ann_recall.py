@@ -0,0 +1,75 @@
+"""Recall, QPS, build time and memory of the IVF index against exact search.
+
+Uses a saved LocalVectorStore (`--store catalog.npz`) or a synthetic clustered
+catalog, and sweeps the number of lists and probes.
+
+Run from the backend directory:
+    python -m benchmarks.ann_recall --items 200000 --lists 256,1024 --probes 1,4,16,64
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from vector_store.ivf_store import IVFVectorStore
+from vector_store.local_store import LocalVectorStore
+
+
+def synthetic_catalog(items: int, dimension: int = 384, clusters: int = 500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    labels = rng.integers(0, clusters, items)
+    noise = rng.standard_normal((items, dimension), dtype=np.float32)
+    embeddings = centers[labels] + 1.5 * noise
+    ids = [str(i) for i in range(items)]
+    metadata = [{} for _ in range(items)]
+    return LocalVectorStore(ids, embeddings, metadata)
+
+
+def recall_at_k(approximate: list[list[dict]], exact: list[list[dict]]) -> float:
+    hits = [
+        len({r["id"] for r in a} & {r["id"] for r in e}) / max(len(e), 1)
+        for a, e in zip(approximate, exact)
+    ]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", help="LocalVectorStore .npz to index instead of synthetic data")
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lists", default="256,1024")
+    parser.add_argument("--probes", default="1,4,16,64")
+    args = parser.parse_args()
+
+    exact = LocalVectorStore.load(args.store) if args.store else synthetic_catalog(args.items)
+    rng = np.random.default_rng(1)
+    queries = exact.embeddings[rng.choice(len(exact), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape, dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    truth = [exact.search(q, k=args.k) for q in queries]
+    exact_qps = args.queries / (time.perf_counter() - start)
+    print(f"exact: {len(exact)} items, {exact.embeddings.nbytes / 1e6:.1f} MB, {exact_qps:.0f} QPS")
+    print(f"{'lists':>6} {'probes':>6} {'build s':>8} {'MB':>7} {'QPS':>8} {'recall@' + str(args.k):>9}")
+
+    for n_lists in (int(v) for v in args.lists.split(",")):
+        start = time.perf_counter()
+        index = IVFVectorStore.build(exact.ids, exact.embeddings, exact.metadata, n_lists=n_lists)
+        build_seconds = time.perf_counter() - start
+        for n_probe in (int(v) for v in args.probes.split(",")):
+            start = time.perf_counter()
+            found = [index.search(q, k=args.k, n_probe=n_probe) for q in queries]
+            qps = args.queries / (time.perf_counter() - start)
+            print(
+                f"{n_lists:>6} {n_probe:>6} {build_seconds:>8.1f} {index.nbytes / 1e6:>7.1f} "
+                f"{qps:>8.0f} {recall_at_k(found, truth):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
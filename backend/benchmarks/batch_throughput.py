@@ -0,0 +1,78 @@
+"""Throughput of recommend_batch against the same number of single requests.
+
+The catalog is synthetic, Serper is the local stub and both LLM calls are
+replaced by a fixed-latency stand-in, so the numbers isolate the pipeline's own
+batching: one encode call, grouped searches and overlapped LLM waits.
+
+Run from the backend directory:
+    python -m benchmarks.batch_throughput --queries 200 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import time
+
+import main as app
+from agents.serper import AsyncSerperClient
+from benchmarks._common import fake_llm, synthetic_store
+from benchmarks.lexical_rewrite import _QUERIES
+from benchmarks.serper_stub import SerperStub
+from common.resources import ResourceRegistry, init_embedding_model
+
+
+def _resources(items: int) -> ResourceRegistry:
+    resources = ResourceRegistry()
+    resources.embedding_model = init_embedding_model()
+    resources.vector_store = synthetic_store(items, resources.embedding_model.get_sentence_embedding_dimension())
+    return resources
+
+
+async def run_single(queries: list[str], resources: ResourceRegistry, serper_url: str) -> float:
+    resources.serper_client = AsyncSerperClient(url=serper_url)
+    start = time.perf_counter()
+    for query in queries:
+        _, search_results = await app.retrieve_products(query, resources)
+        text = await app.generate_recommendations(
+            None, query, app.format_search_results(search_results)
+        )
+        await app.process_recommendations(text, search_results, resources.serper_client)
+    elapsed = time.perf_counter() - start
+    await resources.serper_client.aclose()
+    return elapsed
+
+
+async def run_batch(
+    queries: list[str], resources: ResourceRegistry, serper_url: str, concurrency: int
+) -> float:
+    resources.serper_client = AsyncSerperClient(url=serper_url)
+    start = time.perf_counter()
+    async for _, _, error in app.recommend_batch(queries, resources, llm_concurrency=concurrency):
+        assert error is None, error
+    elapsed = time.perf_counter() - start
+    await resources.serper_client.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=44_000)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    app.generate_llm_response = fake_llm(args.llm_latency)
+    queries = [_QUERIES[i % len(_QUERIES)] for i in range(args.queries)]
+    resources = _resources(args.items)
+
+    with SerperStub(latency=0.05) as stub:
+        single = asyncio.run(run_single(queries, resources, stub.url))
+        batch = asyncio.run(run_batch(queries, resources, stub.url, args.concurrency))
+
+    print(f"{args.queries} queries, LLM latency {args.llm_latency}s, concurrency {args.concurrency}")
+    print(f"single: {single:.1f}s ({args.queries / single:.1f} req/s)")
+    print(f"batch:  {batch:.1f}s ({args.queries / batch:.1f} req/s)")
+
+
+if __name__ == "__main__":
+    main()
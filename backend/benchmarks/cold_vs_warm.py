@@ -0,0 +1,76 @@
+"""Compares per-request resource setup against the shared registry.
+
+Run from the backend directory:
+    python -m benchmarks.cold_vs_warm --requests 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common.resources import (
+    ResourceRegistry,
+    init_bedrock_client,
+    init_embedding_model,
+    init_mongodb,
+)
+from common.constants import (
+    _MONGODB_COLLECTION_NAME,
+    _MONGODB_CONN_STRING,
+    _MONGODB_DB_NAME,
+)
+
+_QUERY = "Looking for a Kurtas in the Apparel - Topwear category. Ideal for Women Ethnic wear."
+
+
+def cold_request() -> float:
+    """Builds every resource the way the endpoint used to, then encodes one query."""
+    start = time.perf_counter()
+    collection = init_mongodb(_MONGODB_CONN_STRING, _MONGODB_DB_NAME, _MONGODB_COLLECTION_NAME)
+    init_bedrock_client(region="us-east-1")
+    model = init_embedding_model()
+    model.encode([_QUERY], normalize_embeddings=True)
+    elapsed = time.perf_counter() - start
+    collection.database.client.close()
+    return elapsed
+
+
+def warm_request(resources: ResourceRegistry) -> float:
+    """Encodes one query with the already-built registry."""
+    start = time.perf_counter()
+    resources.embedding_model.encode([_QUERY], normalize_embeddings=True)
+    return time.perf_counter() - start
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<6} n={len(samples)} "
+        f"mean={statistics.mean(samples) * 1000:.1f}ms "
+        f"median={statistics.median(samples) * 1000:.1f}ms "
+        f"max={max(samples) * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    cold = [cold_request() for _ in range(args.requests)]
+
+    resources = ResourceRegistry()
+    resources.startup()
+    try:
+        warm = [warm_request(resources) for _ in range(args.requests)]
+    finally:
+        asyncio.run(resources.aclose())
+
+    print(f"registry startup (paid once): {resources.startup_seconds * 1000:.1f}ms")
+    _report("cold", cold)
+    _report("warm", warm)
+    print(f"speedup: {statistics.mean(cold) / statistics.mean(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Throughput of the single-request pipeline as more requests are in flight.
+
+Every request runs rewrite, encode, search, recommendation and URL lookup. The
+LLM is a fixed-latency async stand-in that echoes a per-prompt token (so each
+rewrite is a fresh encode), Serper is the local stub and the catalog is
+synthetic. With the event loop kept free, throughput should grow with the
+number of in-flight requests until the CPU pool saturates.
+
+Run from the backend directory:
+    python -m benchmarks.concurrency --requests 128 --in-flight 1,2,4,8,16,32
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main as app
+from agents.serper import AsyncSerperClient
+from benchmarks._common import fake_llm, synthetic_store
+from benchmarks.lexical_rewrite import _QUERIES
+from benchmarks.serper_stub import SerperStub
+from common.resources import ResourceRegistry, init_embedding_model
+
+
+async def _request(query: str, resources: ResourceRegistry) -> None:
+    _, search_results = await app.retrieve_products(query, resources)
+    text = await app.generate_recommendations(
+        None, query, await app.build_context(search_results, resources)
+    )
+    await app.process_recommendations(text, search_results, resources.serper_client)
+
+
+async def run(queries: list[str], resources: ResourceRegistry, serper_url: str, in_flight: int) -> float:
+    resources.serper_client = AsyncSerperClient(url=serper_url, max_concurrency=in_flight)
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def bounded(query: str) -> None:
+        async with semaphore:
+            await _request(query, resources)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(query) for query in queries))
+    elapsed = time.perf_counter() - start
+    await resources.serper_client.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--in-flight", default="1,2,4,8,16,32")
+    parser.add_argument("--items", type=int, default=44_000)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--cpu-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    app.generate_llm_response = fake_llm(args.llm_latency, unique_rewrites=True)
+    resources = ResourceRegistry(cpu_workers=args.cpu_workers)
+    resources.embedding_model = init_embedding_model()
+    resources.vector_store = synthetic_store(
+        args.items, resources.embedding_model.get_sentence_embedding_dimension()
+    )
+    resources.cpu_executor = ThreadPoolExecutor(max_workers=resources.cpu_workers)
+
+    print(f"{args.requests} requests, LLM latency {args.llm_latency}s x2, {resources.cpu_workers} CPU workers")
+    print(f"{'in flight':>9} {'seconds':>8} {'req/s':>7}")
+    with SerperStub(latency=0.05) as stub:
+        for in_flight in (int(v) for v in args.in_flight.split(",")):
+            queries = [f"{_QUERIES[i % len(_QUERIES)]} #{in_flight}-{i}" for i in range(args.requests)]
+            elapsed = asyncio.run(run(queries, resources, stub.url, in_flight))
+            print(f"{in_flight:>9} {elapsed:>8.1f} {args.requests / elapsed:>7.1f}")
+    resources.cpu_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
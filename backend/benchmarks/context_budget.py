@@ -0,0 +1,115 @@
+"""Distinct items and prompt tokens: compact budgeted context against the verbose format.
+
+Result lists are synthetic catalog hits in which most products come in several
+colours, as in the real catalog. By default item embeddings are a shared
+per-product direction plus a small per-colour offset; `--model` embeds the item
+text with the sentence model instead.
+
+Run from the backend directory:
+    python -m benchmarks.context_budget --requests 200 --candidates 20 --budget 200
+"""
+
+import argparse
+import statistics
+import zlib
+
+import numpy as np
+
+from agents.context_builder import ContextBuilder, estimate_tokens, format_search_results
+from data.filters import VALID_FILTERS
+
+_BRANDS = ["Nike", "Puma", "Adidas", "Roadster", "Fabindia", "Biba", "Titan", "Fastrack", "Jealous 21", "Wrangler"]
+
+
+def synthetic_results(candidates: int, rng: np.random.Generator) -> list[dict]:
+    results, score = [], 0.9
+    while len(results) < candidates:
+        gender = VALID_FILTERS["gender"][rng.integers(len(VALID_FILTERS["gender"]))]
+        article = VALID_FILTERS["articleType"][rng.integers(len(VALID_FILTERS["articleType"]))]
+        brand = _BRANDS[rng.integers(len(_BRANDS))]
+        colours = rng.choice(VALID_FILTERS["baseColour"], size=rng.integers(1, 5), replace=False)
+        for colour in colours[:candidates - len(results)]:
+            name = f"{brand} {gender} {colour} {article}"
+            metadata = {
+                "productDisplayName": name,
+                "text": f"{name}. Apparel {article} for {gender}, {colour}, Summer, Casual",
+                "masterCategory": "Apparel",
+                "subCategory": "Topwear",
+                "articleType": article,
+                "gender": gender,
+                "usage": "Casual",
+                "baseColour": colour,
+                "season": "Summer",
+            }
+            results.append({"id": str(len(results)), "score": score, "metadata": metadata})
+            score -= float(rng.uniform(0.001, 0.01))
+    return results
+
+
+def synthetic_embed(dimension: int = 384):
+    def vector(key: str) -> np.ndarray:
+        return np.random.default_rng(zlib.crc32(key.encode())).standard_normal(dimension).astype(np.float32)
+
+    colours = sorted(VALID_FILTERS["baseColour"], key=len, reverse=True)
+
+    def embed(texts: list[str]) -> np.ndarray:
+        rows = []
+        for text in texts:
+            family = text.split(".")[0]
+            for colour in colours:
+                if f" {colour} " in family:
+                    family = family.replace(f" {colour} ", " ", 1)
+                    break
+            row = vector(family) + 0.2 * vector(text)
+            rows.append(row / np.linalg.norm(row))
+        return np.stack(rows)
+
+    return embed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=200)
+    parser.add_argument("--model", action="store_true", help="Embed with the sentence model")
+    args = parser.parse_args()
+
+    if args.model:
+        from common.resources import init_embedding_model
+
+        model = init_embedding_model()
+        embed = lambda texts: model.encode(texts, normalize_embeddings=True)
+    else:
+        embed = synthetic_embed()
+    builder = ContextBuilder(embed, token_budget=args.budget)
+
+    rng = np.random.default_rng(0)
+    reports, distinct_baseline = [], []
+    for _ in range(args.requests):
+        results = synthetic_results(args.candidates, rng)
+        _, report = builder.build(results)
+        reports.append(report)
+        baseline = results[:builder.baseline_items]
+        distinct_baseline.append(len({
+            (r["metadata"]["productDisplayName"].replace(r["metadata"]["baseColour"], "")) for r in baseline
+        }))
+
+    print(f"{args.requests} requests, {args.candidates} candidates each, budget {args.budget} tokens")
+    print(
+        f"verbose top-{builder.baseline_items}: {statistics.mean(r.baseline_tokens for r in reports):.0f} tokens, "
+        f"{statistics.mean(distinct_baseline):.1f} distinct products"
+    )
+    print(
+        f"budgeted:        {statistics.mean(r.tokens for r in reports):.0f} tokens, "
+        f"{statistics.mean(r.items for r in reports):.1f} distinct products "
+        f"(+{statistics.mean(r.duplicates for r in reports):.1f} colour variants folded in)"
+    )
+    print(f"mean tokens saved per request: {builder.stats()['mean_tokens_saved']:.0f}")
+    sample = synthetic_results(args.candidates, rng)
+    print(f"\nexample ({estimate_tokens(format_search_results(sample[:5]))} verbose tokens for 5 items):")
+    print(builder.build(sample)[0])
+
+
+if __name__ == "__main__":
+    main()
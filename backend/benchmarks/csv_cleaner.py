@@ -0,0 +1,94 @@
+"""Throughput and peak memory of the streaming CSV cleaner.
+
+Writes a synthetic styles.csv (`--scale` times the 44k-row catalog by default)
+with the same defects as the real file: unquoted commas in product names,
+quoted names, short rows and rows without an id. Peak memory is traced
+separately from timing, since tracemalloc slows allocation down.
+
+Run from the backend directory:
+    python -m benchmarks.csv_cleaner --scale 10 --chunk-size 10000
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from data.filters import VALID_FILTERS
+from utils.analyse_data import FashionDataCleaner
+
+_HEADER = [
+    "id", "gender", "masterCategory", "subCategory", "articleType",
+    "baseColour", "season", "year", "usage", "productDisplayName",
+]
+_CATALOG_ROWS = 44_424
+
+
+def write_synthetic_styles(path: str, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    fields = _HEADER[1:7]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(_HEADER) + "\n")
+        writer = csv.writer(f)
+        for i in range(rows):
+            values = [VALID_FILTERS[field][rng.integers(len(VALID_FILTERS[field]))] for field in fields[:5]]
+            values.append(VALID_FILTERS["season"][rng.integers(len(VALID_FILTERS["season"]))])
+            row = [str(i), *values, str(2010 + i % 8), "Casual", f"Brand {i % 97} Item {i}"]
+            defect = rng.random()
+            if defect < 0.01:
+                # Unquoted comma in the name, as in the real styles.csv
+                f.write(",".join(row[:-1] + [f"Brand {i % 97}", f" Item {i}"]) + "\n")
+            elif defect < 0.02:
+                writer.writerow(row[:-1] + [f"Brand {i % 97}, Item {i}"])
+            elif defect < 0.025:
+                f.write(",".join(row[:-2]) + "\n")
+            elif defect < 0.027:
+                f.write(",".join(["n/a"] + row[1:]) + "\n")
+            else:
+                f.write(",".join(row) + "\n")
+
+
+def _run(path: str, chunk_size: int, rejects_path: str, materialize: bool) -> int:
+    cleaner = FashionDataCleaner()
+    if materialize:
+        return len(cleaner.load_and_clean_data(path, chunk_size, rejects_path))
+    return sum(len(chunk) for chunk in cleaner.iter_clean_chunks(path, chunk_size, rejects_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "styles.csv")
+        rejects_path = os.path.join(tmp, "rejects.csv")
+        write_synthetic_styles(path, _CATALOG_ROWS * args.scale)
+        size_mb = os.path.getsize(path) / 2**20
+        print(f"{_CATALOG_ROWS * args.scale} rows, {size_mb:.0f}MB, chunk size {args.chunk_size}")
+
+        for label, materialize in (("stream", False), ("load", True)):
+            start = time.perf_counter()
+            rows = _run(path, args.chunk_size, rejects_path, materialize)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            _run(path, args.chunk_size, rejects_path, materialize)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{label:<7} {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s), "
+                f"peak {peak / 2**20:.0f}MB ({peak / 2**20 / size_mb:.1f}x file)"
+            )
+
+        with open(rejects_path) as f:
+            print(f"rejects: {sum(1 for _ in f) - 1} rows in {rejects_path}")
+
+
+if __name__ == "__main__":
+    main()
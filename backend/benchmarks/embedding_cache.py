@@ -0,0 +1,67 @@
+"""Per-call latency of generate_embedding with and without the embedding cache.
+
+Run from the backend directory:
+    python -m benchmarks.embedding_cache --calls 500 --distinct 50
+"""
+
+import argparse
+import itertools
+import statistics
+import time
+
+from cache.embedding_cache import EmbeddingCache
+from common.constants import _EMBEDDING_MODEL_NAME
+from common.resources import init_embedding_model
+from main import generate_embedding
+
+_TEMPLATE = (
+    "Looking for a {article} in the Apparel - Topwear category. "
+    "Ideal for {gender} Casual wear, preferably in {colour} color, suitable for Summer season."
+)
+
+
+def _queries(distinct: int) -> list[str]:
+    combos = itertools.product(
+        ["Tshirts", "Shirts", "Kurtas", "Tops", "Sweaters"],
+        ["Men", "Women"],
+        ["Blue", "Black", "White", "Red", "Green"],
+    )
+    return [
+        _TEMPLATE.format(article=a, gender=g, colour=c)
+        for a, g, c in itertools.islice(combos, distinct)
+    ]
+
+
+def _time_calls(model, texts: list[str], cache) -> list[float]:
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        generate_embedding(model, text, cache)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=50)
+    args = parser.parse_args()
+
+    model = init_embedding_model()
+    distinct = _queries(args.distinct)
+    texts = [distinct[i % len(distinct)] for i in range(args.calls)]
+
+    uncached = _time_calls(model, texts, None)
+    cache = EmbeddingCache(_EMBEDDING_MODEL_NAME)
+    cached = _time_calls(model, texts, cache)
+
+    for label, samples in (("no cache", uncached), ("cache", cached)):
+        print(
+            f"{label:<9} mean={statistics.mean(samples) * 1e6:.0f}us "
+            f"p50={statistics.median(samples) * 1e6:.0f}us"
+        )
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Encode throughput and latency for concurrent single-text embeds, with and without batching.
+
+Each of `--concurrency` callers embeds `--calls` distinct texts back to back.
+The baseline hops to the CPU pool per text; the scheduler rows coalesce texts
+into one `encode` per batch for each `max_wait` setting.
+
+Run from the backend directory:
+    python -m benchmarks.embedding_scheduler --concurrency 32 --calls 20 --max-wait 0,0.002,0.005
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.resources import init_embedding_model
+from embedding.scheduler import EmbeddingScheduler
+from main import run_blocking
+
+_TEMPLATE = "Looking for {colour} {article} for {gender}, variant {i}"
+
+
+def _texts(caller: int, calls: int) -> list[str]:
+    colours = ["Blue", "Black", "White", "Red", "Green"]
+    articles = ["Tshirts", "Shirts", "Kurtas", "Tops", "Sweaters"]
+    return [
+        _TEMPLATE.format(colour=colours[i % 5], article=articles[caller % 5], gender="Men", i=f"{caller}-{i}")
+        for i in range(calls)
+    ]
+
+
+async def _run(embed, concurrency: int, calls: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    async def caller(index: int) -> None:
+        for text in _texts(index, calls):
+            start = time.perf_counter()
+            await embed(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def _report(label: str, elapsed: float, latencies: list[float], extra: str = "") -> None:
+    quantiles = statistics.quantiles(latencies, n=20)
+    print(
+        f"{label:<18} {len(latencies) / elapsed:>8.0f}/s "
+        f"p50={quantiles[9] * 1000:>6.1f}ms p95={quantiles[18] * 1000:>6.1f}ms {extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait", default="0,0.002,0.005")
+    parser.add_argument("--cpu-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    model = init_embedding_model()
+    executor = ThreadPoolExecutor(max_workers=args.cpu_workers)
+
+    def encode(texts: list[str]):
+        return model.encode(texts, normalize_embeddings=True)
+
+    async def single(text: str):
+        return (await run_blocking(executor, encode, [text]))[0]
+
+    _report("per-text encode", *asyncio.run(_run(single, args.concurrency, args.calls)))
+    for max_wait in (float(v) for v in args.max_wait.split(",")):
+        scheduler = EmbeddingScheduler(
+            encode, max_batch_size=args.max_batch_size, max_wait=max_wait, executor=executor
+        )
+
+        async def batched():
+            try:
+                return await _run(scheduler.embed, args.concurrency, args.calls)
+            finally:
+                await scheduler.aclose()
+
+        elapsed, latencies = asyncio.run(batched())
+        stats = scheduler.stats()
+        _report(
+            f"batched {max_wait * 1000:g}ms", elapsed, latencies,
+            f"mean batch={stats['mean_batch_size']:.1f} "
+            f"queue p95={stats['queue_delay_ms']['p95']:.1f}ms",
+        )
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""How much metadata pre-filtering cuts the number of vectors scored.
+
+Builds a synthetic catalog whose metadata is drawn from VALID_FILTERS and runs
+the same queries with and without the filters extracted from the query text.
+
+Run from the backend directory:
+    python -m benchmarks.filtered_search --items 44000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks._common import synthetic_store
+from data.filters import extract_filters
+
+# (user query, rewrite in the prompt's template) pairs; masterCategory is only
+# pushed down from the rewrite.
+_QUERIES = [
+    ("women's blue summer dress",
+     "Looking for a Dresses in the Apparel - Dress category. Ideal for Women Casual wear."),
+    ("formal shoes for men",
+     "Looking for a Formal Shoes in the Footwear - Shoes category. Ideal for Men Formal wear."),
+    ("girls party wear",
+     "Looking for a Dresses in the Apparel - Dress category. Ideal for Girls Party wear."),
+    ("unisex sports watch",
+     "Looking for a Watches in the Accessories - Watches category. Ideal for Unisex Sports wear."),
+    ("women's kurta in apparel",
+     "Looking for a Kurtas in the Apparel - Topwear category. Ideal for Women Ethnic wear."),
+    ("boys footwear",
+     "Looking for a Casual Shoes in the Footwear - Shoes category. Ideal for Boys Casual wear."),
+    ("men's casual tshirt",
+     "Looking for a Tshirts in the Apparel - Topwear category. Ideal for Men Casual wear."),
+]
+
+
+def _time(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=44_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    store = synthetic_store(args.items)
+    start = time.perf_counter()
+    store.bitmap_index
+    print(f"bitmap build: {(time.perf_counter() - start) * 1000:.0f}ms for {args.items} items")
+
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(store.dimension).astype(np.float32)
+    print(f"{'query':<28} {'matches':>8} {'of':>7} {'unfiltered':>11} {'bitmap':>9}")
+    for text, rewritten in _QUERIES:
+        filters = extract_filters(text, rewritten)
+        rows = store.candidate_rows(filters)
+        scored = len(rows) if rows is not None else len(store)
+        unfiltered = _time(lambda: store.search(query, k=5), args.repeats)
+        filtered = _time(lambda: store.search(query, k=5, filters=filters), args.repeats)
+        print(
+            f"{text:<28} {scored:>8} {len(store):>7} "
+            f"{unfiltered * 1000:>9.2f}ms {filtered * 1000:>7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Fast-path hit ratio and latency of the lexical query rewriter.
+
+The article hierarchy comes from a saved LocalVectorStore (`--store`) or from the
+Mongo catalog. Saved time is estimated from `--llm-latency`, the typical duration
+of one LLM rewrite.
+
+Run from the backend directory:
+    python -m benchmarks.lexical_rewrite --store catalog.npz --llm-latency 1.5
+"""
+
+import argparse
+import statistics
+import time
+
+from agents.query_rewriter import (
+    LexicalQueryRewriter,
+    article_hierarchy_from_collection,
+    article_hierarchy_from_metadata,
+)
+from common.constants import _MONGODB_COLLECTION_NAME, _MONGODB_CONN_STRING, _MONGODB_DB_NAME
+from common.resources import init_mongodb
+from data.filters import default_matcher
+from vector_store.local_store import LocalVectorStore
+
+_QUERIES = [
+    "women's blue summer dress",
+    "blue summer dress women",
+    "red kurta for diwali",
+    "mens black tshirt",
+    "casual shoes for men in winter",
+    "white sneakers for women",
+    "formal trousers for office",
+    "ladies handbag in brown",
+    "kids party wear",
+    "something to wear on a first date",
+    "what goes with my green jacket",
+    "gym shorts for men",
+    "traditional saree for wedding",
+    "black sunglasses",
+    "outfit for a beach vacation",
+    "grey jeans for boys",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", help="LocalVectorStore .npz to read the article hierarchy from")
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--min-coverage", type=float, default=0.6)
+    args = parser.parse_args()
+
+    if args.store:
+        hierarchy = article_hierarchy_from_metadata(LocalVectorStore.load(args.store).metadata)
+    else:
+        collection = init_mongodb(_MONGODB_CONN_STRING, _MONGODB_DB_NAME, _MONGODB_COLLECTION_NAME)
+        hierarchy = article_hierarchy_from_collection(collection)
+
+    rewriter = LexicalQueryRewriter(default_matcher(), hierarchy, min_coverage=args.min_coverage)
+    samples = []
+    for query in _QUERIES:
+        start = time.perf_counter()
+        rewritten = rewriter.rewrite(query)
+        samples.append(time.perf_counter() - start)
+        print(f"{'HIT ' if rewritten else 'MISS'} {query!r} -> {rewritten}")
+
+    stats = rewriter.stats()
+    saved = stats["fast_path_hits"] * args.llm_latency - sum(samples)
+    print(f"\nhit ratio: {stats['hit_ratio']:.0%} of {len(_QUERIES)} queries")
+    print(f"fast path: p50={statistics.median(samples) * 1e6:.0f}us max={max(samples) * 1e6:.0f}us")
+    print(f"estimated LLM time saved: {saved:.1f}s ({args.llm_latency}s per rewrite)")
+
+
+if __name__ == "__main__":
+    main()
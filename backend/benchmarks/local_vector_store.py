@@ -0,0 +1,47 @@
+"""Top-k latency of the exact local vector store on a synthetic catalog.
+
+Run from the backend directory:
+    python -m benchmarks.local_vector_store --items 44000 --queries 1000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks._common import synthetic_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=44_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    store = synthetic_store(args.items)
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.queries, store.dimension), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search(query, k=args.k)
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    store.search_many(queries, k=args.k)
+    batched = time.perf_counter() - start
+
+    print(f"{args.items} items x {store.dimension} dims ({store.embeddings.nbytes / 1e6:.1f} MB)")
+    print(
+        f"single query: p50={statistics.median(samples) * 1e6:.0f}us "
+        f"p99={np.percentile(samples, 99) * 1e6:.0f}us"
+    )
+    print(f"batched:      {batched / args.queries * 1e6:.0f}us per query")
+
+
+if __name__ == "__main__":
+    main()
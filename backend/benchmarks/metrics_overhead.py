@@ -0,0 +1,67 @@
+"""Per-call cost of the pipeline stage instrumentation.
+
+Times a trivial sync and async function bare and wrapped with
+`PipelineMetrics.timed`, and the cost of rendering /metrics once every stage
+has samples. The difference per call is what each instrumented stage adds to
+a request.
+
+Run from the backend directory:
+    python -m benchmarks.metrics_overhead --calls 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common.metrics import PipelineMetrics
+
+
+def _noop(x: int) -> int:
+    return x
+
+
+async def _anoop(x: int) -> int:
+    return x
+
+
+def _per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+async def _aper_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        await fn(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--stages", type=int, default=8)
+    args = parser.parse_args()
+
+    metrics = PipelineMetrics()
+    timed = metrics.timed("sync")(_noop)
+    atimed = metrics.timed("async")(_anoop)
+
+    bare, wrapped = _per_call_ns(_noop, args.calls), _per_call_ns(timed, args.calls)
+    abare = asyncio.run(_aper_call_ns(_anoop, args.calls))
+    awrapped = asyncio.run(_aper_call_ns(atimed, args.calls))
+    print(f"sync   bare={bare:.0f}ns timed={wrapped:.0f}ns overhead={wrapped - bare:.0f}ns/call")
+    print(f"async  bare={abare:.0f}ns timed={awrapped:.0f}ns overhead={awrapped - abare:.0f}ns/call")
+
+    for stage in range(args.stages):
+        for i in range(1000):
+            with metrics.track(f"stage_{stage}"):
+                pass
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"render {args.stages} stages: {(time.perf_counter() - start) * 1e6:.0f}us, {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Cold start, query latency, batch throughput, memory and parity of the encoder backends.
+
+Each backend is measured in a fresh interpreter so cold start includes its
+imports and peak RSS is its own. Parity is the cosine between each ONNX
+backend's normalized embeddings and the torch ones. Export the model first
+with `python -m embedding.onnx_encoder`.
+
+Run from the backend directory:
+    python -m benchmarks.onnx_encoder --backends torch,onnx,onnx-int8 --queries 200
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+_QUERIES = [
+    "Looking for a {article} in the Apparel - Topwear category. Ideal for {gender} Casual wear, "
+    "preferably in {colour} color.".format(article=article, gender=gender, colour=colour)
+    for article in ("Tshirts", "Shirts", "Kurtas", "Tops")
+    for gender in ("Men", "Women")
+    for colour in ("Blue", "Black", "White", "Red", "Green")
+]
+
+
+def measure(backend: str, onnx_model_dir: str, queries: int, batch_size: int) -> dict:
+    start = time.perf_counter()
+    from embedding.encoders import load_encoder
+
+    imported = time.perf_counter()
+    model = load_encoder(backend=backend, onnx_model_dir=onnx_model_dir)
+    loaded = time.perf_counter()
+    model.encode([_QUERIES[0]], normalize_embeddings=True)
+    first = time.perf_counter()
+
+    latencies = []
+    for i in range(queries):
+        query_start = time.perf_counter()
+        model.encode([_QUERIES[i % len(_QUERIES)]], normalize_embeddings=True)
+        latencies.append(time.perf_counter() - query_start)
+
+    texts = [_QUERIES[i % len(_QUERIES)] for i in range(batch_size * 8)]
+    batch_start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    batch_seconds = time.perf_counter() - batch_start
+
+    quantiles = statistics.quantiles(latencies, n=20)
+    return {
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "cold_start_s": first - start,
+        "p50_ms": quantiles[9] * 1000,
+        "p95_ms": quantiles[18] * 1000,
+        "batch_per_s": len(texts) / batch_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _parity(backends: list[str], onnx_model_dir: str) -> dict[str, dict[str, float]]:
+    from embedding.encoders import load_encoder
+    from embedding.onnx_encoder import cosine_parity
+
+    reference = load_encoder(backend="torch")
+    return {
+        backend: cosine_parity(reference, load_encoder(backend=backend, onnx_model_dir=onnx_model_dir))
+        for backend in backends
+        if backend != "torch"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--onnx-model-dir", default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.onnx_model_dir, args.queries, args.batch_size)))
+        return
+
+    backends = args.backends.split(",")
+    print(f"{'backend':<10} {'cold s':>7} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'batch/s':>8} {'RSS MB':>7}")
+    for backend in backends:
+        command = [
+            sys.executable, "-m", "benchmarks.onnx_encoder", "--child", backend,
+            "--queries", str(args.queries), "--batch-size", str(args.batch_size),
+        ]
+        if args.onnx_model_dir:
+            command += ["--onnx-model-dir", args.onnx_model_dir]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{backend:<10} {result['cold_start_s']:>7.2f} {result['load_s']:>7.2f} "
+            f"{result['p50_ms']:>7.2f} {result['p95_ms']:>7.2f} {result['batch_per_s']:>8.0f} "
+            f"{result['peak_rss_mb']:>7.0f}"
+        )
+
+    if "torch" in backends:
+        for backend, parity in _parity(backends, args.onnx_model_dir).items():
+            print(f"{backend} vs torch: min cosine {parity['min']:.5f}, mean {parity['mean']:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""In-process stand-in for a Pinecone serverless index.
+
+Implements the calls the pipeline makes (upsert, delete, fetch, list, query and
+describe_index_stats) over plain dicts, with configurable per-request latency,
+injected failures and Pinecone's request limits, so bulk operations can be run
+without network access or an API key.
+"""
+
+import json
+import random
+import threading
+import time
+import typing as t
+
+import numpy as np
+
+
+class FakeApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"({status}) {message}")
+        self.status = status
+
+
+class FakePineconeIndex:
+    """Thread-safe dict-backed index; `failure_rate` of requests raise a 503."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        max_vectors_per_request: int = 1000,
+        max_request_bytes: int = 2 * 1024 * 1024,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_vectors_per_request = max_vectors_per_request
+        self.max_request_bytes = max_request_bytes
+        self.requests = 0
+        self.failures = 0
+        self._namespaces: dict[str, dict[str, dict[str, t.Any]]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _request(self) -> None:
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                raise FakeApiError(503, "Service unavailable")
+
+    def _namespace(self, namespace: str) -> dict[str, dict[str, t.Any]]:
+        return self._namespaces.setdefault(namespace, {})
+
+    def upsert(self, vectors: list[t.Any], namespace: str = "") -> dict[str, int]:
+        if len(vectors) > self.max_vectors_per_request:
+            raise FakeApiError(400, f"Upsert of {len(vectors)} vectors exceeds the request limit")
+        records = [
+            v if isinstance(v, dict) else {"id": v[0], "values": v[1], "metadata": v[2] if len(v) > 2 else None}
+            for v in vectors
+        ]
+        size = len(json.dumps(records, default=str))
+        if size > self.max_request_bytes:
+            raise FakeApiError(400, f"Request of {size} bytes exceeds the size limit")
+        self._request()
+        with self._lock:
+            store = self._namespace(namespace)
+            for record in records:
+                store[record["id"]] = {
+                    "id": record["id"],
+                    "values": list(record["values"]),
+                    "metadata": record.get("metadata") or {},
+                }
+        return {"upserted_count": len(records)}
+
+    def delete(self, ids: t.Optional[list[str]] = None, delete_all: bool = False, namespace: str = "") -> dict:
+        if ids is not None and len(ids) > self.max_vectors_per_request:
+            raise FakeApiError(400, f"Delete of {len(ids)} ids exceeds the request limit")
+        self._request()
+        with self._lock:
+            store = self._namespace(namespace)
+            if delete_all:
+                store.clear()
+            for vector_id in ids or ():
+                store.pop(vector_id, None)
+        return {}
+
+    def fetch(self, ids: list[str], namespace: str = "") -> dict[str, t.Any]:
+        self._request()
+        with self._lock:
+            store = self._namespace(namespace)
+            return {"vectors": {i: store[i] for i in ids if i in store}, "namespace": namespace}
+
+    def list(self, prefix: str = "", limit: int = 100, namespace: str = "") -> t.Iterator[list[str]]:
+        """Yields pages of ids in sorted order, like the serverless list endpoint."""
+        with self._lock:
+            ids = sorted(i for i in self._namespace(namespace) if i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            self._request()
+            yield ids[start:start + limit]
+
+    def query(
+        self,
+        vector: t.Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: t.Optional[dict[str, t.Any]] = None,
+        namespace: str = "",
+    ) -> dict[str, t.Any]:
+        self._request()
+        with self._lock:
+            records = list(self._namespace(namespace).values())
+        if not records:
+            return {"matches": [], "namespace": namespace}
+        matrix = np.asarray([r["values"] for r in records], dtype=np.float32)
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        order = np.argsort(-scores)[:top_k]
+        return {
+            "matches": [
+                {
+                    "id": records[i]["id"],
+                    "score": float(scores[i]),
+                    **({"metadata": records[i]["metadata"]} if include_metadata else {}),
+                    **({"values": records[i]["values"]} if include_values else {}),
+                }
+                for i in order
+            ],
+            "namespace": namespace,
+        }
+
+    def describe_index_stats(self) -> dict[str, t.Any]:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(store)} for name, store in self._namespaces.items()}
+        return {
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
@@ -0,0 +1,67 @@
+"""Bulk upsert throughput against per-vector upserts, on the in-process fake index.
+
+Vectors come from a generator, so the catalog is never built in memory, and a
+fraction of requests fail to exercise the retry path.
+
+Run from the backend directory:
+    python -m benchmarks.pinecone_upsert --vectors 20000 --latency 0.05 --failure-rate 0.05
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.pinecone_stub import FakePineconeIndex
+from utils.pinecone_utils import bulk_upsert, upsert_single_vector
+
+
+def synthetic_vectors(count: int, dimension: int = 384, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        yield {
+            "id": str(i),
+            "values": rng.standard_normal(dimension, dtype=np.float32).tolist(),
+            "metadata": {"productDisplayName": f"Item {i}", "gender": "Men"},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--single-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    index = FakePineconeIndex(latency=args.latency)
+    start = time.perf_counter()
+    for vector in synthetic_vectors(args.single_sample):
+        upsert_single_vector(index, vector["id"], vector["values"], vector["metadata"])
+    single_rate = args.single_sample / (time.perf_counter() - start)
+
+    index = FakePineconeIndex(latency=args.latency, failure_rate=args.failure_rate)
+    start = time.perf_counter()
+    reports = bulk_upsert(
+        index,
+        synthetic_vectors(args.vectors),
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        backoff=0.05,
+    )
+    elapsed = time.perf_counter() - start
+    stored = index.describe_index_stats()["total_vector_count"]
+
+    print(f"single: {single_rate:,.0f} vectors/s ({args.single_sample} sampled)")
+    print(
+        f"bulk:   {args.vectors / elapsed:,.0f} vectors/s, {len(reports)} chunks, "
+        f"{sum(r.attempts for r in reports) - len(reports)} retries, "
+        f"{sum(not r.ok for r in reports)} failed, {stored}/{args.vectors} stored"
+    )
+    print(f"estimated full catalog via single upserts: {args.vectors / single_rate:.0f}s vs {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Memory, latency and recall@k of int8 and binary codes with float32 rescoring.
+
+Uses a saved LocalVectorStore (`--store catalog.npz`) or the synthetic clustered
+catalog from `ann_recall`, and sweeps the rescore factor (candidates kept from
+the first pass, as a multiple of k).
+
+Run from the backend directory:
+    python -m benchmarks.quantization --items 44000 --rescore 1,4,10,50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.ann_recall import recall_at_k, synthetic_catalog
+from vector_store.local_store import LocalVectorStore
+from vector_store.quantized_store import QUANTIZATION_MODES, QuantizedVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", help="LocalVectorStore .npz to quantize instead of synthetic data")
+    parser.add_argument("--items", type=int, default=44_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore", default="1,4,10,50")
+    args = parser.parse_args()
+
+    exact = LocalVectorStore.load(args.store) if args.store else synthetic_catalog(args.items)
+    rng = np.random.default_rng(1)
+    queries = exact.embeddings[rng.choice(len(exact), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape, dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    truth = [exact.search(q, k=args.k) for q in queries]
+    exact_ms = (time.perf_counter() - start) / args.queries * 1000
+    float_mb = exact.embeddings.nbytes / 1e6
+    print(f"{len(exact)} items, dimension {exact.dimension}")
+    print(f"{'mode':<8} {'rescore':>7} {'scan MB':>8} {'ms/query':>9} {'recall@' + str(args.k):>9}")
+    print(f"{'float32':<8} {'-':>7} {float_mb:>8.1f} {exact_ms:>9.2f} {1.0:>9.3f}")
+
+    for mode in QUANTIZATION_MODES:
+        store = QuantizedVectorStore(exact.ids, exact.embeddings, exact.metadata, mode=mode)
+        for factor in (int(v) for v in args.rescore.split(",")):
+            store.rescore_factor = factor
+            start = time.perf_counter()
+            found = [store.search(q, k=args.k) for q in queries]
+            ms = (time.perf_counter() - start) / args.queries * 1000
+            print(
+                f"{mode:<8} {factor:>7} {store.nbytes / 1e6:>8.1f} {ms:>9.2f} "
+                f"{recall_at_k(found, truth):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
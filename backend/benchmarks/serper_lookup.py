@@ -0,0 +1,53 @@
+"""Compares sequential and concurrent product URL lookups against the Serper stub.
+
+Run from the backend directory:
+    python -m benchmarks.serper_lookup --products 6 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import time
+
+from agents.serper import AsyncSerperClient, _search_serper
+from benchmarks.serper_stub import SerperStub
+
+
+def run_sequential(url: str, names: list[str]) -> float:
+    start = time.perf_counter()
+    for name in names:
+        _search_serper(name, url=url)
+    return time.perf_counter() - start
+
+
+async def run_concurrent(url: str, names: list[str], batch_size: int) -> float:
+    client = AsyncSerperClient(url=url, batch_size=batch_size)
+    try:
+        start = time.perf_counter()
+        links = await client.search_many(names)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.aclose()
+    assert all(links), "stub returned an empty link"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    names = [f"Global Desi Women Kurta {i}" for i in range(args.products)]
+    with SerperStub(latency=args.latency) as stub:
+        sequential = run_sequential(stub.url, names)
+        concurrent = asyncio.run(run_concurrent(stub.url, names, batch_size=1))
+        batched = asyncio.run(run_concurrent(stub.url, names, batch_size=len(names)))
+
+    print(f"{args.products} lookups at {args.latency * 1000:.0f}ms each")
+    print(f"sequential: {sequential * 1000:.1f}ms")
+    print(f"concurrent: {concurrent * 1000:.1f}ms")
+    print(f"batched:    {batched * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
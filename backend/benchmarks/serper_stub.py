@@ -0,0 +1,64 @@
+"""Local stand-in for the Serper shopping endpoint.
+
+Answers single and batched request bodies after a fixed delay so lookups can be
+measured without network access or an API key.
+"""
+
+import json
+import threading
+import time
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _answer(query: dict[str, t.Any]) -> dict[str, t.Any]:
+    slug = query.get("q", "").replace(" ", "-").lower()
+    return {
+        "searchParameters": {"q": query.get("q"), "gl": query.get("gl"), "type": "shopping"},
+        "shopping": [{"title": query.get("q"), "link": f"http://stub.local/{slug}"}],
+    }
+
+
+class SerperStub:
+    """Threaded HTTP server that mimics Serper with a configurable latency."""
+
+    def __init__(self, latency: float = 0.1, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests_served = 0
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(stub.latency)
+                stub.requests_served += 1
+                answer = [_answer(q) for q in body] if isinstance(body, list) else _answer(body)
+                data = json.dumps(answer).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/shopping"
+
+    def __enter__(self) -> "SerperStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
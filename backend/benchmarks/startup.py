@@ -0,0 +1,92 @@
+"""Import-time profile of the API module and, optionally, time until it is ready.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, then
+totals the self time of every module per top-level package, so whichever
+dependency still loads eagerly shows up at the top. With `--ready`, a second
+fresh interpreter imports main and runs the same warm start as the app
+lifespan (this needs the real model and services).
+
+Run from the backend directory:
+    python -m benchmarks.startup --top 15 --ready
+"""
+
+import argparse
+import collections
+import json
+import subprocess
+import sys
+
+_IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+_READY_SCRIPT = """
+import json, os, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+resources = main.ResourceRegistry(
+    vector_backend=os.getenv("VECTOR_BACKEND", "mongo"),
+    local_store_path=os.getenv("LOCAL_VECTOR_STORE_PATH"),
+    embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+    onnx_model_dir=os.getenv("ONNX_MODEL_DIR"),
+)
+main.warm_start(resources)
+print(json.dumps({
+    "import_s": imported - start,
+    "ready_s": time.perf_counter() - start,
+    **resources.readiness(),
+}))
+resources.shutdown()
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """`(module, self_us, cumulative_us)` for each line of `-X importtime` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--ready", action="store_true", help="Also time the warm start")
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SCRIPT],
+        check=True, capture_output=True, text=True,
+    )
+    wall = float(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+
+    packages: dict[str, int] = collections.Counter()
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    print(f"import main: {wall:.2f}s wall, {len(modules)} modules")
+    print(f"{'package':<28} {'self ms':>8} {'share':>6}")
+    total = sum(packages.values()) or 1
+    for package, self_us in packages.most_common(args.top):
+        print(f"{package:<28} {self_us / 1000:>8.1f} {self_us / total:>6.1%}")
+
+    if args.ready:
+        result = subprocess.run(
+            [sys.executable, "-c", _READY_SCRIPT], check=True, capture_output=True, text=True
+        )
+        ready = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"ready after {ready['ready_s']:.2f}s (import {ready['import_s']:.2f}s, "
+            f"startup {ready['startup_seconds'] or 0:.2f}s), error: {ready['error']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
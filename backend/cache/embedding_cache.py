@@ -0,0 +1,80 @@
+"""Memory-bounded LRU cache for sentence embeddings."""
+
+import hashlib
+import threading
+import typing as t
+from collections import OrderedDict
+
+import numpy as np
+
+
+def embedding_key(model_name: str, text: str) -> bytes:
+    """Hashes the model name and text into a compact cache key."""
+    return hashlib.blake2b(f"{model_name}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """LRU of read-only float32 vectors, bounded by total buffer size in bytes."""
+
+    def __init__(self, model_name: str, max_bytes: int = 64 * 1024 * 1024):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str, count_miss: bool = True) -> t.Optional[np.ndarray]:
+        """Cached vector for `text`; pass `count_miss=False` when `encode` will look it up again."""
+        key = embedding_key(self.model_name, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray) -> np.ndarray:
+        """Stores a float32 copy of `vector` and returns it."""
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        key = embedding_key(self.model_name, text)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return vector
+
+    def encode(self, model, texts: list[str]) -> np.ndarray:
+        """Encodes and L2-normalizes `texts`, running the model only on uncached ones."""
+        vectors: list[t.Optional[np.ndarray]] = [self.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = model.encode(
+                [texts[i] for i in missing], normalize_embeddings=True
+            )
+            for i, vector in zip(missing, encoded):
+                vectors[i] = self.put(texts[i], vector)
+        return np.stack(vectors)
+
+    def stats(self) -> dict[str, t.Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
@@ -0,0 +1,99 @@
+"""TTL-bounded LRU cache of parsed LLM responses for deterministic prompts."""
+
+import hashlib
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from common import logger
+
+log = logger.create_logger()
+
+
+def prompt_key(model_id: str, temperature: float, prompt: str) -> bytes:
+    """Hashes everything that determines a deterministic completion."""
+    return hashlib.blake2b(
+        f"{model_id}\0{temperature!r}\0{prompt}".encode("utf-8"), digest_size=16
+    ).digest()
+
+
+class LLMResponseCache:
+    """Maps (model, temperature, rendered prompt) to the extracted response body.
+
+    Only greedy decoding (temperature 0) is cached, since any other setting can
+    legitimately return something different each time. Entries expire after
+    `ttl` seconds, the least recently used are evicted past `max_entries`, and
+    everything is dropped when the catalog version changes, because the prompt
+    embeds catalog data that may have been re-ingested under the same text.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 6 * 60 * 60,
+        catalog_version: t.Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.catalog_version = catalog_version
+        self._entries: "OrderedDict[bytes, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def cacheable(temperature: float) -> bool:
+        return temperature == 0
+
+    def get(self, model_id: str, temperature: float, prompt: str) -> t.Optional[str]:
+        if not self.cacheable(temperature):
+            self._counters["bypassed"] += 1
+            return None
+        key = prompt_key(model_id, temperature, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            response, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return response
+
+    def put(self, model_id: str, temperature: float, prompt: str, response: str) -> None:
+        if not self.cacheable(temperature):
+            return
+        key = prompt_key(model_id, temperature, prompt)
+        with self._lock:
+            self._entries[key] = (response, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_catalog_version(self, version: t.Optional[str]) -> None:
+        """Clears the cache if the catalog changed since the entries were stored."""
+        with self._lock:
+            if version == self.catalog_version:
+                return
+            dropped = len(self._entries)
+            self._entries.clear()
+            self.catalog_version = version
+            self._counters["invalidations"] += 1
+        log.info(f"Catalog version is now {version}, dropped {dropped} cached LLM responses")
+
+    def stats(self) -> dict[str, t.Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_ratio": self._counters["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "catalog_version": self.catalog_version,
+        }
@@ -0,0 +1,211 @@
+"""Exact plus nearest-neighbour cache for rewritten search queries."""
+
+import os
+import re
+import threading
+import time
+import typing as t
+
+import numpy as np
+
+from common import logger
+
+log = logger.create_logger()
+
+_SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+# Bumped whenever `normalize_query` changes, so saved exact-match keys stay comparable.
+_KEY_VERSION = 2
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases and drops possessives and punctuation, keeping word order.
+
+    Order carries meaning ("shirt with blue jeans" vs "blue shirt with jeans"),
+    so reorderings are left to the cosine tier and its threshold.
+    """
+    query = re.sub(r"'s\b", "", query.lower())
+    return " ".join(re.sub(r"[^\w\s]", " ", query).split())
+
+
+class SemanticQueryCache:
+    """Two-level cache: exact match on the normalized query, then cosine nearest neighbour.
+
+    Embeddings are expected to be L2-normalized so the dot product is the cosine
+    similarity. Entries are evicted least-recently-used once `max_entries` is reached.
+    """
+
+    def __init__(
+        self,
+        path: t.Optional[str] = None,
+        threshold: float = 0.92,
+        max_entries: int = 5000,
+        dimension: int = 384,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dimension = dimension
+
+        self._embeddings = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._keys: list[str] = []
+        self._values: list[str] = []
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self._counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        self._similarity_buckets = [0] * len(_SIMILARITY_BUCKETS)
+        self._similarity_sum = 0.0
+        self._similarity_count = 0
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _observe_similarity(self, score: float) -> None:
+        self._similarity_sum += score
+        self._similarity_count += 1
+        for i, bound in enumerate(_SIMILARITY_BUCKETS):
+            if score <= bound:
+                self._similarity_buckets[i] += 1
+                break
+
+    def get_exact(self, query: str) -> t.Optional[str]:
+        """Returns the cached rewrite for an exact normalized match."""
+        key = normalize_query(query)
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                return None
+            self._last_used[slot] = time.time()
+            self._counters["exact_hits"] += 1
+            return self._values[slot]
+
+    def get_similar(self, embedding: np.ndarray) -> t.Optional[str]:
+        """Returns the rewrite of the nearest cached query if it clears the threshold."""
+        with self._lock:
+            size = len(self._keys)
+            if size == 0:
+                self._counters["misses"] += 1
+                return None
+            scores = self._embeddings[:size] @ np.asarray(embedding, dtype=np.float32)
+            slot = int(np.argmax(scores))
+            score = float(scores[slot])
+            self._observe_similarity(score)
+            if score < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            self._last_used[slot] = time.time()
+            self._counters["semantic_hits"] += 1
+            return self._values[slot]
+
+    def put(self, query: str, embedding: np.ndarray, rewritten: str) -> None:
+        """Stores a rewrite, evicting the least recently used entry when full."""
+        key = normalize_query(query)
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                if len(self._keys) < self.max_entries:
+                    slot = len(self._keys)
+                    self._keys.append(key)
+                    self._values.append(rewritten)
+                else:
+                    slot = int(np.argmin(self._last_used[:len(self._keys)]))
+                    del self._index[self._keys[slot]]
+                    self._keys[slot] = key
+                    self._values[slot] = rewritten
+                self._index[key] = slot
+            else:
+                self._values[slot] = rewritten
+            self._embeddings[slot] = np.asarray(embedding, dtype=np.float32)
+            self._last_used[slot] = time.time()
+            self._dirty = True
+
+    def stats(self) -> dict[str, t.Any]:
+        """Returns hit counters, the hit rate and the distribution of best-match similarities."""
+        hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "entries": len(self._keys),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "mean_similarity": (
+                self._similarity_sum / self._similarity_count if self._similarity_count else 0.0
+            ),
+            "similarity_buckets": dict(zip(_SIMILARITY_BUCKETS, self._similarity_buckets)),
+            "similarity_sum": self._similarity_sum,
+            "similarity_count": self._similarity_count,
+        }
+
+    def _read(self) -> t.Optional[dict[str, np.ndarray]]:
+        """The entries saved at `path`, or None if there are none this cache can use."""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if data["embeddings"].shape[1:] != (self.dimension,):
+                    log.warning(f"Ignoring rewrite cache at {self.path}: dimension mismatch")
+                    return None
+                if "key_version" not in data.files or int(data["key_version"]) != _KEY_VERSION:
+                    log.warning(f"Ignoring rewrite cache at {self.path}: saved with an older key format")
+                    return None
+                return {name: data[name] for name in ("embeddings", "keys", "values", "last_used")}
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Ignoring unreadable rewrite cache at {self.path}: {e}")
+            return None
+
+    def _most_recent(self, entries: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """One entry per key, the most recently used, capped at `max_entries`."""
+        order = np.argsort(-entries["last_used"], kind="stable")
+        _, first = np.unique(entries["keys"][order], return_index=True)
+        keep = order[np.sort(first)][:self.max_entries]
+        return {name: values[keep] for name, values in entries.items()}
+
+    def save(self) -> None:
+        """Merges the cache into the file at `path`, atomically.
+
+        Every worker process saves to the same file, so entries another worker
+        saved are kept unless this one used the same query more recently. Does
+        nothing if no rewrite was added since the last save.
+        """
+        if not self.path or not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            size = len(self._keys)
+            entries = {
+                "embeddings": self._embeddings[:size].copy(),
+                "keys": np.array(self._keys, dtype=str),
+                "values": np.array(self._values, dtype=str),
+                "last_used": self._last_used[:size].copy(),
+            }
+            self._dirty = False
+        saved = self._read()
+        if saved is not None:
+            entries = {name: np.concatenate([entries[name], saved[name]]) for name in entries}
+        entries = self._most_recent(entries)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **entries, key_version=np.array(_KEY_VERSION))
+        os.replace(tmp_path, self.path)
+        log.info(f"Saved {len(entries['keys'])} rewrite cache entries to {self.path}")
+
+    def load(self) -> None:
+        """Restores entries saved by `save`, keeping the most recently used ones."""
+        saved = self._read()
+        if saved is None:
+            return
+        saved = self._most_recent(saved)
+        size = len(saved["keys"])
+        with self._lock:
+            self._embeddings[:size] = saved["embeddings"]
+            self._last_used[:size] = saved["last_used"]
+            self._keys = [str(key) for key in saved["keys"]]
+            self._values = [str(value) for value in saved["values"]]
+            self._index = {key: slot for slot, key in enumerate(self._keys)}
+        log.info(f"Loaded {size} rewrite cache entries from {self.path}")
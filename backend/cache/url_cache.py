@@ -0,0 +1,195 @@
+"""Two-tier cache for product URLs resolved through Serper."""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from common import logger
+
+log = logger.create_logger()
+
+_DEFAULT_TTL = 24 * 60 * 60
+_DEFAULT_MAX_STALE = 7 * 24 * 60 * 60
+
+
+def normalize_product_name(name: str) -> str:
+    """Lower-cases and strips punctuation so trivially different names share a key."""
+    name = re.sub(r"[^\w\s]", " ", name.lower())
+    return " ".join(name.split())
+
+
+class ProductUrlCache:
+    """In-memory LRU in front of a SQLite table that every worker process shares.
+
+    Entries older than `ttl` are still served (stale-while-revalidate) until they
+    pass `max_stale`, and callers are expected to refresh them in the background.
+    The disk tier is trimmed to `max_disk_entries` once every `prune_every`
+    writes rather than counting rows on each insert. Lookups can block on
+    SQLite, so async callers should run them off the event loop.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl: float = _DEFAULT_TTL,
+        max_stale: float = _DEFAULT_MAX_STALE,
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 200_000,
+        prune_every: int = 500,
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._writes_since_prune = 0
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+        }
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS product_urls ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _remember(self, key: str, url: str, fetched_at: float) -> None:
+        self._memory[key] = (url, fetched_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str, now: float) -> tuple[t.Optional[str], bool]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            tier = "memory_hits"
+        else:
+            row = self._conn.execute(
+                "SELECT url, fetched_at FROM product_urls WHERE key = ?", (key,)
+            ).fetchone()
+            entry = tuple(row) if row else None
+            if entry is not None:
+                self._remember(key, *entry)
+            tier = "disk_hits"
+
+        if entry is None or now - entry[1] > self.ttl + self.max_stale:
+            self._counters["misses"] += 1
+            return None, False
+        self._counters[tier] += 1
+        fresh = now - entry[1] <= self.ttl
+        if not fresh:
+            self._counters["stale_hits"] += 1
+        return entry[0], fresh
+
+    def get(self, name: str) -> tuple[t.Optional[str], bool]:
+        """Returns `(url, is_fresh)`; the url is None on a miss or an expired entry."""
+        return self.get_many([name])[0]
+
+    def get_many(self, names: t.Sequence[str]) -> list[tuple[t.Optional[str], bool]]:
+        """`get` for each name under a single lock acquisition."""
+        now = time.time()
+        with self._lock:
+            return [self._lookup(normalize_product_name(name), now) for name in names]
+
+    def set(self, name: str, url: str) -> None:
+        """Stores a resolved url in both tiers."""
+        self.set_many([(name, url)])
+
+    def set_many(self, items: t.Sequence[tuple[str, str]]) -> None:
+        """Stores `(name, url)` pairs in both tiers in one transaction."""
+        if not items:
+            return
+        fetched_at = time.time()
+        rows = [(normalize_product_name(name), url, fetched_at) for name, url in items]
+        with self._lock:
+            for key, url, _ in rows:
+                self._remember(key, url, fetched_at)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO product_urls (key, url, fetched_at) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._writes_since_prune += len(rows)
+            if self._writes_since_prune >= self.prune_every:
+                self._prune()
+
+    def _prune(self) -> None:
+        self._writes_since_prune = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM product_urls").fetchone()
+        if count > self.max_disk_entries:
+            self._conn.execute(
+                "DELETE FROM product_urls WHERE key IN ("
+                "SELECT key FROM product_urls ORDER BY fetched_at LIMIT ?)",
+                (count - self.max_disk_entries,),
+            )
+            self._conn.commit()
+
+    def refresh_in_background(
+        self,
+        names: list[str],
+        fetch_many: t.Callable[[list[str]], t.Awaitable[list[t.Optional[str]]]],
+    ) -> None:
+        """Re-resolves stale names without making the caller wait."""
+        with self._lock:
+            pending = [
+                name for name in names
+                if normalize_product_name(name) not in self._refreshing
+            ]
+            self._refreshing.update(normalize_product_name(name) for name in pending)
+        if not pending:
+            return
+
+        async def _refresh():
+            try:
+                urls = await fetch_many(pending)
+                await asyncio.to_thread(
+                    self.set_many, [(name, url) for name, url in zip(pending, urls) if url]
+                )
+                self._counters["refreshes"] += len(pending)
+            except Exception as e:
+                log.warning(f"Background refresh of {len(pending)} product urls failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(
+                        normalize_product_name(name) for name in pending
+                    )
+
+        task = asyncio.get_running_loop().create_task(_refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> dict[str, t.Any]:
+        """Returns hit/miss counters and the overall hit ratio."""
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._conn.close()
@@ -0,0 +1,208 @@
+"""Per-stage pipeline metrics rendered in the Prometheus text exposition format."""
+
+import asyncio
+import bisect
+import contextlib
+import functools
+import threading
+import time
+import typing as t
+
+_PREFIX = "fashionfiend"
+
+# Upper bounds in seconds, from a cache hit on the fast path up to a slow LLM call.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _StageStats:
+    __slots__ = ("buckets", "count", "sum", "errors", "in_flight")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.in_flight = 0
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: t.Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: t.Any) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class PipelineMetrics:
+    """Latency histogram, call and error counts and an in-flight gauge per stage.
+
+    Recording is one lock acquisition and a bisect over the bucket bounds, a
+    couple of microseconds per call, so it stays on in production. Counts are
+    cumulative from process start, as Prometheus expects.
+    """
+
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self._stages: dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, stage: str) -> _StageStats:
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats(len(self.bounds))
+            return stats
+
+    def _start(self, stats: _StageStats) -> float:
+        with self._lock:
+            stats.in_flight += 1
+        return time.perf_counter()
+
+    def _finish(self, stats: _StageStats, start: float, failed: bool) -> None:
+        self._record(stats, time.perf_counter() - start, failed, in_flight=-1)
+
+    def _record(self, stats: _StageStats, seconds: float, failed: bool, in_flight: int = 0) -> None:
+        bucket = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            stats.in_flight += in_flight
+            stats.count += 1
+            stats.sum += seconds
+            if bucket < len(self.bounds):
+                stats.buckets[bucket] += 1
+            if failed:
+                stats.errors += 1
+
+    @contextlib.contextmanager
+    def track(self, stage: str) -> t.Iterator[None]:
+        """Times the block as one call of `stage`, counting an error if it raises."""
+        stats = self._stage(stage)
+        start = self._start(stats)
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self._finish(stats, start, failed)
+
+    def observe(self, stage: str, seconds: float, failed: bool = False) -> None:
+        """Records one call of `stage` that took `seconds`, for work timed piecemeal."""
+        self._record(self._stage(stage), seconds, failed)
+
+    def timed(self, stage: str) -> t.Callable:
+        """Decorator form of `track` for plain and async functions."""
+        stats = self._stage(stage)
+
+        def decorator(fn: t.Callable) -> t.Callable:
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    start = self._start(stats)
+                    failed = True
+                    try:
+                        result = await fn(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        self._finish(stats, start, failed)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = self._start(stats)
+                failed = True
+                try:
+                    result = fn(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self._finish(stats, start, failed)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> dict[str, dict[str, t.Any]]:
+        with self._lock:
+            return {
+                stage: {
+                    "buckets": list(stats.buckets),
+                    "count": stats.count,
+                    "sum": stats.sum,
+                    "errors": stats.errors,
+                    "in_flight": stats.in_flight,
+                }
+                for stage, stats in self._stages.items()
+            }
+
+    def render(self) -> str:
+        """Renders every stage's samples in text exposition format."""
+        snapshot = self.snapshot()
+        duration = f"{_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {duration} Latency of each recommendation pipeline stage.",
+            f"# TYPE {duration} histogram",
+        ]
+        for stage, stats in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, stats["buckets"]):
+                cumulative += count
+                lines.append(f"{duration}_bucket{_labels(stage=stage, le=_format_value(bound))} {cumulative}")
+            lines.append(f'{duration}_bucket{_labels(stage=stage, le="+Inf")} {stats["count"]}')
+            lines.append(f"{duration}_sum{_labels(stage=stage)} {stats['sum']!r}")
+            lines.append(f"{duration}_count{_labels(stage=stage)} {stats['count']}")
+        for name, kind, key, help_text in (
+            ("stage_errors_total", "counter", "errors", "Stage calls that raised."),
+            ("stage_in_flight", "gauge", "in_flight", "Stage calls currently running."),
+        ):
+            lines.append(f"# HELP {_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {_PREFIX}_{name} {kind}")
+            lines.extend(
+                f"{_PREFIX}_{name}{_labels(stage=stage)} {stats[key]}"
+                for stage, stats in sorted(snapshot.items())
+            )
+        return "\n".join(lines) + "\n"
+
+
+def render_cache_metrics(caches: dict[str, tuple[int, int]]) -> str:
+    """Hit and lookup counters plus the hit ratio for each `{cache: (hits, lookups)}`."""
+    lines = []
+    for name, kind, help_text in (
+        ("cache_hits_total", "counter", "Cache lookups that were served from the cache."),
+        ("cache_lookups_total", "counter", "Cache lookups."),
+        ("cache_hit_ratio", "gauge", "Hits over lookups since process start."),
+    ):
+        lines.append(f"# HELP {_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {_PREFIX}_{name} {kind}")
+        for cache, (hits, lookups) in sorted(caches.items()):
+            value = {
+                "cache_hits_total": hits,
+                "cache_lookups_total": lookups,
+                "cache_hit_ratio": hits / lookups if lookups else 0.0,
+            }[name]
+            lines.append(f"{_PREFIX}_{name}{_labels(cache=cache)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def render_similarity_histogram(stats: dict[str, t.Any]) -> str:
+    """The rewrite cache's best-match similarities, from `SemanticQueryCache.stats()`."""
+    name = f"{_PREFIX}_rewrite_cache_similarity"
+    lines = [
+        f"# HELP {name} Cosine similarity of the nearest cached query on each semantic lookup.",
+        f"# TYPE {name} histogram",
+    ]
+    cumulative = 0
+    for bound, count in stats["similarity_buckets"].items():
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(le=_format_value(bound))} {cumulative}")
+    lines.append(f'{name}_bucket{_labels(le="+Inf")} {stats["similarity_count"]}')
+    lines.append(f"{name}_sum {stats['similarity_sum']!r}")
+    lines.append(f"{name}_count {stats['similarity_count']}")
+    return "\n".join(lines) + "\n"
+
+
+pipeline_metrics = PipelineMetrics()
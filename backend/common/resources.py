@@ -0,0 +1,465 @@
+"""Process-lifetime resources shared by the recommendation pipeline."""
+
+import os
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.context_builder import ContextBuilder
+from agents.query_rewriter import (
+    LexicalQueryRewriter,
+    article_hierarchy_from_collection,
+    article_hierarchy_from_metadata,
+)
+from agents.serper import AsyncSerperClient
+from cache.embedding_cache import EmbeddingCache
+from cache.llm_cache import LLMResponseCache
+from cache.semantic_cache import SemanticQueryCache
+from cache.url_cache import ProductUrlCache
+from common import logger
+from common.constants import (
+    _EMBEDDING_MODEL_NAME,
+    _MONGODB_COLLECTION_NAME,
+    _MONGODB_CONN_STRING,
+    _MONGODB_DB_NAME,
+)
+from data.filters import default_matcher
+from data.vocabulary import apply_vocabulary, article_hierarchy_from_vocabulary, load_vocabulary
+from embedding.encoders import load_encoder
+from embedding.scheduler import EmbeddingScheduler
+from vector_store.base import VectorStore
+from vector_store.ivf_store import IVFVectorStore
+from vector_store.local_store import LocalVectorStore
+from vector_store.mongo_store import MongoVectorStore
+from vector_store.quantized_store import QUANTIZATION_MODES, QuantizedVectorStore
+
+if t.TYPE_CHECKING:
+    from pymongo import MongoClient
+    from sentence_transformers import SentenceTransformer
+
+log = logger.create_logger()
+
+_WARMUP_TEXT = "Looking for a Tshirts in the Apparel - Topwear category."
+
+
+def init_mongodb(conn_string: str, db_name: str, collection_name: str):
+    """Initialize MongoDB connection."""
+    from pymongo import MongoClient
+
+    client = MongoClient(conn_string)
+    return client[db_name][collection_name]
+
+
+def init_async_mongodb(conn_string: str, db_name: str, collection_name: str):
+    """Initialize an asyncio MongoDB connection for request-path queries."""
+    from pymongo import AsyncMongoClient
+
+    client = AsyncMongoClient(conn_string)
+    return client[db_name][collection_name]
+
+
+def init_bedrock_client(profile_name: t.Optional[str] = None, region: str = "us-east-1"):
+    """Initialize Bedrock client."""
+    import boto3
+
+    session = boto3.Session(profile_name=profile_name)
+    return session.client(
+        service_name='bedrock-runtime',
+        region_name=region
+    )
+
+
+def init_embedding_model(
+    model_name: str = _EMBEDDING_MODEL_NAME,
+    backend: str = "torch",
+    onnx_model_dir: t.Optional[str] = None,
+) -> "SentenceTransformer":
+    """Initialize the sentence encoder on the selected backend (see `EMBEDDING_BACKENDS`)."""
+    return load_encoder(model_name, backend=backend, onnx_model_dir=onnx_model_dir)
+
+
+def init_vector_store(
+    backend: str,
+    collection=None,
+    local_store_path: t.Optional[str] = None,
+    pinecone_index_name: t.Optional[str] = None,
+    async_collection=None,
+    mongo_filter_pushdown: bool = False,
+) -> VectorStore:
+    """Builds the vector store for `backend`: "mongo", "local", "ivf", "int8", "binary" or "pinecone"."""
+    if backend == "mongo":
+        return MongoVectorStore(
+            collection, async_collection=async_collection, filter_pushdown=mongo_filter_pushdown
+        )
+    if backend == "local":
+        if local_store_path:
+            return LocalVectorStore.load(local_store_path)
+        return LocalVectorStore.from_collection(collection)
+    if backend == "ivf":
+        if local_store_path:
+            return IVFVectorStore.load(local_store_path)
+        return IVFVectorStore.from_collection(collection)
+    if backend in QUANTIZATION_MODES:
+        if local_store_path:
+            return QuantizedVectorStore.load(local_store_path)
+        return QuantizedVectorStore.from_collection(collection, mode=backend)
+    if backend == "pinecone":
+        from utils.pinecone_utils import initialize_index
+        from vector_store.pinecone_store import PineconeVectorStore
+
+        return PineconeVectorStore(initialize_index(pinecone_index_name))
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+class ResourceRegistry:
+    """Builds the pipeline's clients once and hands the same instances to every request."""
+
+    def __init__(
+        self,
+        mongodb_conn_string: str = _MONGODB_CONN_STRING,
+        db_name: str = _MONGODB_DB_NAME,
+        collection_name: str = _MONGODB_COLLECTION_NAME,
+        embedding_model_name: str = _EMBEDDING_MODEL_NAME,
+        embedding_backend: str = "torch",
+        onnx_model_dir: t.Optional[str] = None,
+        bedrock_profile: t.Optional[str] = None,
+        bedrock_region: str = "us-east-1",
+        serper_max_concurrency: int = 8,
+        serper_timeout: float = 5.0,
+        url_cache_path: str = ".cache/product_urls.sqlite3",
+        url_cache_ttl: float = 24 * 60 * 60,
+        rewrite_cache_path: str = ".cache/rewrite_cache.npz",
+        rewrite_cache_threshold: float = 0.92,
+        rewrite_cache_max_entries: int = 5000,
+        rewrite_cache_save_interval: float = 5 * 60,
+        llm_cache_max_entries: int = 2048,
+        llm_cache_ttl: float = 6 * 60 * 60,
+        embedding_cache_max_bytes: int = 64 * 1024 * 1024,
+        vector_backend: str = "mongo",
+        mongo_filter_pushdown: bool = False,
+        local_store_path: t.Optional[str] = None,
+        pinecone_index_name: t.Optional[str] = None,
+        lexical_min_coverage: float = 0.6,
+        vocabulary_path: t.Optional[str] = "data/vocabulary.json",
+        vocabulary_check_interval: float = 30.0,
+        context_token_budget: t.Optional[int] = 200,
+        context_candidates: int = 20,
+        cpu_workers: t.Optional[int] = None,
+        embedding_batch_size: t.Optional[int] = 32,
+        embedding_max_wait: float = 0.002,
+    ):
+        self.mongodb_conn_string = mongodb_conn_string
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.embedding_model_name = embedding_model_name
+        self.embedding_backend = embedding_backend
+        self.onnx_model_dir = onnx_model_dir
+        self.bedrock_profile = bedrock_profile
+        self.bedrock_region = bedrock_region
+        self.serper_max_concurrency = serper_max_concurrency
+        self.serper_timeout = serper_timeout
+        self.url_cache_path = url_cache_path
+        self.url_cache_ttl = url_cache_ttl
+        self.rewrite_cache_path = rewrite_cache_path
+        self.rewrite_cache_threshold = rewrite_cache_threshold
+        self.rewrite_cache_max_entries = rewrite_cache_max_entries
+        self.rewrite_cache_save_interval = rewrite_cache_save_interval
+        self.llm_cache_max_entries = llm_cache_max_entries
+        self.llm_cache_ttl = llm_cache_ttl
+        self.embedding_cache_max_bytes = embedding_cache_max_bytes
+        self.vector_backend = vector_backend
+        self.mongo_filter_pushdown = mongo_filter_pushdown
+        self.local_store_path = local_store_path
+        self.pinecone_index_name = pinecone_index_name
+        self.lexical_min_coverage = lexical_min_coverage
+        self.vocabulary_path = vocabulary_path
+        self.vocabulary_check_interval = vocabulary_check_interval
+        self.context_token_budget = context_token_budget
+        self.context_candidates = context_candidates
+        # Bounds concurrent encodes and searches; more threads than cores only adds contention.
+        self.cpu_workers = cpu_workers or min(4, os.cpu_count() or 1)
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_max_wait = embedding_max_wait
+
+        self.collection = None
+        self.async_collection = None
+        self.cpu_executor: t.Optional[ThreadPoolExecutor] = None
+        self.bedrock_client = None
+        self.embedding_model: t.Optional["SentenceTransformer"] = None
+        self.vector_store: t.Optional[VectorStore] = None
+        self.lexical_rewriter: t.Optional[LexicalQueryRewriter] = None
+        self.url_cache: t.Optional[ProductUrlCache] = None
+        self.embedding_cache: t.Optional[EmbeddingCache] = None
+        self.embedding_scheduler: t.Optional[EmbeddingScheduler] = None
+        self.rewrite_cache: t.Optional[SemanticQueryCache] = None
+        self.llm_cache: t.Optional[LLMResponseCache] = None
+        self.context_builder: t.Optional[ContextBuilder] = None
+        self.serper_client: t.Optional[AsyncSerperClient] = None
+        self.vocabulary: t.Optional[dict[str, t.Any]] = None
+        self._vocabulary_mtime: t.Optional[int] = None
+        self._vocabulary_checked_at = 0.0
+        self._vocabulary_lock = threading.Lock()
+        self.ready = False
+        self.mock = False
+        self.startup_seconds: t.Optional[float] = None
+        self.startup_error: t.Optional[str] = None
+
+    @property
+    def mongo_client(self) -> t.Optional["MongoClient"]:
+        """Returns the client that owns the shared collection."""
+        if self.collection is None:
+            return None
+        return self.collection.database.client
+
+    def startup(self) -> None:
+        """Builds every resource and warms the embedding model."""
+        start = time.perf_counter()
+        self.load_vocabulary()
+        self.collection = init_mongodb(
+            conn_string=self.mongodb_conn_string,
+            db_name=self.db_name,
+            collection_name=self.collection_name,
+        )
+        if self.vector_backend == "mongo":
+            self.async_collection = init_async_mongodb(
+                conn_string=self.mongodb_conn_string,
+                db_name=self.db_name,
+                collection_name=self.collection_name,
+            )
+        self.cpu_executor = ThreadPoolExecutor(
+            max_workers=self.cpu_workers, thread_name_prefix="cpu"
+        )
+        self.bedrock_client = init_bedrock_client(
+            profile_name=self.bedrock_profile, region=self.bedrock_region
+        )
+        self.embedding_model = init_embedding_model(
+            self.embedding_model_name,
+            backend=self.embedding_backend,
+            onnx_model_dir=self.onnx_model_dir,
+        )
+        self.vector_store = init_vector_store(
+            self.vector_backend,
+            collection=self.collection,
+            local_store_path=self.local_store_path,
+            pinecone_index_name=self.pinecone_index_name,
+            async_collection=self.async_collection,
+            mongo_filter_pushdown=self.mongo_filter_pushdown,
+        )
+        self.lexical_rewriter = LexicalQueryRewriter(
+            default_matcher(),
+            hierarchy=self._article_hierarchy(),
+            min_coverage=self.lexical_min_coverage,
+        )
+        self.embedding_cache = EmbeddingCache(
+            self.embedding_model_name, max_bytes=self.embedding_cache_max_bytes
+        )
+        if self.embedding_batch_size:
+            self.embedding_scheduler = EmbeddingScheduler(
+                lambda texts: self.embedding_cache.encode(self.embedding_model, texts),
+                max_batch_size=self.embedding_batch_size,
+                max_wait=self.embedding_max_wait,
+                executor=self.cpu_executor,
+            )
+        if self.context_token_budget:
+            self.context_builder = ContextBuilder(
+                lambda texts: self.embedding_cache.encode(self.embedding_model, texts),
+                token_budget=self.context_token_budget,
+            )
+        self.rewrite_cache = SemanticQueryCache(
+            self.rewrite_cache_path,
+            threshold=self.rewrite_cache_threshold,
+            max_entries=self.rewrite_cache_max_entries,
+            dimension=self.embedding_model.get_sentence_embedding_dimension(),
+        )
+        self.llm_cache = LLMResponseCache(
+            max_entries=self.llm_cache_max_entries,
+            ttl=self.llm_cache_ttl,
+            catalog_version=self.catalog_version,
+        )
+        self.url_cache = ProductUrlCache(self.url_cache_path, ttl=self.url_cache_ttl)
+        self.serper_client = AsyncSerperClient(
+            max_concurrency=self.serper_max_concurrency,
+            timeout=self.serper_timeout,
+            cache=self.url_cache,
+        )
+        self.warm_up()
+        self.startup_seconds = time.perf_counter() - start
+        self.ready = True
+        log.info(f"Resources ready in {self.startup_seconds:.2f}s")
+
+    def start_mock(self) -> None:
+        """Marks the registry ready without building anything; mock responses need no resources."""
+        self.mock = True
+        self.startup_seconds = 0.0
+        self.ready = True
+        log.info("Mock responses enabled, skipping resource startup")
+
+    def load_vocabulary(self) -> None:
+        """Replaces the built-in filter lists with the generated vocabulary, if one exists."""
+        if not self.vocabulary_path or not os.path.exists(self.vocabulary_path):
+            log.info("No vocabulary artifact found, using the built-in filter lists")
+            return
+        self._vocabulary_mtime = os.stat(self.vocabulary_path).st_mtime_ns
+        self.vocabulary = load_vocabulary(self.vocabulary_path)
+        apply_vocabulary(self.vocabulary)
+        if self.lexical_rewriter is not None:
+            # Swapped in place so the fast-path counters carry over.
+            self.lexical_rewriter.matcher = default_matcher()
+            self.lexical_rewriter.hierarchy = self._article_hierarchy()
+        if self.llm_cache is not None:
+            self.llm_cache.set_catalog_version(self.catalog_version)
+        log.info(
+            f"Loaded vocabulary {self.vocabulary['catalog_version']} "
+            f"({self.vocabulary['rows']} catalog rows)"
+        )
+
+    def reload_vocabulary_if_changed(self) -> bool:
+        """Re-reads the vocabulary once its file changes, at most every `vocabulary_check_interval` seconds.
+
+        A new catalog version rebuilds the lexical rewriter's vocabulary and clears
+        the LLM response cache, so a re-ingest is picked up without a restart. Returns whether a reload happened.
+        """
+        now = time.monotonic()
+        if not self.vocabulary_path or now - self._vocabulary_checked_at < self.vocabulary_check_interval:
+            return False
+        with self._vocabulary_lock:
+            if now - self._vocabulary_checked_at < self.vocabulary_check_interval:
+                return False
+            self._vocabulary_checked_at = now
+            try:
+                mtime = os.stat(self.vocabulary_path).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._vocabulary_mtime:
+                return False
+            try:
+                self.load_vocabulary()
+            except Exception as e:
+                log.warning(f"Could not reload vocabulary from {self.vocabulary_path}: {e}")
+                self._vocabulary_mtime = mtime
+                return False
+            return True
+
+    @property
+    def search_limit(self) -> int:
+        """Hits to retrieve per query; the context builder needs a wider pool to choose from."""
+        return self.context_candidates if self.context_builder is not None else 5
+
+    @property
+    def catalog_version(self) -> t.Optional[str]:
+        """Version of the loaded vocabulary, which changes whenever the catalog does."""
+        return self.vocabulary["catalog_version"] if self.vocabulary else None
+
+    def _article_hierarchy(self) -> dict:
+        """Article type -> (master, sub) category, from the vocabulary, the loaded store or Mongo."""
+        if self.vocabulary is not None:
+            return article_hierarchy_from_vocabulary(self.vocabulary)
+        if isinstance(self.vector_store, LocalVectorStore):
+            return article_hierarchy_from_metadata(self.vector_store.metadata)
+        try:
+            return article_hierarchy_from_collection(self.collection)
+        except Exception as e:
+            log.warning(f"Could not load article hierarchy, lexical rewrites disabled: {e}")
+            return {}
+
+    def warm_up(self) -> None:
+        """Runs a dummy encode so the first real request does not pay for lazy init."""
+        self.embedding_model.encode([_WARMUP_TEXT], normalize_embeddings=True)
+
+    def health(self) -> dict[str, t.Any]:
+        """Checks each resource and reports its status."""
+        checks = {
+            "embedding_model": self.embedding_model is not None,
+            "vector_store": self.vector_store is not None,
+            "bedrock_client": self.bedrock_client is not None,
+            "serper_client": self.serper_client is not None,
+            "mongodb": False,
+        }
+        if self.mongo_client is not None:
+            try:
+                self.mongo_client.admin.command("ping")
+                checks["mongodb"] = True
+            except Exception as e:
+                log.warning(f"MongoDB health check failed: {e}")
+        return {
+            "ready": self.ready,
+            "mock": self.mock,
+            "healthy": self.ready and (self.mock or all(checks.values())),
+            "checks": checks,
+            "catalog_version": self.catalog_version,
+            "embedding_scheduler": (
+                self.embedding_scheduler.stats() if self.embedding_scheduler is not None else None
+            ),
+        }
+
+    def cache_stats(self) -> dict[str, tuple[int, int]]:
+        """`{cache: (hits, lookups)}` for every cache that has been built."""
+        caches = {}
+        if self.embedding_cache is not None:
+            stats = self.embedding_cache.stats()
+            caches["embedding"] = (stats["hits"], stats["hits"] + stats["misses"])
+        if self.llm_cache is not None:
+            stats = self.llm_cache.stats()
+            caches["llm_response"] = (stats["hits"], stats["hits"] + stats["misses"])
+        if self.rewrite_cache is not None:
+            stats = self.rewrite_cache.stats()
+            hits = stats["exact_hits"] + stats["semantic_hits"]
+            caches["query_rewrite"] = (hits, hits + stats["misses"])
+        if self.url_cache is not None:
+            stats = self.url_cache.stats()
+            hits = stats["memory_hits"] + stats["disk_hits"]
+            caches["product_url"] = (hits, hits + stats["misses"])
+        if self.lexical_rewriter is not None:
+            stats = self.lexical_rewriter.stats()
+            caches["lexical_rewrite"] = (
+                stats["fast_path_hits"], stats["fast_path_hits"] + stats["fallbacks"]
+            )
+        return caches
+
+    def readiness(self) -> dict[str, t.Any]:
+        """Cheap enough for a load balancer to poll: no round trips, unlike `health`."""
+        return {
+            "ready": self.ready,
+            "mock": self.mock,
+            "startup_seconds": self.startup_seconds,
+            "error": self.startup_error,
+        }
+
+    def shutdown(self) -> None:
+        """Closes every resource that holds a connection."""
+        self.ready = False
+        if self.mongo_client is not None:
+            self.mongo_client.close()
+        if self.bedrock_client is not None and hasattr(self.bedrock_client, "close"):
+            self.bedrock_client.close()
+        if self.rewrite_cache is not None:
+            self.rewrite_cache.save()
+            self.rewrite_cache = None
+        if self.url_cache is not None:
+            self.url_cache.close()
+            self.url_cache = None
+        if self.cpu_executor is not None:
+            self.cpu_executor.shutdown(wait=True, cancel_futures=True)
+            self.cpu_executor = None
+        self.collection = None
+        self.async_collection = None
+        self.vector_store = None
+        self.lexical_rewriter = None
+        self.bedrock_client = None
+        self.embedding_model = None
+        self.embedding_cache = None
+        log.info("Resources closed")
+
+    async def aclose(self) -> None:
+        """Closes the async clients, then everything else."""
+        if self.serper_client is not None:
+            await self.serper_client.aclose()
+            self.serper_client = None
+        if self.embedding_scheduler is not None:
+            await self.embedding_scheduler.aclose()
+            self.embedding_scheduler = None
+        if self.async_collection is not None:
+            await self.async_collection.database.client.close()
+            self.async_collection = None
+        self.shutdown()
@@ -1,3 +1,9 @@
+import functools
+import re
+import typing as t
+
+from data.term_matcher import SYNONYMS, TermMatcher
+
 VALID_FILTERS = {
     "masterCategory": [
         "Apparel",
@@ -270,3 +276,76 @@ VALID_FILTERS = {
         "Unisex"
     ]
 }
+
+
+# Fields pushed down into vector search; the rest only shape the rewrite prompt.
+PUSHDOWN_FIELDS = ("gender", "masterCategory")
+
+# Unisex items are valid answers for any gendered query.
+_GENDER_EXPANSIONS = {
+    "Men": ["Men", "Unisex"],
+    "Women": ["Women", "Unisex"],
+    "Boys": ["Boys", "Unisex"],
+    "Girls": ["Girls", "Unisex"],
+}
+
+
+# The rewrite prompt's "in the [Master Category] - [Sub Category] category" clause.
+_CATEGORY_CLAUSE = re.compile(r"\bin the ([A-Za-z][A-Za-z ]*?) - [^.]*?category\b")
+
+
+@functools.lru_cache(maxsize=1)
+def default_matcher() -> TermMatcher:
+    """Matcher over VALID_FILTERS plus synonyms, built once."""
+    return TermMatcher(VALID_FILTERS)
+
+
+@functools.lru_cache(maxsize=1)
+def pushdown_matcher() -> TermMatcher:
+    """Gender terms and their listed synonyms only, without guessed plurals.
+
+    Pushed-down filters drop results outright, so a loose match costs recall
+    rather than just ranking.
+    """
+    synonyms = {key: forms for key, forms in SYNONYMS.items() if key[0] == "gender"}
+    return TermMatcher({"gender": VALID_FILTERS["gender"]}, synonyms=synonyms, inflect=False)
+
+
+def _master_category(rewritten: str) -> t.Optional[str]:
+    match = _CATEGORY_CLAUSE.search(rewritten)
+    if match is None:
+        return None
+    named = match.group(1).strip().lower()
+    for value in VALID_FILTERS["masterCategory"]:
+        if value.lower() == named:
+            return value
+    return None
+
+
+def extract_filters(
+    query: str, rewritten: t.Optional[str] = None, fields: tuple = PUSHDOWN_FIELDS
+) -> dict:
+    """Pulls the pushdown filters out of a query as `{field: [values]}`.
+
+    Gender comes from the user's words first and the rewrite second.
+    masterCategory is only taken from the category clause of the rewrite
+    template, since bare words like "home" or "free" name categories the user
+    rarely means.
+    """
+    filters = {}
+    if "gender" in fields:
+        for text in (query, rewritten):
+            found = []
+            for _, _, _, value in pushdown_matcher().match(text or ""):
+                if value not in found:
+                    found.append(value)
+            if found:
+                filters["gender"] = found
+                break
+    if "masterCategory" in fields and rewritten:
+        category = _master_category(rewritten)
+        if category is not None:
+            filters["masterCategory"] = [category]
+    if len(filters.get("gender", [])) == 1:
+        filters["gender"] = _GENDER_EXPANSIONS.get(filters["gender"][0], filters["gender"])
+    return filters
@@ -0,0 +1,43 @@
+"""Canned response served while the live pipeline is disabled."""
+
+MOCK_RECOMMENDATION_RESPONSE = {
+    "recommendation_text": "Hi there! I understand you're looking for a great outfit for the upcoming Diwali festivities. I've got the perfect recommendation for you!\n\nFor your main piece, I suggest the [Global Desi Women Multi Coloured Kurta]. This vibrant, multi-colored kurta is perfect for a Diwali celebration, with its ethnic print and festive vibe. To pair with it, I recommend the [Global Desi Women Solid Red Palazzo Pants]. The solid red color will complement the kurta beautifully and create a cohesive, traditional look.\n\nFor footwear, I think the [Ethnic Wear Embroidered Mojari Flats in Gold] would be a lovely choice. The intricate embroidery and gold tone will add a touch of elegance to your outfit.\n\nTo accessorize, I recommend adding an [Embellished Dupatta in Red and Gold]. The rich colors and embellishments will tie the entire ensemble together and elevate your Diwali look.\n\nI hope this helps you create the perfect outfit for the Diwali festivities! Let me know if you'd like any other recommendations.",
+    "products": [
+        {
+            "name": "Global Desi Women Multi Coloured Kurta",
+            "url": "http://www.myntra.com/Kurta-Sets/Global+Desi/Global-Desi-Geometri-Printed-Pure-Cotton-Kurta-with-Palazzos/27615912/buy",
+            "category": "Apparel - Topwear",
+            "metadata": {
+                "image_id": 59062,
+                "text": "\n        Product: Global Desi Women Multi Coloured Kurta\n        Category: Apparel - Topwear - Kurtas\n        Style: Women Ethnic wear in Multi for Summer\n        Year: 2012.0\n        ",
+                "gender": "Women",
+                "masterCategory": "Apparel",
+                "subCategory": "Topwear",
+                "articleType": "Kurtas",
+                "baseColour": "Multi",
+                "season": "Summer",
+                "year": "2012.0",
+                "usage": "Ethnic",
+                "productDisplayName": "Global Desi Women Multi Coloured Kurta"
+            }
+        },
+        {
+            "name": "Global Desi Women Solid Red Palazzo Pants",
+            "url": "http://www.myntra.com/Trousers/Global+Desi/Global-Desi-Women-Navy-Blue-Solid-Mid-Rise-Parallel-Trousers/12550288/buy",
+            "category": " - ",
+            "metadata": {}
+        },
+        {
+            "name": "Ethnic Wear Embroidered Mojari Flats in Gold",
+            "url": "https://www.nrbynidhirathi.in/products/nr-by-nidhi-rathi-women-gold-toned-embellished-leather-ethnic-mojaris-flats-nrhw057an?variant=49583324725541&country=IN&currency=INR&utm_medium=product_sync&utm_source=google&utm_content=sag_organic&utm_campaign=sag_organic&srsltid=AfmBOoqRBfQK3ZOnZAWx_fsvWMeOnqtbayBPRatleWRIDlDWyMirdIQHqW8",
+            "category": " - ",
+            "metadata": {}
+        },
+        {
+            "name": "Embellished Dupatta in Red and Gold",
+            "url": "http://www.myntra.com/Dupatta/Dupatta+Bazaar/Dupatta-Bazaar-Red--Gold-Embroidered-Organza-Dupatta-with-Beads-and-Stones-Details/15043244/buy",
+            "category": " - ",
+            "metadata": {}
+        }
+    ]
+}
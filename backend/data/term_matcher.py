@@ -0,0 +1,117 @@
+"""Token-trie matcher over the catalog filter vocabulary."""
+
+import re
+import typing as t
+
+# Extra surface forms for catalog terms, keyed by (field, canonical value).
+SYNONYMS = {
+    ("gender", "Men"): ["man", "mens", "male", "gents", "gentlemen", "boyfriend", "husband"],
+    ("gender", "Women"): ["woman", "womens", "female", "ladies", "lady", "girlfriend", "wife"],
+    ("gender", "Boys"): ["boy", "son"],
+    ("gender", "Girls"): ["girl", "daughter"],
+    ("articleType", "Tshirts"): ["t shirt", "t shirts", "tee", "tees", "tshirt"],
+    ("articleType", "Dresses"): ["dress", "frock", "gown"],
+    ("articleType", "Kurtas"): ["kurta"],
+    ("articleType", "Jeans"): ["denim", "denims"],
+    ("articleType", "Sports Shoes"): ["sneaker", "sneakers", "running shoes", "trainers"],
+    ("articleType", "Casual Shoes"): ["loafers"],
+    ("articleType", "Trousers"): ["pants", "chinos", "slacks"],
+    ("articleType", "Watches"): ["watch", "wristwatch"],
+    ("articleType", "Handbags"): ["purse", "handbag"],
+    ("articleType", "Sunglasses"): ["shades"],
+    ("usage", "Ethnic"): ["traditional", "festive", "festival", "diwali", "wedding", "eid"],
+    ("usage", "Formal"): ["office", "work", "business", "interview"],
+    ("usage", "Sports"): ["gym", "workout", "running", "training", "sporty"],
+    ("usage", "Party"): ["partywear", "club", "night out"],
+    ("usage", "Casual"): ["everyday", "daily", "weekend"],
+    ("season", "Winter"): ["cold", "snow", "wintery"],
+    ("season", "Summer"): ["hot", "beach", "sunny"],
+    ("season", "Fall"): ["autumn"],
+    ("baseColour", "Grey"): ["gray"],
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+Match = tuple[int, int, str, str]  # (start token, end token, field, value)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cases and splits on anything that is not a letter or digit."""
+    return _TOKEN_PATTERN.findall(text.lower().replace("'s", ""))
+
+
+def _surface_forms(term: str) -> set[str]:
+    """The term plus the singular or plural of its last word, by the regular English rules."""
+    base = " ".join(tokenize(term))
+    forms = {base}
+    if base.endswith("ies"):
+        forms.add(base[:-3] + "y")
+    elif base.endswith(("sses", "xes", "zes", "ches", "shes")):
+        forms.add(base[:-2])
+    elif base.endswith("s") and not base.endswith("ss"):
+        forms.add(base[:-1])
+    elif base.endswith(("s", "x", "z", "ch", "sh")):
+        forms.add(base + "es")
+    elif base.endswith("y") and base[-2:-1] not in ("a", "e", "i", "o", "u", ""):
+        forms.add(base[:-1] + "ies")
+    elif base:
+        forms.add(base + "s")
+    return {form for form in forms if form}
+
+
+class TermMatcher:
+    """Matches vocabulary terms in a token stream, preferring the longest match.
+
+    Patterns live in a token trie, so matching is linear in the query length
+    times the longest pattern (a handful of tokens).
+    """
+
+    _END = "\0"
+
+    def __init__(
+        self,
+        vocabulary: dict[str, list[str]],
+        synonyms: t.Optional[dict[tuple[str, str], list[str]]] = None,
+        inflect: bool = True,
+    ):
+        """With `inflect=False` only the terms themselves and their listed synonyms match."""
+        self._root: dict = {}
+        for field, values in vocabulary.items():
+            for value in values:
+                forms = _surface_forms(value) if inflect else {" ".join(tokenize(value))}
+                for form in forms:
+                    self._add(form, field, value)
+        for (field, value), forms in (SYNONYMS if synonyms is None else synonyms).items():
+            if value not in vocabulary.get(field, []):
+                continue
+            for form in forms:
+                self._add(" ".join(tokenize(form)), field, value)
+
+    def _add(self, form: str, field: str, value: str) -> None:
+        node = self._root
+        for token in form.split():
+            node = node.setdefault(token, {})
+        node.setdefault(self._END, []).append((field, value))
+
+    def match_tokens(self, tokens: list[str]) -> list[Match]:
+        """Leftmost-longest, non-overlapping matches over `tokens`."""
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node, longest = self._root, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if self._END in node:
+                    longest = (j + 1, node[self._END])
+            if longest is None:
+                i += 1
+                continue
+            end, targets = longest
+            matches.extend((i, end, field, value) for field, value in targets)
+            i = end
+        return matches
+
+    def match(self, text: str) -> list[Match]:
+        return self.match_tokens(tokenize(text))
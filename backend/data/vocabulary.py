@@ -0,0 +1,101 @@
+"""Filter vocabulary generated from the catalog, replacing the hand-kept lists."""
+
+import hashlib
+import json
+import os
+import time
+import typing as t
+
+from data.filters import VALID_FILTERS, default_matcher, pushdown_matcher
+
+if t.TYPE_CHECKING:
+    import pandas as pd
+
+SCHEMA_VERSION = 1
+
+FILTER_FIELDS = tuple(VALID_FILTERS)
+_HIERARCHY_COLUMNS = ["articleType", "masterCategory", "subCategory"]
+_TREE_COLUMNS = ["gender", "masterCategory", "subCategory"]
+
+
+def value_frequencies(df: "pd.DataFrame", fields: t.Iterable[str] = FILTER_FIELDS) -> dict[str, dict[str, int]]:
+    """`{field: {value: count}}`, most frequent first, skipping missing values."""
+    return {
+        field: {str(value): int(count) for value, count in df[field].value_counts().items()}
+        for field in fields
+        if field in df
+    }
+
+
+def article_hierarchy(df: "pd.DataFrame") -> dict[str, list[str]]:
+    """Most common [masterCategory, subCategory] for each articleType."""
+    counts = df.groupby(_HIERARCHY_COLUMNS, observed=True).size().sort_values(ascending=False, kind="stable")
+    top = counts.reset_index().drop_duplicates("articleType")
+    return {
+        article: [master, sub]
+        for article, master, sub in top[_HIERARCHY_COLUMNS].itertuples(index=False)
+    }
+
+
+def category_tree(df: "pd.DataFrame") -> dict[str, dict[str, dict[str, list[str]]]]:
+    """gender -> masterCategory -> subCategory -> sorted article types."""
+    tree: dict = {}
+    grouped = df.groupby(_TREE_COLUMNS, observed=True)["articleType"].unique()
+    for (gender, master, sub), articles in grouped.items():
+        tree.setdefault(gender, {}).setdefault(master, {})[sub] = sorted(articles)
+    return tree
+
+
+def build_vocabulary(df: "pd.DataFrame", fields: t.Iterable[str] = FILTER_FIELDS) -> dict[str, t.Any]:
+    """Builds the versioned vocabulary artifact from a cleaned catalog frame."""
+    vocabulary = {
+        "fields": value_frequencies(df, fields),
+        "hierarchy": article_hierarchy(df),
+        "tree": category_tree(df),
+    }
+    digest = hashlib.blake2b(
+        json.dumps(vocabulary, sort_keys=True).encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "catalog_version": digest,
+        "generated_at": int(time.time()),
+        "rows": len(df),
+        **vocabulary,
+    }
+
+
+def save_vocabulary(vocabulary: dict[str, t.Any], path: str) -> None:
+    """Writes the artifact as compact JSON, atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(vocabulary, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_vocabulary(path: str) -> dict[str, t.Any]:
+    with open(path, encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    if vocabulary.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(
+            f"Vocabulary {path} has schema version {vocabulary.get('schema_version')}, "
+            f"expected {SCHEMA_VERSION}"
+        )
+    return vocabulary
+
+
+def apply_vocabulary(vocabulary: dict[str, t.Any]) -> None:
+    """Swaps the generated value lists into VALID_FILTERS.
+
+    The dict is updated in place because modules hold references to it, and the
+    cached matchers are rebuilt so query parsing sees the new terms.
+    """
+    for field, frequencies in vocabulary["fields"].items():
+        if field in VALID_FILTERS and frequencies:
+            VALID_FILTERS[field] = list(frequencies)
+    default_matcher.cache_clear()
+    pushdown_matcher.cache_clear()
+
+
+def article_hierarchy_from_vocabulary(vocabulary: dict[str, t.Any]) -> dict[str, tuple[str, str]]:
+    return {article: tuple(pair) for article, pair in vocabulary["hierarchy"].items()}
@@ -0,0 +1,41 @@
+"""Selectable sentence encoder backends behind the `SentenceTransformer.encode` interface."""
+
+import typing as t
+
+from common import logger
+from common.constants import _EMBEDDING_MODEL_NAME
+
+log = logger.create_logger()
+
+# torch: sentence-transformers on PyTorch; onnx / onnx-int8: the exported graph
+# (fp32 or dynamically quantized weights) on ONNX Runtime.
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def default_onnx_dir(model_name: str = _EMBEDDING_MODEL_NAME) -> str:
+    return f".cache/onnx/{model_name}"
+
+
+def load_encoder(
+    model_name: str = _EMBEDDING_MODEL_NAME,
+    backend: str = "torch",
+    onnx_model_dir: t.Optional[str] = None,
+):
+    """Loads `model_name` on `backend`; ONNX backends read a prior export from `onnx_model_dir`."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+
+    from embedding.onnx_encoder import OnnxSentenceEncoder
+
+    model_dir = onnx_model_dir or default_onnx_dir(model_name)
+    encoder = OnnxSentenceEncoder(model_dir, quantized=backend == "onnx-int8")
+    if encoder.config["model_name"] != model_name:
+        raise ValueError(
+            f"ONNX export in {model_dir} is of {encoder.config['model_name']}, not {model_name}"
+        )
+    log.info(f"Loaded {model_name} on {backend} from {model_dir}")
+    return encoder
@@ -0,0 +1,234 @@
+"""ONNX Runtime encoder for sentence-transformers models, optionally int8-quantized.
+
+The transformer is exported once with torch; serving then needs only
+onnxruntime and tokenizers. Pooling and normalization follow the exported
+model's sentence-transformers modules, so outputs match `SentenceTransformer.encode`.
+
+Run from the backend directory:
+    python -m embedding.onnx_encoder --output .cache/onnx/all-MiniLM-L6-v2
+"""
+
+import argparse
+import json
+import os
+import time
+import typing as t
+
+import numpy as np
+
+from common import logger
+from common.constants import _EMBEDDING_MODEL_NAME
+
+log = logger.create_logger()
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+CONFIG_FILE = "encoder.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+_INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+_OPSET = 14
+
+# Minimum cosine between an ONNX embedding and the torch one for the same text.
+DEFAULT_COSINE_TOLERANCE = 0.99
+
+PARITY_TEXTS = (
+    "Looking for a Tshirts in the Apparel - Topwear category. Ideal for Men Casual wear.",
+    "Navy Blue formal shirt for office, suitable for Summer season.",
+    "Women Black heels for a party",
+    "Kurtas for Women in Ethnic wear, preferably in Red color.",
+    "sports shoes",
+    "Unisex Silver watch",
+    "Girls Pink dress for Fall",
+    "Handbags in Brown leather for everyday use, with a zip closure and two outer pockets",
+)
+
+
+def export_onnx(model_name: str, output_dir: str) -> dict[str, t.Any]:
+    """Exports the transformer of `model_name` to `output_dir` with its tokenizer and pooling config."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = model.tokenizer(list(PARITY_TEXTS[:2]), padding=True, return_tensors="pt")
+    axes = {name: {0: "batch", 1: "sequence"} for name in (*_INPUT_NAMES, "last_hidden_state")}
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(transformer),
+            tuple(sample[name] for name in _INPUT_NAMES),
+            os.path.join(output_dir, MODEL_FILE),
+            input_names=list(_INPUT_NAMES),
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=_OPSET,
+            do_constant_folding=True,
+        )
+    model.tokenizer.save_pretrained(output_dir)
+
+    pooling = next((module for module in model if isinstance(module, Pooling)), None)
+    config = {
+        "model_name": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(isinstance(module, Normalize) for module in model),
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    log.info(f"Exported {model_name} to {output_dir}")
+    return config
+
+
+def quantize_onnx(output_dir: str) -> str:
+    """Dynamic int8 quantization of the exported model's weights."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    path = os.path.join(output_dir, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(os.path.join(output_dir, MODEL_FILE), path, weight_type=QuantType.QInt8)
+    log.info(f"Quantized model written to {path}")
+    return path
+
+
+class OnnxSentenceEncoder:
+    """Drop-in for the parts of `SentenceTransformer` the pipeline uses.
+
+    `encode` tokenizes with the exported fast tokenizer, runs the ONNX graph in
+    `batch_size` chunks and applies the model's pooling and normalization.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, intra_op_threads: t.Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model at {model_path}; export one with `python -m embedding.onnx_encoder "
+                f"--output {model_dir}`"
+            )
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.quantized = quantized
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = [node.name for node in self.session.get_inputs()]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id("[PAD]") or 0, pad_token="[PAD]"
+        )
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.config["max_seq_length"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: feeds[name] for name in self._inputs})[0]
+        return self._pool(hidden, feeds["attention_mask"])
+
+    def encode(
+        self,
+        sentences: t.Union[str, t.Sequence[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        embeddings = np.concatenate([
+            self._encode_batch(texts[start:start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]).astype(np.float32)
+        if normalize_embeddings or self.config["normalize"]:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def cosine_parity(reference, candidate, texts: t.Sequence[str] = PARITY_TEXTS) -> dict[str, float]:
+    """Cosine similarity between two encoders' normalized embeddings of `texts`."""
+    expected = np.asarray(reference.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+    actual = np.asarray(candidate.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+    cosines = (expected * actual).sum(axis=1)
+    return {"min": float(cosines.min()), "mean": float(cosines.mean())}
+
+
+def check_parity(
+    reference,
+    candidate,
+    tolerance: float = DEFAULT_COSINE_TOLERANCE,
+    texts: t.Sequence[str] = PARITY_TEXTS,
+) -> dict[str, float]:
+    """Raises ValueError if any text's embeddings disagree by more than `tolerance`."""
+    parity = cosine_parity(reference, candidate, texts)
+    if parity["min"] < tolerance:
+        raise ValueError(
+            f"Encoder drifted from the reference: min cosine {parity['min']:.4f} < {tolerance}"
+        )
+    return parity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=_EMBEDDING_MODEL_NAME)
+    parser.add_argument("--output", default=f".cache/onnx/{_EMBEDDING_MODEL_NAME}")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_COSINE_TOLERANCE)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    start = time.perf_counter()
+    config = export_onnx(args.model, args.output)
+    reference = SentenceTransformer(args.model, device="cpu")
+    variants = [False] if args.no_quantize else [False, True]
+    for quantized in variants:
+        if quantized:
+            quantize_onnx(args.output)
+        encoder = OnnxSentenceEncoder(args.output, quantized=quantized)
+        label = "int8" if quantized else "fp32"
+        config[f"parity_{label}"] = check_parity(reference, encoder, args.tolerance)
+        log.info(f"{label} parity: {config[f'parity_{label}']}")
+    with open(os.path.join(args.output, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(json.dumps(config, indent=2))
+    log.info(f"Export finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Micro-batching of concurrent single-text encodes into one model call."""
+
+import asyncio
+import bisect
+import collections
+import time
+import typing as t
+from concurrent.futures import Executor
+
+import numpy as np
+
+from common import logger
+
+log = logger.create_logger()
+
+# Upper bounds of the batch size histogram buckets; larger batches land in the last.
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Recent per-request queue delays kept for the percentiles in `stats`.
+_DELAY_SAMPLES = 10_000
+
+_Pending = tuple[str, asyncio.Future, float]
+
+
+def _fail(batch: list[_Pending], error: BaseException) -> None:
+    for _, future, _ in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+class EmbeddingScheduler:
+    """Coalesces concurrent `embed` calls into batched `encode` calls.
+
+    A batch is dispatched once `max_batch_size` texts are waiting or the oldest
+    has waited `max_wait` seconds. While `max_in_flight` batches are encoding,
+    new requests keep queueing and join the next batch, so batches grow with
+    load on their own and a lone request pays at most `max_wait` extra.
+    `encode` maps a list of texts to a matrix of L2-normalized rows and runs on
+    `executor`; each caller gets its own row back through a future.
+    """
+
+    def __init__(
+        self,
+        encode: t.Callable[[list[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait: float = 0.002,
+        executor: t.Optional[Executor] = None,
+        max_in_flight: int = 1,
+    ):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._queue: t.Optional[asyncio.Queue] = None
+        self._slots: t.Optional[asyncio.Semaphore] = None
+        self._worker: t.Optional[asyncio.Task] = None
+        self._dispatches: set[asyncio.Task] = set()
+        self._batch_sizes = [0] * len(_BATCH_SIZE_BUCKETS)
+        self._queue_delays: collections.deque = collections.deque(maxlen=_DELAY_SAMPLES)
+        self.requests = 0
+        self.batches = 0
+        self.batched = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embeds one text as part of whatever batch it lands in."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        self.requests += 1
+        return await future
+
+    async def _collect(self) -> list[_Pending]:
+        batch = [await self._queue.get()]
+        try:
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            # Already off the queue, so `aclose` would never fail these.
+            _fail(batch, RuntimeError("Embedding scheduler closed"))
+            raise
+        # Whatever arrived while waiting for a free slot rides along.
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[_Pending]) -> None:
+        try:
+            started = time.perf_counter()
+            batch = [pending for pending in batch if not pending[1].cancelled()]
+            if not batch:
+                return
+            rows: dict[str, int] = {}
+            for text, _, _ in batch:
+                rows.setdefault(text, len(rows))
+            vectors = await self._loop.run_in_executor(self.executor, self.encode, list(rows))
+            for text, future, _ in batch:
+                if not future.done():
+                    future.set_result(vectors[rows[text]])
+            self._record(batch, started, len(rows))
+        except Exception as e:
+            log.error(f"Batched encode of {len(batch)} texts failed: {e}")
+            _fail(batch, e)
+        finally:
+            self._slots.release()
+
+    def _record(self, batch: list[_Pending], started: float, encoded: int) -> None:
+        self.batches += 1
+        self.batched += len(batch)
+        self.encoded += encoded
+        self.encode_seconds += time.perf_counter() - started
+        bucket = min(bisect.bisect_left(_BATCH_SIZE_BUCKETS, len(batch)), len(_BATCH_SIZE_BUCKETS) - 1)
+        self._batch_sizes[bucket] += 1
+        self._queue_delays.extend(started - enqueued for _, _, enqueued in batch)
+
+    async def aclose(self) -> None:
+        """Stops collecting, lets running batches finish and fails anything still queued."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        await asyncio.gather(self._worker, *self._dispatches, return_exceptions=True)
+        queued = []
+        while not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        _fail(queued, RuntimeError("Embedding scheduler closed"))
+        self._worker = None
+
+    def stats(self) -> dict[str, t.Any]:
+        delays = np.array(self._queue_delays, dtype=np.float64) * 1000
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else 0.0,
+            "encoded": self.encoded,
+            "pending": self.pending,
+            "mean_encode_ms": self.encode_seconds / self.batches * 1000 if self.batches else 0.0,
+            "batch_sizes": {
+                f"<={bound}": count for bound, count in zip(_BATCH_SIZE_BUCKETS, self._batch_sizes)
+            },
+            "queue_delay_ms": {
+                "p50": float(np.percentile(delays, 50)) if len(delays) else 0.0,
+                "p95": float(np.percentile(delays, 95)) if len(delays) else 0.0,
+                "max": float(delays.max()) if len(delays) else 0.0,
+            },
+        }
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
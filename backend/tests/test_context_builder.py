@@ -0,0 +1,48 @@
+import numpy as np
+
+from agents.context_builder import ContextBuilder
+
+
+def hit(name, colour, score, embedding=None):
+    result = {"id": name, "score": score, "metadata": {"productDisplayName": name, "baseColour": colour}}
+    if embedding is not None:
+        result["embedding"] = np.asarray(embedding, dtype=np.float32)
+    return result
+
+
+class RecordingEmbed:
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.asarray([self.vectors[text] for text in texts], dtype=np.float32)
+
+
+def test_stored_embeddings_are_not_reencoded():
+    embed = RecordingEmbed({})
+    builder = ContextBuilder(embed, token_budget=500)
+    results = [
+        hit("Red Tee", "Red", 0.9, [1.0, 0.0]),
+        hit("Blue Tee", "Blue", 0.8, [0.99, 0.141]),
+        hit("Black Jeans", "Black", 0.7, [0.0, 1.0]),
+    ]
+
+    builder.warm([results])
+    order = builder.select(results)
+
+    assert embed.calls == []
+    assert order == [(0, [1]), (2, [])]
+
+
+def test_only_hits_without_embeddings_are_encoded():
+    embed = RecordingEmbed({"Black Jeans": [0.0, 1.0]})
+    builder = ContextBuilder(embed, token_budget=500)
+    results = [hit("Red Tee", "Red", 0.9, [1.0, 0.0]), hit("Black Jeans", "Black", 0.7)]
+
+    builder.warm([results])
+    context, report = builder.build(results)
+
+    assert embed.calls == [["Black Jeans"], ["Black Jeans"]]
+    assert report.items == 2 and "Black Jeans" in context
@@ -0,0 +1,46 @@
+import csv
+
+import pandas as pd
+
+from benchmarks.csv_cleaner import write_synthetic_styles
+from utils.analyse_data import FashionDataCleaner
+
+_STYLES = """id,gender,masterCategory,subCategory,articleType,baseColour,season,year,usage,productDisplayName
+1,Men,Apparel,Topwear,Tshirts,Red,Summer,2012,Casual,Roadster Men Red Tee
+2,Women,Apparel,Topwear,Kurtas,Blue,Fall,2013,Ethnic,Biba Women, Blue Kurta
+3,Women,Footwear,Shoes,Heels,Black,Winter,2014,Party,"Catwalk Women Black, Heels"
+4,Men,Accessories,Watches,Watches,Silver,Summer,2015
+n/a,Men,Apparel,Topwear,Shirts,White,Summer,2012,Formal,No Id Shirt
+"""
+
+
+def test_chunked_and_full_loads_agree(tmp_path):
+    path = str(tmp_path / "styles.csv")
+    write_synthetic_styles(path, rows=2000, seed=3)
+
+    full = FashionDataCleaner().load_and_clean_data(path, chunk_size=1_000_000)
+    chunks = list(FashionDataCleaner().iter_clean_chunks(path, chunk_size=137))
+
+    assert len(chunks) == -(-len(full) // 137)
+    assert all(len(chunk) == 137 for chunk in chunks[:-1])
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+
+
+def test_defective_rows_are_repaired_or_rejected(tmp_path):
+    path, rejects_path = tmp_path / "styles.csv", tmp_path / "rejects.csv"
+    path.write_text(_STYLES, encoding="utf-8")
+    cleaner = FashionDataCleaner()
+
+    df = cleaner.load_and_clean_data(str(path), chunk_size=2, rejects_path=str(rejects_path))
+
+    assert df["id"].tolist() == [1, 2, 3, 4]
+    assert df["productDisplayName"].tolist()[:3] == [
+        "Roadster Men Red Tee", "Biba Women, Blue Kurta", "Catwalk Women Black, Heels"
+    ]
+    assert df["usage"].isna().tolist() == [False, False, False, True]
+    assert [(e["line_number"], e["action"]) for e in cleaner.error_rows] == [
+        (3, "repaired"), (5, "repaired"), (6, "rejected")
+    ]
+    with open(rejects_path, newline="", encoding="utf-8") as f:
+        rejects = list(csv.reader(f))
+    assert rejects[1][:3] == ["6", "invalid id", "n/a"]
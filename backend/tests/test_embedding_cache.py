@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from cache.embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, normalize_embeddings=False):
+        self.encoded.extend(texts)
+        return np.asarray([[len(text), 1.0, 0.0, 0.0] for text in texts], dtype=np.float32)
+
+
+def test_evicts_least_recently_used_when_over_byte_budget():
+    vector_bytes = 4 * 4
+    cache = EmbeddingCache("model", max_bytes=2 * vector_bytes)
+    cache.put("a", np.ones(4))
+    cache.put("b", np.ones(4))
+    cache.get("a")
+    cache.put("c", np.ones(4))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] == 2 * vector_bytes
+
+
+def test_replacing_an_entry_does_not_double_count_bytes():
+    cache = EmbeddingCache("model", max_bytes=1024)
+    cache.put("a", np.ones(4))
+    cache.put("a", np.zeros(4))
+
+    assert len(cache) == 1 and cache.stats()["bytes"] == 16
+    assert not cache.get("a").any()
+
+
+def test_cached_vectors_are_read_only_float32():
+    cache = EmbeddingCache("model")
+    vector = cache.put("a", np.ones(4, dtype=np.float64))
+
+    assert vector.dtype == np.float32
+    with pytest.raises(ValueError):
+        vector[0] = 2.0
+
+
+def test_encode_runs_the_model_only_on_misses():
+    model = CountingModel()
+    cache = EmbeddingCache("model")
+    cache.encode(model, ["red", "blue"])
+
+    vectors = cache.encode(model, ["blue", "green", "red"])
+
+    assert model.encoded == ["red", "blue", "green"]
+    assert vectors[:, 0].tolist() == [4.0, 5.0, 3.0]
+    assert cache.stats()["hits"] == 2
+
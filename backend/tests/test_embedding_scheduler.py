@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from embedding.scheduler import EmbeddingScheduler
+
+
+class RecordingEncoder:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        if self.fail_on in texts:
+            raise RuntimeError(f"cannot encode {self.fail_on}")
+        return np.asarray([[len(text), 0.0] for text in texts], dtype=np.float32)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_share_one_encode():
+    encoder = RecordingEncoder()
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=32, max_wait=0.05)
+
+    async def main():
+        texts = ["a", "bb", "ccc", "bb"]
+        vectors = await asyncio.gather(*(scheduler.embed(text) for text in texts))
+        await scheduler.aclose()
+        return vectors
+
+    vectors = run(main())
+
+    assert encoder.calls == [["a", "bb", "ccc"]]
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0, 2.0]
+    assert scheduler.stats()["batches"] == 1 and scheduler.stats()["encoded"] == 3
+
+
+def test_batches_are_capped_at_max_batch_size():
+    encoder = RecordingEncoder()
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=4, max_wait=0.05)
+
+    async def main():
+        await asyncio.gather(*(scheduler.embed(f"text {i}") for i in range(10)))
+        await scheduler.aclose()
+
+    run(main())
+
+    assert [len(call) for call in encoder.calls] == [4, 4, 2]
+
+
+def test_encode_errors_reach_every_caller_in_the_batch():
+    encoder = RecordingEncoder(fail_on="bad")
+    scheduler = EmbeddingScheduler(encoder, max_batch_size=8, max_wait=0.05)
+
+    async def main():
+        results = await asyncio.gather(
+            scheduler.embed("good"), scheduler.embed("bad"), return_exceptions=True
+        )
+        # The scheduler keeps serving after a failed batch.
+        after = await scheduler.embed("later")
+        await scheduler.aclose()
+        return results, after
+
+    results, after = run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert after[0] == 5.0
+
+
+def test_close_fails_requests_still_queued():
+    release = threading.Event()
+
+    def slow_encode(texts):
+        release.wait(1.0)
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    scheduler = EmbeddingScheduler(slow_encode, max_batch_size=1, max_wait=0.0)
+
+    async def main():
+        first = asyncio.ensure_future(scheduler.embed("first"))
+        second = asyncio.ensure_future(scheduler.embed("second"))
+        await asyncio.sleep(0.05)
+        closing = asyncio.ensure_future(scheduler.aclose())
+        await asyncio.sleep(0)
+        release.set()
+        await closing
+        return await first, second
+
+    first, second = run(main())
+
+    assert first.shape == (2,)
+    with pytest.raises(RuntimeError, match="closed"):
+        second.result()
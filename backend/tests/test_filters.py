@@ -0,0 +1,37 @@
+from data.filters import extract_filters
+from data.term_matcher import _surface_forms
+
+_REWRITE = (
+    "Looking for a Lounge Pants in the Apparel - Loungewear and Nightwear category. "
+    "Ideal for Women Home wear, preferably in Grey color, suitable for Winter season."
+)
+
+
+def test_bare_words_do_not_push_down_a_category():
+    assert extract_filters("something comfy to wear at home") == {}
+    assert extract_filters("free shipping on shoes") == {}
+
+
+def test_master_category_comes_from_the_rewrite_clause():
+    filters = extract_filters("something comfy to wear at home", _REWRITE)
+
+    assert filters["masterCategory"] == ["Apparel"]
+
+
+def test_unknown_category_in_rewrite_is_ignored():
+    rewrite = "Looking for a Mug in the Kitchen - Cups category."
+
+    assert "masterCategory" not in extract_filters("a mug", rewrite)
+
+
+def test_gender_from_listed_synonyms_and_user_words_first():
+    assert extract_filters("a gift for my husband")["gender"] == ["Men", "Unisex"]
+    assert extract_filters("for ladies", _REWRITE.replace("Women", "Men"))["gender"] == ["Women", "Unisex"]
+    assert extract_filters("something to lounge in", _REWRITE)["gender"] == ["Women", "Unisex"]
+
+
+def test_surface_forms_follow_plural_rules():
+    assert _surface_forms("Shoes") == {"shoes", "shoe"}
+    assert _surface_forms("Home") == {"home", "homes"}
+    assert _surface_forms("Dresses") == {"dresses", "dress"}
+    assert _surface_forms("Accessories") == {"accessories", "accessory"}
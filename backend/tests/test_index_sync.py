@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("pinecone")
+
+from benchmarks.pinecone_stub import FakePineconeIndex
+from utils import index_sync
+
+
+class Cursor(list):
+    def sort(self, key, direction):
+        return Cursor(sorted(self, key=lambda doc: doc[key], reverse=direction < 0))
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    def find(self, query, projection, batch_size=None):
+        ids = query.get("_id", {}).get("$in")
+        docs = self.docs.values() if ids is None else (self.docs[i] for i in ids if i in self.docs)
+        return Cursor(
+            {"_id": doc["_id"], **{key: doc[key] for key in projection if key in doc}} for doc in docs
+        )
+
+
+def doc(i, digest):
+    return {
+        "_id": str(i),
+        "embedding": [float(i), 1.0],
+        "content_hash": digest,
+        "metadata": {"productDisplayName": f"Item {i}", "usage": None},
+    }
+
+
+def test_unsorted_inventory_is_sorted_on_disk(tmp_path):
+    path, runs_path = str(tmp_path / "ids.jsonl"), str(tmp_path / "runs.jsonl")
+    entries = [(f"{i:03d}", f"h{i}") for i in (7, 3, 9, 1, 5, 2, 8)]
+
+    assert index_sync.write_inventory(entries, path) == 7
+    assert list(index_sync.read_inventory(path)) == sorted(entries)
+
+    index_sync._write_entries(entries, runs_path)
+    index_sync._sort_inventory(runs_path, run_size=3)
+    assert list(index_sync.read_inventory(runs_path)) == sorted(entries)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ids.jsonl", "runs.jsonl"]
+
+
+def test_diff_upserts_new_and_changed_ids_and_deletes_removed(tmp_path):
+    source, target = str(tmp_path / "source.jsonl"), str(tmp_path / "target.jsonl")
+    index_sync.write_inventory([("a", "1"), ("b", "2"), ("d", "4")], source)
+    index_sync.write_inventory([("b", "old"), ("c", "3"), ("d", "4")], target)
+
+    assert list(index_sync.diff_inventories(source, target)) == [
+        {"op": "upsert", "id": "a"},
+        {"op": "upsert", "id": "b"},
+        {"op": "delete", "id": "c"},
+    ]
+
+
+def test_sync_brings_the_index_in_line_with_mongo(tmp_path):
+    collection = FakeCollection([doc(i, f"h{i}") for i in range(1, 6)])
+    index = FakePineconeIndex()
+    index.upsert([
+        {"id": "1", "values": [1.0, 1.0], "metadata": {"content_hash": "h1"}},
+        {"id": "2", "values": [2.0, 1.0], "metadata": {"content_hash": "stale"}},
+        {"id": "9", "values": [9.0, 1.0], "metadata": {"content_hash": "h9"}},
+    ])
+
+    summary = index_sync.sync(collection, index, str(tmp_path), apply=True)
+
+    assert summary["diff"] == {"upsert": 4, "delete": 1}
+    assert summary["applied"] == {"upserted": 4, "failed_chunks": [], "deleted": 1}
+    stored = index.fetch([str(i) for i in range(1, 10)])["vectors"]
+    assert sorted(stored) == ["1", "2", "3", "4", "5"]
+    assert stored["2"]["metadata"] == {"productDisplayName": "Item 2", "content_hash": "h2"}
+
+    again = index_sync.sync(collection, index, str(tmp_path))
+    assert again["diff"] == {"upsert": 0, "delete": 0}
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from vector_store.ivf_store import IVFVectorStore
+
+
+@pytest.fixture(scope="module")
+def store():
+    rng = np.random.default_rng(0)
+    count = 20_000
+    embeddings = rng.standard_normal((count, 32)).astype(np.float32)
+    # 2% of rows are "Home", the selective filter that used to come back short,
+    # and 0.25% are "Free Items", fewer than the probed lists hold.
+    metadata = [
+        {"masterCategory": "Free Items" if i % 400 == 0 else "Home" if i % 50 == 0 else "Apparel"}
+        for i in range(count)
+    ]
+    return IVFVectorStore.build([str(i) for i in range(count)], embeddings, metadata, n_probe=4)
+
+
+def brute_force(store, query, k, rows):
+    scores = store.embeddings[rows] @ query
+    return {store.ids[row] for row in rows[np.argsort(-scores)[:k]]}
+
+
+def test_selective_filter_returns_k_results(store):
+    rng = np.random.default_rng(1)
+    for query in rng.standard_normal((50, 32)).astype(np.float32):
+        results = store.search(query, k=20, filters={"masterCategory": "Home"})
+        assert len(results) == 20
+        assert all(result["metadata"]["masterCategory"] == "Home" for result in results)
+
+
+def test_filter_smaller_than_the_probe_is_scored_exactly(store):
+    rng = np.random.default_rng(3)
+    rows = np.array([i for i, meta in enumerate(store.metadata) if meta["masterCategory"] == "Free Items"])
+    for query in rng.standard_normal((20, 32)).astype(np.float32):
+        query /= np.linalg.norm(query)
+        results = store.search(query, k=20, filters={"masterCategory": "Free Items"})
+        assert {result["id"] for result in results} == brute_force(store, query, 20, rows)
+
+
+def test_broad_filter_widens_the_probe_until_k(store):
+    rng = np.random.default_rng(2)
+    for query in rng.standard_normal((20, 32)).astype(np.float32):
+        results = store.search(query, k=50, filters={"masterCategory": "Apparel"}, n_probe=1)
+        assert len(results) == 50
+        assert all(result["metadata"]["masterCategory"] == "Apparel" for result in results)
+
+
+def test_unfiltered_search_only_scores_probed_lists(store):
+    query = store.centroids[0]
+    results = store.search(query, k=5, n_probe=1)
+    first_list = set(store.ids[store.list_offsets[0]:store.list_offsets[1]])
+    assert len(results) == 5 and {result["id"] for result in results} <= first_list
+
+
+@pytest.fixture(scope="module")
+def clustered():
+    rng = np.random.default_rng(4)
+    centers = rng.standard_normal((40, 32)).astype(np.float32)
+    labels = rng.integers(40, size=8000)
+    embeddings = centers[labels] + 0.3 * rng.standard_normal((8000, 32)).astype(np.float32)
+    metadata = [{"masterCategory": "Apparel"} for _ in range(8000)]
+    return IVFVectorStore.build([str(i) for i in range(8000)], embeddings, metadata, n_lists=40, n_probe=4)
+
+
+def test_recall_against_brute_force(clustered):
+    rng = np.random.default_rng(5)
+    rows = np.arange(len(clustered))
+    recalled = []
+    for row in rng.choice(len(clustered), 50, replace=False):
+        query = clustered.embeddings[row] + 0.05 * rng.standard_normal(32).astype(np.float32)
+        query /= np.linalg.norm(query)
+        found = {result["id"] for result in clustered.search(query, k=10)}
+        recalled.append(len(found & brute_force(clustered, query, 10, rows)) / 10)
+        exhaustive = clustered.search(query, k=10, n_probe=clustered.n_lists)
+        assert {result["id"] for result in exhaustive} == brute_force(clustered, query, 10, rows)
+    assert np.mean(recalled) >= 0.9
+
+
+def test_save_and_load_round_trip(clustered, tmp_path):
+    path = str(tmp_path / "ivf.npz")
+    clustered.save(path)
+    loaded = IVFVectorStore.load(path)
+
+    query = clustered.centroids[3]
+    assert loaded.n_probe == clustered.n_probe and loaded.n_lists == clustered.n_lists
+    assert [r["id"] for r in loaded.search(query, k=5)] == [r["id"] for r in clustered.search(query, k=5)]
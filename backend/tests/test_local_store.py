@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from vector_store.local_store import LocalVectorStore
+
+_GENDERS = ["Men", "Women", "Boys", "Girls", "Unisex"]
+_CATEGORIES = ["Apparel", "Footwear", "Accessories", "Home"]
+
+
+@pytest.fixture(scope="module")
+def store():
+    rng = np.random.default_rng(0)
+    count = 3000
+    metadata = [
+        {"gender": _GENDERS[i % 5], "masterCategory": _CATEGORIES[i % 7 % 4], "year": 2010 + i % 3}
+        for i in range(count)
+    ]
+    embeddings = rng.standard_normal((count, 16)).astype(np.float32)
+    return LocalVectorStore([str(i) for i in range(count)], embeddings, metadata)
+
+
+def brute_force(store, query, k, accept=lambda meta: True):
+    rows = [row for row, meta in enumerate(store.metadata) if accept(meta)]
+    scores = store.embeddings[rows] @ query
+    return [store.ids[rows[i]] for i in np.argsort(-scores)[:k]]
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((10, 16)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_unfiltered_search_matches_brute_force(store, queries):
+    for query in queries:
+        results = store.search(query, k=10)
+        assert ids(results) == brute_force(store, query, 10)
+        assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+
+@pytest.mark.parametrize("filters", [
+    {"gender": "Women"},
+    {"gender": ["Women", "Unisex"]},
+    {"gender": ["Men", "Unisex"], "masterCategory": "Footwear"},
+    {"gender": ["Men", "Women", "Boys", "Girls"]},
+])
+def test_bitmap_filtered_search_matches_brute_force(store, queries, filters):
+    accepted = {field: set(v) if isinstance(v, list) else {v} for field, v in filters.items()}
+
+    def accept(meta):
+        return all(meta[field] in values for field, values in accepted.items())
+
+    assert store.bitmap_index.covers(filters)
+    for query in queries:
+        results = store.search(query, k=10, filters=filters)
+        assert ids(results) == brute_force(store, query, 10, accept)
+
+
+def test_fields_without_a_bitmap_fall_back_to_a_scan(store, queries):
+    filters = {"year": 2011}
+    assert not store.bitmap_index.covers(filters)
+    results = store.search(queries[0], k=5, filters=filters)
+    assert ids(results) == brute_force(store, queries[0], 5, lambda meta: meta["year"] == 2011)
+
+
+def test_unknown_filter_value_matches_nothing(store, queries):
+    assert store.search(queries[0], k=5, filters={"gender": "Nobody"}) == []
+
+
+def test_search_many_matches_search(store, queries):
+    filters = {"masterCategory": "Home"}
+    batched = store.search_many(queries, k=5, filters=filters)
+    assert [ids(results) for results in batched] == [ids(store.search(q, k=5, filters=filters)) for q in queries]
+
+
+def test_save_and_load_round_trip(store, queries, tmp_path):
+    path = str(tmp_path / "store.npz")
+    store.save(path)
+    loaded = LocalVectorStore.load(path)
+
+    assert loaded.ids == store.ids and loaded.metadata == store.metadata
+    assert ids(loaded.search(queries[0], k=5)) == ids(store.search(queries[0], k=5))
@@ -0,0 +1,97 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from common.metrics import PipelineMetrics, render_cache_metrics
+
+# name{labels} value, as the text exposition format requires of every sample line.
+_SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+
+def samples(body):
+    return [line for line in body.splitlines() if line and not line.startswith("#")]
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = PipelineMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        metrics.observe("search", seconds)
+    metrics.observe("search", 0.2, failed=True)
+
+    body = metrics.render()
+
+    assert "# TYPE fashionfiend_stage_duration_seconds histogram" in body
+    for line in (
+        'fashionfiend_stage_duration_seconds_bucket{stage="search",le="0.1"} 1',
+        'fashionfiend_stage_duration_seconds_bucket{stage="search",le="1"} 4',
+        'fashionfiend_stage_duration_seconds_bucket{stage="search",le="+Inf"} 5',
+        'fashionfiend_stage_duration_seconds_count{stage="search"} 5',
+        'fashionfiend_stage_errors_total{stage="search"} 1',
+        'fashionfiend_stage_in_flight{stage="search"} 0',
+    ):
+        assert line in body.splitlines()
+    assert all(_SAMPLE.match(line) for line in samples(body))
+
+
+def test_timed_counts_calls_errors_and_async_functions():
+    metrics = PipelineMetrics()
+
+    @metrics.timed("sync")
+    def fails():
+        raise ValueError
+
+    @metrics.timed("async")
+    async def works():
+        return 1
+
+    with pytest.raises(ValueError):
+        fails()
+    assert asyncio.run(works()) == 1
+
+    snapshot = metrics.snapshot()
+    assert (snapshot["sync"]["count"], snapshot["sync"]["errors"]) == (1, 1)
+    assert (snapshot["async"]["count"], snapshot["async"]["errors"]) == (1, 0)
+    assert snapshot["sync"]["in_flight"] == snapshot["async"]["in_flight"] == 0
+
+
+def test_label_values_are_escaped():
+    metrics = PipelineMetrics()
+    metrics.observe('odd "stage"\\name', 0.01)
+
+    assert all(_SAMPLE.match(line) for line in samples(metrics.render()))
+    assert 'stage="odd \\"stage\\"\\\\name"' in metrics.render()
+
+
+def test_cache_ratios():
+    body = render_cache_metrics({"embedding": (3, 4), "llm_response": (0, 0)})
+
+    assert 'fashionfiend_cache_hit_ratio{cache="embedding"} 0.75' in body.splitlines()
+    assert 'fashionfiend_cache_hit_ratio{cache="llm_response"} 0' in body.splitlines()
+    assert all(_SAMPLE.match(line) for line in samples(body))
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(main, "use_mock_response", True)
+    with TestClient(main.app) as client:
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert all(_SAMPLE.match(line) for line in samples(response.text))
+
+
+def test_output_parses_with_the_prometheus_client():
+    parser = pytest.importorskip("prometheus_client.parser")
+    metrics = PipelineMetrics(buckets=(0.1, 1.0))
+    metrics.observe("search", 0.5)
+
+    families = {
+        family.name: family
+        for family in parser.text_string_to_metric_families(metrics.render() + render_cache_metrics({"url": (1, 2)}))
+    }
+
+    assert families["fashionfiend_stage_duration_seconds"].type == "histogram"
+    assert families["fashionfiend_cache_hit_ratio"].type == "gauge"
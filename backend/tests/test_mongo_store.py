@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from pymongo.errors import ExecutionTimeout, OperationFailure
+
+from vector_store.mongo_store import MongoVectorStore
+
+UNINDEXED = OperationFailure(
+    "PlanExecutor error during aggregation :: caused by :: Path 'metadata.gender' needs to be indexed as filter",
+    code=8,
+)
+
+
+class FakeCollection:
+    """Raises `error` for pipelines carrying a filter; answers unfiltered ones with one hit."""
+
+    def __init__(self, error):
+        self.error = error
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        if "filter" in pipeline[0]["$vectorSearch"]:
+            raise self.error
+        return [{"_id": "1", "score": 0.9, "metadata": {}}]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeAsyncCollection(FakeCollection):
+    async def aggregate(self, pipeline):
+        return FakeCursor(FakeCollection.aggregate(self, pipeline))
+
+
+FILTERS = {"gender": ["Men"]}
+
+
+def test_unindexed_filter_disables_pushdown_and_retries():
+    collection = FakeCollection(UNINDEXED)
+    store = MongoVectorStore(collection, filter_pushdown=True)
+    assert [hit["id"] for hit in store.search([0.1, 0.2], k=1, filters=FILTERS)] == ["1"]
+    assert store.filter_pushdown is False
+    store.search([0.1, 0.2], k=1, filters=FILTERS)
+    assert "filter" not in collection.pipelines[-1][0]["$vectorSearch"]
+
+
+@pytest.mark.parametrize("error", [
+    ExecutionTimeout("operation exceeded time limit", code=50),
+    OperationFailure("interrupted at shutdown", code=11600),
+])
+def test_other_server_errors_are_raised_and_keep_pushdown(error):
+    store = MongoVectorStore(FakeCollection(error), filter_pushdown=True)
+    with pytest.raises(OperationFailure):
+        store.search([0.1, 0.2], k=1, filters=FILTERS)
+    assert store.filter_pushdown is True
+
+
+def test_async_search_handles_rejection_the_same_way():
+    collection = FakeAsyncCollection(UNINDEXED)
+    store = MongoVectorStore(collection, async_collection=collection, filter_pushdown=True)
+    hits = asyncio.run(store.asearch([0.1, 0.2], k=1, filters=FILTERS))
+    assert [hit["id"] for hit in hits] == ["1"] and store.filter_pushdown is False
+
+    store = MongoVectorStore(collection, async_collection=FakeAsyncCollection(ExecutionTimeout("slow", code=50)),
+                             filter_pushdown=True)
+    with pytest.raises(ExecutionTimeout):
+        asyncio.run(store.asearch([0.1, 0.2], k=1, filters=FILTERS))
+    assert store.filter_pushdown is True
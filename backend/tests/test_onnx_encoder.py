@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+from onnx import TensorProto, helper, numpy_helper
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+from embedding.onnx_encoder import (
+    CONFIG_FILE, MODEL_FILE, PARITY_TEXTS, TOKENIZER_FILE, OnnxSentenceEncoder, check_parity, quantize_onnx,
+)
+
+DIMENSION = 32
+
+
+class ReferenceEncoder:
+    """Mean-pooled embedding lookup plus projection, computed in numpy."""
+
+    def __init__(self, vocab, table, projection):
+        self.vocab, self.table, self.projection = vocab, table, projection
+
+    def encode(self, texts, normalize_embeddings=False):
+        rows = []
+        for text in texts:
+            ids = [self.vocab.get(word, self.vocab["[UNK]"]) for word in text.split()]
+            rows.append((self.table[ids] @ self.projection).mean(axis=0))
+        embeddings = np.array(rows, dtype=np.float32)
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("onnx")
+    words = sorted({word for text in PARITY_TEXTS for word in text.split()})
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{word: i + 2 for i, word in enumerate(words)}}
+    rng = np.random.default_rng(0)
+    table = rng.standard_normal((len(vocab), DIMENSION)).astype(np.float32)
+    projection = rng.standard_normal((DIMENSION, DIMENSION)).astype(np.float32)
+
+    graph = helper.make_graph(
+        [
+            helper.make_node("Gather", ["table", "input_ids"], ["embedded"]),
+            helper.make_node("MatMul", ["embedded", "projection"], ["last_hidden_state"]),
+        ],
+        "encoder",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", DIMENSION])],
+        initializer=[numpy_helper.from_array(table, "table"), numpy_helper.from_array(projection, "projection")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)])
+    model.ir_version = 8
+    onnx.save(model, str(directory / MODEL_FILE))
+
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.save(str(directory / TOKENIZER_FILE))
+    (directory / CONFIG_FILE).write_text(json.dumps({
+        "model_name": "test", "dimension": DIMENSION, "max_seq_length": 64, "pooling": "mean", "normalize": True,
+    }))
+    return directory, ReferenceEncoder(vocab, table, projection)
+
+
+def test_fp32_matches_reference(model_dir):
+    directory, reference = model_dir
+    encoder = OnnxSentenceEncoder(str(directory))
+    parity = check_parity(reference, encoder)
+    assert parity["min"] > 0.9999
+    assert encoder.encode(PARITY_TEXTS[0]).shape == (DIMENSION,)
+
+
+def test_padding_does_not_change_embeddings(model_dir):
+    directory, _ = model_dir
+    encoder = OnnxSentenceEncoder(str(directory))
+    short, long = "sports shoes", PARITY_TEXTS[-1]
+    alone = encoder.encode([short])[0]
+    padded = encoder.encode([short, long])[0]
+    np.testing.assert_allclose(alone, padded, atol=1e-6)
+
+
+def test_int8_stays_within_tolerance(model_dir):
+    directory, reference = model_dir
+    quantize_onnx(str(directory))
+    encoder = OnnxSentenceEncoder(str(directory), quantized=True)
+    assert check_parity(reference, encoder)["min"] >= 0.99
+
+
+def test_drift_is_rejected(model_dir):
+    directory, reference = model_dir
+
+    class Shuffled:
+        def encode(self, texts, normalize_embeddings=False):
+            return reference.encode(list(texts)[::-1], normalize_embeddings)
+
+    with pytest.raises(ValueError, match="drifted"):
+        check_parity(reference, Shuffled())
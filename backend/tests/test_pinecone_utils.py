@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pinecone")
+
+from utils.pinecone_utils import bulk_upsert, chunk_vectors
+
+
+class ApiError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"({status}) error")
+        self.status = status
+
+
+class FlakyIndex:
+    """Fails the first `failures[chunk_first_id]` upserts of a chunk with `status`."""
+
+    def __init__(self, failures=None, status=503):
+        self.failures = dict(failures or {})
+        self.status = status
+        self.vectors = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=""):
+        with self._lock:
+            self.calls += 1
+            first = vectors[0]["id"]
+            if self.failures.get(first, 0) > 0:
+                self.failures[first] -= 1
+                raise ApiError(self.status)
+            self.vectors.update((vector["id"], vector) for vector in vectors)
+
+
+def vectors(count):
+    return [{"id": str(i), "values": [0.1, 0.2, 0.3], "metadata": {"n": i}} for i in range(count)]
+
+
+def test_transient_failures_are_retried():
+    index = FlakyIndex(failures={"0": 2, "20": 1})
+    reports = bulk_upsert(index, vectors(50), chunk_size=10, max_workers=3, backoff=0)
+
+    assert [report.chunk for report in reports] == [1, 2, 3, 4, 5]
+    assert all(report.ok for report in reports)
+    assert [report.attempts for report in reports] == [3, 1, 2, 1, 1]
+    assert len(index.vectors) == 50
+
+
+def test_retries_are_bounded():
+    index = FlakyIndex(failures={"0": 10})
+    reports = bulk_upsert(index, vectors(20), chunk_size=10, max_retries=2, backoff=0)
+
+    assert not reports[0].ok and reports[0].attempts == 3
+    assert reports[1].ok
+    assert len(index.vectors) == 10
+
+
+def test_client_errors_are_not_retried():
+    index = FlakyIndex(failures={"0": 1}, status=400)
+    reports = bulk_upsert(index, vectors(10), chunk_size=10, backoff=0)
+
+    assert not reports[0].ok and reports[0].attempts == 1
+    assert index.calls == 1
+
+
+def test_chunks_respect_the_byte_limit():
+    chunks = list(chunk_vectors(vectors(30), max_vectors=100, max_bytes=500))
+    assert sum(len(chunk) for chunk in chunks) == 30
+    assert all(len(chunk) < 30 for chunk in chunks)
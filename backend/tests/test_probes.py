@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from common.resources import ResourceRegistry
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def mock_mode(monkeypatch):
+    monkeypatch.setattr(main, "use_mock_response", True)
+
+    def unreachable(self):
+        raise AssertionError("mock mode must not build resources")
+
+    monkeypatch.setattr(ResourceRegistry, "startup", unreachable)
+
+
+def test_mock_mode_serves_without_dependencies(mock_mode):
+    with TestClient(main.app) as client:
+        wait_for(lambda: main.app.state.resources.ready)
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").status_code == 200
+        response = client.post("/recommendations", json={"query": "red shirt"})
+        assert response.status_code == 200
+        assert response.json()["products"]
+
+
+def test_mock_mode_streams_and_batches(mock_mode):
+    with TestClient(main.app) as client:
+        wait_for(lambda: main.app.state.resources.ready)
+        assert client.get("/readyz").json()["mock"] is True
+        stream = client.post("/recommendations/stream", json={"query": "red shirt"})
+        assert stream.status_code == 200 and "event: done" in stream.text
+        batch = client.post("/recommendations/batch", json={"requests": [{"query": "a"}, {"query": "b"}]})
+        assert batch.status_code == 200 and len(batch.text.splitlines()) == 2
+
+
+@pytest.mark.parametrize("concurrency", [0, -1, 33])
+def test_batch_rejects_out_of_range_concurrency(mock_mode, concurrency):
+    with TestClient(main.app) as client:
+        body = {"requests": [{"query": "a"}], "llm_concurrency": concurrency}
+        assert client.post("/recommendations/batch", json=body).status_code == 422
+
+
+@pytest.fixture
+def real_mode(monkeypatch):
+    monkeypatch.setattr(main, "use_mock_response", False)
+    monkeypatch.setattr(main, "chat_model", lambda *args, **kwargs: None)
+
+
+def test_not_ready_while_starting(real_mode, monkeypatch):
+    release = []
+    monkeypatch.setattr(ResourceRegistry, "startup", lambda self: wait_for(lambda: release, timeout=10))
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").status_code == 503
+        response = client.post("/recommendations", json={"query": "red shirt"})
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Service is starting up"
+        release.append(True)
+
+
+def test_ready_after_startup(real_mode, monkeypatch):
+    def startup(self):
+        self.startup_seconds = 0.1
+        self.ready = True
+
+    monkeypatch.setattr(ResourceRegistry, "startup", startup)
+    with TestClient(main.app) as client:
+        wait_for(lambda: main.app.state.resources.ready)
+        assert client.get("/healthz").status_code == 200
+        readiness = client.get("/readyz")
+        assert readiness.status_code == 200
+        assert readiness.json() == {"ready": True, "mock": False, "startup_seconds": 0.1, "error": None}
+
+
+def test_failed_startup_fails_both_probes(real_mode, monkeypatch):
+    def startup(self):
+        raise ConnectionError("mongo unreachable")
+
+    monkeypatch.setattr(ResourceRegistry, "startup", startup)
+    with TestClient(main.app) as client:
+        wait_for(lambda: main.app.state.resources.startup_error)
+        assert client.get("/healthz").json() == {"status": "failed", "error": "mongo unreachable"}
+        assert client.get("/readyz").status_code == 503
+        response = client.post("/recommendations", json={"query": "red shirt"})
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Startup failed: mongo unreachable"
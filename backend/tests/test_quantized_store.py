@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import vector_store.quantized_store as quantized_store
+from vector_store.quantized_store import QuantizedVectorStore, quantized_fields
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection, batch_size=None):
+        return [{key: doc[key] for key in ("_id", *projection) if key in doc} for doc in self.documents]
+
+
+def documents(mode, count=64, dimension=16, with_codes=True):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((count, dimension)).astype(np.float32)
+    docs = [
+        {"_id": str(i), "embedding": embedding.tolist(), "metadata": {"n": i}}
+        for i, embedding in enumerate(embeddings)
+    ]
+    if with_codes:
+        for doc, fields in zip(docs, quantized_fields(embeddings, mode)):
+            doc.update(fields)
+    return docs, embeddings
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_stored_codes_are_used_without_requantizing(mode, monkeypatch):
+    docs, embeddings = documents(mode)
+    expected = QuantizedVectorStore([d["_id"] for d in docs], embeddings, [{}] * len(docs), mode=mode)
+
+    def fail(*args):
+        raise AssertionError("re-quantized despite stored codes")
+
+    monkeypatch.setattr(quantized_store, f"quantize_{mode}", fail)
+    store = QuantizedVectorStore.from_collection(FakeCollection(docs), mode=mode)
+    np.testing.assert_array_equal(store.codes, expected.codes)
+    if mode == "int8":
+        np.testing.assert_allclose(store.scales, expected.scales)
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_missing_codes_fall_back_to_quantizing(mode):
+    docs, embeddings = documents(mode)
+    del docs[10][next(iter(quantized_fields(embeddings[:1], mode)[0]))]
+    store = QuantizedVectorStore.from_collection(FakeCollection(docs), mode=mode)
+    expected = QuantizedVectorStore([d["_id"] for d in docs], embeddings, [{}] * len(docs), mode=mode)
+    np.testing.assert_array_equal(store.codes, expected.codes)
+
+
+def test_search_with_stored_codes_matches_brute_force():
+    docs, embeddings = documents("int8", count=200)
+    store = QuantizedVectorStore.from_collection(FakeCollection(docs), mode="int8", rescore_factor=10)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    query = normalized[7]
+    expected = [str(i) for i in np.argsort(-(normalized @ query))[:5]]
+    assert [result["id"] for result in store.search(query, k=5)] == expected
@@ -0,0 +1,39 @@
+import pytest
+
+from agents.query_rewriter import LexicalQueryRewriter
+from data.term_matcher import TermMatcher
+
+VOCABULARY = {
+    "gender": ["Men", "Women"],
+    "articleType": ["Tshirts", "Kurtas"],
+    "baseColour": ["Red", "Navy Blue"],
+    "season": ["Summer"],
+    "usage": ["Casual", "Ethnic"],
+}
+HIERARCHY = {"Tshirts": ("Apparel", "Topwear"), "Kurtas": ("Apparel", "Topwear")}
+
+
+@pytest.fixture
+def rewriter():
+    return LexicalQueryRewriter(TermMatcher(VOCABULARY, synonyms={}), HIERARCHY, min_coverage=0.5)
+
+
+def test_category_only(rewriter):
+    assert rewriter.rewrite("tshirts") == "Looking for a Tshirts in the Apparel - Topwear category."
+
+
+def test_colour_only_starts_a_new_sentence(rewriter):
+    assert rewriter.rewrite("red tshirts") == (
+        "Looking for a Tshirts in the Apparel - Topwear category. Preferably in Red color."
+    )
+
+
+def test_clauses_join_into_one_sentence(rewriter):
+    assert rewriter.rewrite("navy blue kurtas for women ethnic summer") == (
+        "Looking for a Kurtas in the Apparel - Topwear category. "
+        "Ideal for Women Ethnic wear, preferably in Navy Blue color, suitable for Summer season."
+    )
+
+
+def test_unknown_article_falls_back(rewriter):
+    assert rewriter.rewrite("red scarf") is None
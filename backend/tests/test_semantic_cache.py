@@ -0,0 +1,84 @@
+import numpy as np
+
+from cache.semantic_cache import SemanticQueryCache
+from common.metrics import render_similarity_histogram
+
+
+def unit(*values):
+    vector = np.zeros(4, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_queries_hit_only_above_threshold():
+    cache = SemanticQueryCache(threshold=0.9, dimension=4)
+    cache.put("red shirt", unit(1, 0), "Looking for a Shirts in red")
+
+    assert cache.get_exact("Red shirt!") == "Looking for a Shirts in red"
+    assert cache.get_similar(unit(1, 0.1)) == "Looking for a Shirts in red"
+    assert cache.get_similar(unit(1, 1)) is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["similarity_count"] == 2
+
+
+def test_saved_entries_load_back(tmp_path):
+    path = str(tmp_path / "rewrites.npz")
+    cache = SemanticQueryCache(path, dimension=4)
+    cache.put("red shirt", unit(1, 0), "red rewrite")
+    cache.put("blue jeans", unit(0, 1), "blue rewrite")
+    cache.save()
+
+    restored = SemanticQueryCache(path, dimension=4)
+
+    assert len(restored) == 2
+    assert restored.get_exact("blue jeans") == "blue rewrite"
+    assert restored.get_similar(unit(1, 0)) == "red rewrite"
+
+
+def test_workers_sharing_a_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "rewrites.npz")
+    first = SemanticQueryCache(path, dimension=4)
+    second = SemanticQueryCache(path, dimension=4)
+    first.put("red shirt", unit(1, 0), "first red")
+    second.put("blue jeans", unit(0, 1), "second blue")
+    second.put("red shirt", unit(1, 0), "second red")
+    first.save()
+    second.save()
+
+    merged = SemanticQueryCache(path, dimension=4)
+
+    assert len(merged) == 2
+    assert merged.get_exact("red shirt") == "second red"
+    assert merged.get_exact("blue jeans") == "second blue"
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+def test_merge_keeps_the_most_recent_entries_within_capacity(tmp_path):
+    path = str(tmp_path / "rewrites.npz")
+    other = SemanticQueryCache(path, max_entries=2, dimension=4)
+    other.put("a", unit(1, 0), "a")
+    other.put("b", unit(0, 1), "b")
+    other.save()
+    cache = SemanticQueryCache(None, max_entries=2, dimension=4)
+    cache.path = path
+    cache.put("c", unit(0, 0, 1), "c")
+    cache.save()
+
+    merged = SemanticQueryCache(path, max_entries=2, dimension=4)
+
+    assert sorted(merged._keys) == ["b", "c"]
+
+
+def test_similarity_histogram_exposition():
+    cache = SemanticQueryCache(threshold=0.9, dimension=4)
+    cache.put("red shirt", unit(1, 0), "red")
+    cache.get_similar(unit(1, 0))
+    cache.get_similar(unit(0, 1))
+
+    body = render_similarity_histogram(cache.stats())
+
+    assert "# TYPE fashionfiend_rewrite_cache_similarity histogram" in body
+    assert 'fashionfiend_rewrite_cache_similarity_bucket{le="0.5"} 1' in body
+    assert 'fashionfiend_rewrite_cache_similarity_bucket{le="+Inf"} 2' in body
+    assert "fashionfiend_rewrite_cache_similarity_count 2" in body
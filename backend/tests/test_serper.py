@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import httpx
+
+from agents.serper import AsyncSerperClient
+from cache.url_cache import ProductUrlCache
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def stub_client(handler, **kwargs) -> AsyncSerperClient:
+    client = AsyncSerperClient(api_key="test", url="https://serper.test/shopping", **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def shopping(query: str) -> dict:
+    return {"shopping": [{"link": f"https://shop.test/{query.replace(' ', '-')}"}]}
+
+
+class Serper:
+    """MockTransport handler answering single or batched payloads; `failing` queries get a 500."""
+
+    def __init__(self, failing=(), delays=None):
+        self.failing = set(failing)
+        self.delays = delays or {}
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        items = payload if isinstance(payload, list) else [payload]
+        await asyncio.sleep(max(self.delays.get(item["q"], 0.0) for item in items))
+        if any(item["q"] in self.failing for item in items):
+            return httpx.Response(500)
+        body = [shopping(item["q"]) for item in items]
+        return httpx.Response(200, json=body if isinstance(payload, list) else body[0])
+
+
+def test_results_keep_input_order():
+    serper = Serper(delays={"a": 0.03, "b": 0.0, "c": 0.01})
+
+    async def scenario():
+        client = stub_client(serper)
+        try:
+            return await client.search_many(["a", "b", "c"])
+        finally:
+            await client.aclose()
+
+    assert run(scenario()) == [shopping(q)["shopping"][0]["link"] for q in "abc"]
+
+
+def test_batch_mode_sends_one_request_per_batch():
+    serper = Serper()
+    queries = [f"item {i}" for i in range(5)]
+
+    async def scenario():
+        client = stub_client(serper, batch_size=2)
+        try:
+            return await client.search_many(queries)
+        finally:
+            await client.aclose()
+
+    links = run(scenario())
+    assert links == [shopping(q)["shopping"][0]["link"] for q in queries]
+    assert sorted(len(payload) for payload in serper.requests) == [1, 2, 2]
+
+
+def test_failures_become_none():
+    async def scenario(batch_size):
+        client = stub_client(Serper(failing={"bad"}), batch_size=batch_size)
+        try:
+            return await client.search_many(["good", "bad", "fine"])
+        finally:
+            await client.aclose()
+
+    good, fine = shopping("good")["shopping"][0]["link"], shopping("fine")["shopping"][0]["link"]
+    assert run(scenario(1)) == [good, None, fine]
+    # A failed batch request loses every query in it, but not the other batches.
+    assert run(scenario(2)) == [None, None, fine]
+
+
+def test_cache_hits_skip_the_network(tmp_path):
+    serper = Serper(failing={"missing"})
+    cache = ProductUrlCache(str(tmp_path / "urls.sqlite3"))
+
+    async def scenario():
+        client = stub_client(serper, cache=cache)
+        try:
+            first = await client.search_many(["shirt", "missing"])
+            second = await client.search_many(["Shirt!", "missing"])
+            return first, second
+        finally:
+            await client.aclose()
+
+    first, second = run(scenario())
+    assert first == second == [shopping("shirt")["shopping"][0]["link"], None]
+    # "shirt" is fetched once; the failed lookup is not cached and is retried.
+    assert [payload["q"] for payload in serper.requests] == ["shirt", "missing", "missing"]
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 3)
+    cache.close()
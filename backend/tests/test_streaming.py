@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import main
+from common.resources import ResourceRegistry
+
+_RESULTS = [
+    {"id": "1", "score": 0.9, "metadata": {"productDisplayName": "Red Tee", "masterCategory": "Apparel"}},
+    {"id": "2", "score": 0.8, "metadata": {"productDisplayName": "Blue Jeans", "masterCategory": "Apparel"}},
+]
+
+
+class FakeSerper:
+    async def search_many(self, names):
+        return [f"https://shop.example/{name.replace(' ', '-').lower()}" for name in names]
+
+
+def replay(chunks):
+    async def stream_llm_response(client, prompt, *args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+
+    return stream_llm_response
+
+
+def stream(monkeypatch, chunks, results=_RESULTS, llm=None):
+    async def retrieve_products(query, resources):
+        return "rewritten", results
+
+    monkeypatch.setattr(main, "retrieve_products", retrieve_products)
+    monkeypatch.setattr(main, "stream_llm_response", llm or replay(chunks))
+    resources = ResourceRegistry()
+    resources.serper_client = FakeSerper()
+
+    async def collect():
+        return [event async for event in main.stream_recommendations("query", resources)]
+
+    events = []
+    for raw in asyncio.run(collect()):
+        name, data = raw.strip().split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_names_split_across_chunks_are_resolved_once(monkeypatch):
+    before = main.pipeline_metrics.snapshot().get("extract_product_names", {}).get("count", 0)
+    chunks = ["<response>Try the [Red", " Tee] with [Blue Jeans]", ", or the [Red Tee] again.</response>"]
+
+    events = stream(monkeypatch, chunks)
+
+    products = [data["name"] for name, data in events if name == "product"]
+    assert sorted(products) == ["Blue Jeans", "Red Tee"]
+    assert events[-1][0] == "done"
+    assert [p["name"] for p in events[-1][1]["products"]] == ["Red Tee", "Blue Jeans"]
+    assert main.pipeline_metrics.snapshot()["extract_product_names"]["count"] == before + 1
+
+
+def test_events_arrive_in_order(monkeypatch):
+    chunks = ["<resp", "onse>Pair the [Red Tee]", " with [Blue Jeans].</response>"]
+
+    events = stream(monkeypatch, chunks)
+
+    names = [name for name, _ in events]
+    assert names[0] == "search_results"
+    assert names[-1] == "done"
+    first_product = names.index("product")
+    assert set(names[1:first_product]) == {"recommendation_chunk"}
+    assert names[first_product:-1] == ["product", "product"]
+    assert events[0][1]["query"] == "rewritten"
+    assert all("embedding" not in result for result in events[0][1]["results"])
+    text = "".join(data["text"] for name, data in events if name == "recommendation_chunk")
+    assert text == "Pair the [Red Tee] with [Blue Jeans]."
+    assert events[-1][1]["recommendation_text"] == text
+
+
+def test_incomplete_response_ends_with_error(monkeypatch):
+    events = stream(monkeypatch, ["<response>Try the [Red Tee]"])
+
+    assert events[-1] == ("error", {"detail": "No content found between <response> tags."})
+    assert "done" not in [name for name, _ in events]
+
+
+def test_no_search_results_is_an_error_event(monkeypatch):
+    events = stream(monkeypatch, [], results=[])
+
+    assert events == [("error", {"detail": "No matching products found"})]
+
+
+def test_llm_failure_is_an_error_event(monkeypatch):
+    async def failing(client, prompt, *args, **kwargs):
+        yield "<response>Try"
+        raise RuntimeError("throttled")
+
+    events = stream(monkeypatch, [], llm=failing)
+
+    assert events[-1] == ("error", {"detail": "throttled"})
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pymongo import DeleteMany, ReplaceOne
+
+from utils.embeddings import FashionEmbeddingManager
+
+
+class FakeModel:
+    def encode(self, texts, batch_size=32):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class FakeCollection:
+    """Applies ReplaceOne/DeleteMany in memory; fails the batch numbers in `fail_batches` once each."""
+
+    def __init__(self, fail_batches=()):
+        self.documents = {}
+        self.fail_batches = set(fail_batches)
+        self.writes = 0
+
+    def find(self, query, projection):
+        return [{"_id": _id, "content_hash": doc["content_hash"]} for _id, doc in self.documents.items()]
+
+    def bulk_write(self, requests, ordered=True):
+        if all(isinstance(request, ReplaceOne) for request in requests):
+            self.writes += 1
+            if self.writes in self.fail_batches:
+                self.fail_batches.discard(self.writes)
+                raise ConnectionError("connection reset")
+        for request in requests:
+            if isinstance(request, ReplaceOne):
+                self.documents[request._filter["_id"]] = request._doc
+            elif isinstance(request, DeleteMany):
+                for _id in request._filter["_id"]["$in"]:
+                    self.documents.pop(_id, None)
+
+
+def catalog(ids, colour="Red"):
+    return pd.DataFrame({
+        "id": ids,
+        "gender": "Men",
+        "masterCategory": "Apparel",
+        "subCategory": "Topwear",
+        "articleType": "Tshirts",
+        "baseColour": colour,
+        "season": "Summer",
+        "year": 2012,
+        "usage": "Casual",
+        "productDisplayName": [f"Shirt {i}" for i in ids],
+    })
+
+
+@pytest.fixture
+def manager():
+    manager = object.__new__(FashionEmbeddingManager)
+    manager.model = FakeModel()
+    manager.collection = FakeCollection()
+    return manager
+
+
+def test_failed_batch_is_reported_and_retried_on_resume(manager, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    manager.collection.fail_batches = {2}
+    df = catalog(list(range(10)))
+
+    first = manager.sync_catalog(df, batch_size=4, queue_depth=1, checkpoint_path=str(checkpoint))
+    assert first["upserted"] + first["failed"] == 10
+    assert first["failed"] == 4
+    assert checkpoint.exists()
+
+    second = manager.sync_catalog(df, batch_size=4, queue_depth=1, checkpoint_path=str(checkpoint))
+    assert second == {"upserted": 10, "failed": 0, "deleted": 0, "unchanged": 0}
+    assert not checkpoint.exists()
+    assert sorted(manager.collection.documents) == [str(i) for i in range(10)]
+
+
+def test_only_changed_rows_are_upserted_and_removed_rows_deleted(manager, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    manager.sync_catalog(catalog(list(range(6))), batch_size=4, checkpoint_path=checkpoint)
+
+    updated = catalog(list(range(1, 7)))
+    updated.loc[updated["id"] == 3, "baseColour"] = "Blue"
+    summary = manager.sync_catalog(updated, batch_size=4, checkpoint_path=checkpoint)
+
+    assert summary == {"upserted": 2, "failed": 0, "deleted": 1, "unchanged": 4}
+    assert sorted(manager.collection.documents) == [str(i) for i in range(1, 7)]
+    assert manager.collection.documents["3"]["metadata"]["baseColour"] == "Blue"
+
+
+def test_generate_embeddings_handles_repeated_index_labels(manager):
+    df = pd.concat([catalog([1, 2]), catalog([3, 4], colour="Blue")])
+    assert df.index.tolist() == [0, 1, 0, 1]
+
+    stats = manager.generate_embeddings(df, batch_size=3, upsert=True)
+
+    assert stats["encode"].rows == stats["upload"].rows == 4
+    documents = manager.collection.documents
+    assert sorted(documents) == ["1", "2", "3", "4"]
+    assert documents["3"]["metadata"]["baseColour"] == "Blue"
+    assert documents["1"]["metadata"]["productDisplayName"] == "Shirt 1"
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from cache import url_cache
+from cache.url_cache import ProductUrlCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(url_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ProductUrlCache(str(tmp_path / "urls.sqlite3"), ttl=100, max_stale=1000)
+    yield cache
+    cache.close()
+
+
+def test_entries_are_fresh_then_stale_then_expired(cache, clock):
+    cache.set("Red Shirt", "https://shop.test/red-shirt")
+
+    assert cache.get("red  shirt!") == ("https://shop.test/red-shirt", True)
+    clock.now += 150
+    assert cache.get("Red Shirt") == ("https://shop.test/red-shirt", False)
+    clock.now += 1000
+    assert cache.get("Red Shirt") == (None, False)
+    assert cache.stats()["stale_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_disk_tier_is_shared_between_instances(cache, tmp_path):
+    cache.set("Blue Jeans", "https://shop.test/blue-jeans")
+    other = ProductUrlCache(str(tmp_path / "urls.sqlite3"), ttl=100)
+
+    assert other.get("Blue Jeans") == ("https://shop.test/blue-jeans", True)
+    assert other.stats()["disk_hits"] == 1
+    assert other.get("Blue Jeans")[0] and other.stats()["memory_hits"] == 1
+    other.close()
+
+
+def test_stale_entries_are_refreshed_once_in_the_background(cache, clock):
+    cache.set("Red Shirt", "https://shop.test/old")
+    clock.now += 150
+    calls = []
+
+    async def fetch_many(names):
+        calls.append(list(names))
+        await asyncio.sleep(0)
+        return [f"https://shop.test/new/{name}" for name in names]
+
+    async def refresh():
+        cache.refresh_in_background(["Red Shirt"], fetch_many)
+        cache.refresh_in_background(["Red Shirt"], fetch_many)
+        await asyncio.gather(*cache._tasks)
+
+    asyncio.run(refresh())
+
+    assert calls == [["Red Shirt"]]
+    assert cache.get("Red Shirt") == ("https://shop.test/new/Red Shirt", True)
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_disk_tier_is_trimmed_to_the_newest_entries(tmp_path, clock):
+    cache = ProductUrlCache(str(tmp_path / "urls.sqlite3"), max_memory_entries=1, max_disk_entries=2, prune_every=1)
+    for i in range(4):
+        clock.now += 1
+        cache.set(f"item {i}", f"https://shop.test/{i}")
+
+    (count,) = cache._conn.execute("SELECT COUNT(*) FROM product_urls").fetchone()
+    assert count == 2
+    assert cache.get("item 0") == (None, False)
+    assert cache.get("item 2")[0] == "https://shop.test/2"
+    cache.close()
@@ -0,0 +1,99 @@
+import copy
+
+import pandas as pd
+import pytest
+
+from agents.query_rewriter import LexicalQueryRewriter
+from common.resources import ResourceRegistry
+from data.filters import VALID_FILTERS, default_matcher, pushdown_matcher
+from data.vocabulary import (
+    SCHEMA_VERSION,
+    apply_vocabulary,
+    article_hierarchy_from_vocabulary,
+    build_vocabulary,
+    load_vocabulary,
+    save_vocabulary,
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_filters():
+    original = copy.deepcopy(VALID_FILTERS)
+    yield
+    VALID_FILTERS.clear()
+    VALID_FILTERS.update(original)
+    default_matcher.cache_clear()
+    pushdown_matcher.cache_clear()
+
+
+def catalog():
+    return pd.DataFrame({
+        "gender": ["Men", "Men", "Women", "Women", "Women"],
+        "masterCategory": ["Apparel", "Apparel", "Apparel", "Footwear", "Apparel"],
+        "subCategory": ["Topwear", "Topwear", "Topwear", "Shoes", "Bottomwear"],
+        "articleType": ["Tshirts", "Tshirts", "Tshirts", "Heels", "Tshirts"],
+        "baseColour": ["Red", "Red", "Blue", None, "Red"],
+    })
+
+
+def test_artifact_round_trips_and_versions_the_catalog(tmp_path):
+    path = str(tmp_path / "vocabulary.json")
+    built = build_vocabulary(catalog())
+    save_vocabulary(built, path)
+
+    loaded = load_vocabulary(path)
+
+    assert loaded == built
+    assert loaded["fields"]["baseColour"] == {"Red": 3, "Blue": 1}
+    assert list(loaded["fields"]["gender"]) == ["Women", "Men"]
+    assert article_hierarchy_from_vocabulary(loaded) == {
+        "Tshirts": ("Apparel", "Topwear"), "Heels": ("Footwear", "Shoes")
+    }
+    assert loaded["tree"]["Women"]["Apparel"] == {"Bottomwear": ["Tshirts"], "Topwear": ["Tshirts"]}
+    assert build_vocabulary(catalog())["catalog_version"] == built["catalog_version"]
+    assert build_vocabulary(catalog().iloc[1:])["catalog_version"] != built["catalog_version"]
+
+
+def test_older_schema_is_refused(tmp_path):
+    path = str(tmp_path / "vocabulary.json")
+    save_vocabulary({**build_vocabulary(catalog()), "schema_version": SCHEMA_VERSION - 1}, path)
+
+    with pytest.raises(ValueError, match="schema version"):
+        load_vocabulary(path)
+
+
+def test_apply_replaces_filter_lists_and_rebuilds_matchers():
+    apply_vocabulary(build_vocabulary(catalog()))
+
+    assert VALID_FILTERS["articleType"] == ["Tshirts", "Heels"]
+    assert default_matcher().match("red heels")[-1][2:] == ("articleType", "Heels")
+
+
+def vocabulary(version, articles):
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "catalog_version": version,
+        "generated_at": 0,
+        "rows": sum(articles.values()),
+        "fields": {"articleType": articles},
+        "hierarchy": {article: ["Apparel", "Topwear"] for article in articles},
+        "tree": {},
+    }
+
+
+def test_reload_rebuilds_lexical_rewriter(tmp_path):
+    path = str(tmp_path / "vocabulary.json")
+    save_vocabulary(vocabulary("v1", {"Tshirts": 5}), path)
+    registry = ResourceRegistry(vocabulary_path=path, vocabulary_check_interval=0.0)
+    registry.load_vocabulary()
+    rewriter = LexicalQueryRewriter(default_matcher(), registry._article_hierarchy(), min_coverage=0.5)
+    registry.lexical_rewriter = rewriter
+    assert rewriter.rewrite("ponchos") is None
+
+    save_vocabulary(vocabulary("v2", {"Tshirts": 5, "Ponchos": 3}), path)
+    registry._vocabulary_mtime = None
+
+    assert registry.reload_vocabulary_if_changed()
+    assert registry.catalog_version == "v2"
+    assert registry.lexical_rewriter is rewriter
+    assert rewriter.rewrite("ponchos") == "Looking for a Ponchos in the Apparel - Topwear category."
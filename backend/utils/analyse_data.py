@@ -1,89 +1,111 @@
+import csv
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set
+
+from data.vocabulary import build_vocabulary, save_vocabulary
 
 class FashionDataCleaner:
-    def __init__(self):
+    NUMERIC_COLUMNS = ('id', 'year')
+
+    def __init__(self, merge_column: str = 'productDisplayName'):
         self.data = None
         self.error_rows = []
-        
-    def load_and_clean_data(self, csv_path: str) -> pd.DataFrame:
+        # Unquoted commas almost always come from product names, so overflow
+        # fields are folded back into this column.
+        self.merge_column = merge_column
+
+    def _repair_fields(self, fields: List[str], expected_columns: int, merge_index: int) -> Optional[List[str]]:
+        """Fold overflow fields into the merge column, or pad short rows; linear in the row length"""
+        extra = len(fields) - expected_columns
+        if extra > 0:
+            merged = ','.join(fields[merge_index:merge_index + extra + 1])
+            return fields[:merge_index] + [merged] + fields[merge_index + extra + 1:]
+        if extra < 0:
+            return fields + [''] * -extra
+        return fields
+
+    def _to_frame(self, rows: List[List[str]], header: List[str]) -> pd.DataFrame:
+        chunk = pd.DataFrame(rows, columns=header).replace('', np.nan)
+        for column in self.NUMERIC_COLUMNS:
+            if column in chunk:
+                chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        return chunk
+
+    def iter_clean_chunks(self,
+                          csv_path: str,
+                          chunk_size: int = 10_000,
+                          rejects_path: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Stream the dataset in one pass, yielding cleaned DataFrame chunks of `chunk_size` rows.
+
+        Quoted fields are parsed by the csv module, rows with stray commas are
+        repaired in place and rows that cannot be keyed (no numeric id) are
+        written to `rejects_path` along with their line number.
+        """
+        self.error_rows = []
+        rejects_file = open(rejects_path, 'w', newline='', encoding='utf-8') if rejects_path else None
+        try:
+            rejects = csv.writer(rejects_file) if rejects_file else None
+            with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+                reader = csv.reader(file)
+                header = next(reader)
+                expected_columns = len(header)
+                merge_index = header.index(self.merge_column) if self.merge_column in header else expected_columns - 1
+                id_index = header.index('id') if 'id' in header else None
+                if rejects:
+                    rejects.writerow(['line_number', 'reason'] + header)
+
+                rows = []
+                for fields in reader:
+                    if not fields:
+                        continue
+                    if len(fields) != expected_columns:
+                        self.error_rows.append({
+                            'line_number': reader.line_num,
+                            'field_count': len(fields),
+                            'action': 'repaired',
+                        })
+                        fields = self._repair_fields(fields, expected_columns, merge_index)
+                    if id_index is not None and not fields[id_index].strip().isdigit():
+                        self.error_rows.append({
+                            'line_number': reader.line_num,
+                            'field_count': len(fields),
+                            'action': 'rejected',
+                        })
+                        if rejects:
+                            rejects.writerow([reader.line_num, 'invalid id'] + fields)
+                        continue
+                    rows.append(fields)
+                    if len(rows) >= chunk_size:
+                        yield self._to_frame(rows, header)
+                        rows = []
+                if rows:
+                    yield self._to_frame(rows, header)
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+    def load_and_clean_data(self,
+                            csv_path: str,
+                            chunk_size: int = 10_000,
+                            rejects_path: Optional[str] = None) -> pd.DataFrame:
         """Load and clean the fashion dataset, handling potential errors"""
         print("Loading data and checking for inconsistencies...")
-        
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            
-        # Get header
-        header = lines[0].strip().split(',')
-        expected_columns = len(header)
-        
 
-        clean_lines = [lines[0]]  # Start with header
-        for i, line in enumerate(lines[1:], 1):
-            fields = line.strip().split(',')
-            if len(fields) != expected_columns:
-                self.error_rows.append({
-                    'line_number': i + 1,
-                    'field_count': len(fields),
-                    'content': line.strip()
-                })
-                # Try to fix the line if possible
-                fixed_line = self._attempt_fix_line(line, expected_columns)
-                if fixed_line:
-                    clean_lines.append(fixed_line)
-            else:
-                clean_lines.append(line)
-        
-        # Create a temporary clean CSV
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as temp_file:
-            temp_file.writelines(clean_lines)
-            temp_path = temp_file.name
-            
-        # Read the clean CSV
-        try:
-            self.data = pd.read_csv(temp_path)
-            print(f"Successfully loaded {len(self.data)} rows of data")
-            
-            # Remove temporary file
-            import os
-            os.unlink(temp_path)
-            
-            # Print error summary
-            if self.error_rows:
-                print(f"\nFound {len(self.error_rows)} problematic rows:")
-                for err in self.error_rows[:5]:  # Show first 5 errors
-                    print(f"Line {err['line_number']}: Expected {expected_columns} fields, found {err['field_count']}")
-                if len(self.error_rows) > 5:
-                    print(f"... and {len(self.error_rows) - 5} more issues")
-                    
-            return self.data
-            
-        except Exception as e:
-            print(f"Error reading cleaned data: {str(e)}")
-            raise
-            
-    def _attempt_fix_line(self, line: str, expected_columns: int) -> str:
-        """Attempt to fix problematic lines"""
-        # Remove any quotes and split
-        fields = line.replace('"', '').strip().split(',')
-        
-        if len(fields) > expected_columns:
-            while len(fields) > expected_columns:
-                for i in range(len(fields) - 1):
-                    if i < len(fields) - 1:
-                        combined = fields[i] + ' ' + fields[i + 1]
-                        fields = fields[:i] + [combined] + fields[i+2:]
-                        if len(fields) == expected_columns:
-                            break
-                            
-        elif len(fields) < expected_columns:
-
-            fields.extend([''] * (expected_columns - len(fields)))
-            
-        return ','.join(fields) + '\n'
+        chunks = list(self.iter_clean_chunks(csv_path, chunk_size, rejects_path))
+        self.data = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        print(f"Successfully loaded {len(self.data)} rows of data")
+
+        # Print error summary
+        if self.error_rows:
+            print(f"\nFound {len(self.error_rows)} problematic rows:")
+            for err in self.error_rows[:5]:  # Show first 5 errors
+                print(f"Line {err['line_number']}: {err['action']} ({err['field_count']} fields)")
+            if len(self.error_rows) > 5:
+                print(f"... and {len(self.error_rows) - 5} more issues")
+
+        return self.data
 
 class FashionCategoryAnalyzer:
     def __init__(self):
@@ -110,27 +132,23 @@ class FashionCategoryAnalyzer:
         print("\nAnalyzing categories...")
         
         # First, check for any missing or invalid values
-        for column in self.data.columns:
-            missing = self.data[column].isnull().sum()
-            if missing > 0:
-                print(f"Found {missing} missing values in {column}")
+        missing = self.data.isnull().sum()
+        for column, count in missing[missing > 0].items():
+            print(f"Found {count} missing values in {column}")
                 
         # Analyze main category hierarchy
-        for _, row in self.data.iterrows():
-            try:
-                self.category_hierarchy[row['gender']][row['masterCategory']][row['subCategory']].add(row['articleType'])
-                if pd.notna(row['baseColour']):
-                    self.color_palette.add(row['baseColour'])
-                if pd.notna(row['season']):
-                    self.seasons.add(row['season'])
-                if pd.notna(row['usage']):
-                    self.usages.add(row['usage'])
-                if pd.notna(row['year']):
-                    self.years.add(row['year'])
-            except Exception as e:
-                print(f"Error processing row: {row}")
-                print(f"Error: {str(e)}")
-                
+        grouped = self.data.dropna(subset=['articleType']).groupby(['gender', 'masterCategory', 'subCategory'], observed=True)['articleType'].unique()
+        for (gender, master, sub), articles in grouped.items():
+            self.category_hierarchy[gender][master][sub].update(articles)
+        self.color_palette = set(self.data['baseColour'].dropna().unique())
+        self.seasons = set(self.data['season'].dropna().unique())
+        self.usages = set(self.data['usage'].dropna().unique())
+        self.years = set(self.data['year'].dropna().unique())
+
+    def build_vocabulary(self) -> Dict:
+        """Versioned filter vocabulary (hierarchy plus value frequencies) for serving"""
+        return build_vocabulary(self.data)
+
     def print_detailed_summary(self) -> None:
         """Print a detailed summary of the dataset"""
         print("\n=== Detailed Fashion Dataset Analysis ===")
@@ -159,6 +177,11 @@ def main():
         
         # Print detailed summary
         analyzer.print_detailed_summary()
+
+        # Export the filter vocabulary loaded by the API at startup
+        vocabulary = analyzer.build_vocabulary()
+        save_vocabulary(vocabulary, 'data/vocabulary.json')
+        print(f"\nWrote vocabulary {vocabulary['catalog_version']} for {vocabulary['rows']} rows to data/vocabulary.json")
         
     except Exception as e:
         print(f"Error in main: {str(e)}")
@@ -1,17 +1,52 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import logging
+import hashlib
 import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
 from tqdm import tqdm
-from typing import List, Dict, Any
-from pymongo import MongoClient
+from typing import Any, Callable, Dict, List, Optional
+from pymongo import DeleteMany, InsertOne, MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from cache.embedding_cache import EmbeddingCache
+from embedding.encoders import load_encoder
+from vector_store.base import VectorStore
+from vector_store.mongo_store import MongoVectorStore
+from vector_store.quantized_store import quantized_fields
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 DEFAULT_DIMENSION = 384
 DEFAULT_METRIC = 'cosine'
+DELETE_BATCH_SIZE = 1000
+
+def content_hash(text: str) -> str:
+    """Stable digest of an item's text representation, stored to detect changes."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+@dataclass
+class StageStats:
+    """Rows handled and busy time for one ingestion stage."""
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+
+    def add(self, rows: int, seconds: float) -> None:
+        self.rows += rows
+        self.seconds += seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.rows} rows in {self.seconds:.1f}s ({self.rows_per_second:.0f} rows/s)"
 
 class FashionEmbeddingManager:
     def __init__(self, 
@@ -19,9 +54,13 @@ class FashionEmbeddingManager:
                  db_name: str,
                  collection_name: str,
                  model_name: str = "all-MiniLM-L6-v2",
-                 dimension: int = DEFAULT_DIMENSION):
+                 dimension: int = DEFAULT_DIMENSION,
+                 embedding_cache_max_bytes: int = 16 * 1024 * 1024,
+                 vector_store: VectorStore = None,
+                 embedding_backend: str = "torch",
+                 onnx_model_dir: Optional[str] = None):
         """
-        Initialize the embedding manager with MongoDB and SentenceTransformer.
+        Initialize the embedding manager with MongoDB and a sentence encoder.
         
         Args:
             mongodb_conn_string: MongoDB connection string
@@ -29,10 +68,16 @@ class FashionEmbeddingManager:
             collection_name: Name of the MongoDB collection
             model_name: Name of the sentence transformer model
             dimension: Dimension of the embeddings
+            embedding_cache_max_bytes: Memory bound of the query embedding cache
+            vector_store: Store used by query_similar_items, defaults to the Mongo collection
+            embedding_backend: One of EMBEDDING_BACKENDS; the ONNX ones read an export from onnx_model_dir
+            onnx_model_dir: Directory written by `python -m embedding.onnx_encoder`
         """
-        self.model = SentenceTransformer(model_name)
+        self.model = load_encoder(model_name, backend=embedding_backend, onnx_model_dir=onnx_model_dir)
+        self.embedding_cache = EmbeddingCache(model_name, max_bytes=embedding_cache_max_bytes)
         self.client = MongoClient(mongodb_conn_string)
         self.collection = self.client[db_name][collection_name]
+        self.vector_store = vector_store or MongoVectorStore(self.collection)
         log.info(f"Connected to MongoDB collection: {db_name}.{collection_name}")
 
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -53,50 +98,260 @@ class FashionEmbeddingManager:
         Year: {row['year']}
         """
 
-    def generate_embeddings(self, df: pd.DataFrame, batch_size: int = 100):
+    def build_text_representations(self, df: pd.DataFrame) -> pd.Series:
+        """Column-wise `create_text_representation` for a whole frame.
+
+        `map(str)` matches the f-string's rendering of missing values exactly.
+        """
+        s = lambda column: df[column].map(str)
+        return (
+            "\n        Product: " + s('productDisplayName')
+            + "\n        Category: " + s('masterCategory') + " - " + s('subCategory') + " - " + s('articleType')
+            + "\n        Style: " + s('gender') + " " + s('usage') + " wear in " + s('baseColour') + " for " + s('season')
+            + "\n        Year: " + s('year')
+            + "\n        "
+        )
+
+    def build_metadata(self, df: pd.DataFrame, texts: pd.Series) -> pd.DataFrame:
+        """Columns of the `metadata` sub-document, one row per item."""
+        return pd.DataFrame({
+            "image_id": df['id'],
+            "text": texts,
+            "gender": df['gender'],
+            "masterCategory": df['masterCategory'],
+            "subCategory": df['subCategory'],
+            "articleType": df['articleType'],
+            "baseColour": df['baseColour'],
+            "season": df['season'],
+            "year": df['year'].map(str),
+            "usage": df['usage'],
+            "productDisplayName": df['productDisplayName'],
+        }, index=df.index)
+
+    def _upload_worker(self,
+                       uploads: queue.Queue,
+                       stats: Dict[str, StageStats],
+                       total_batches: int,
+                       upsert: bool,
+                       on_batch_uploaded: Optional[Callable[[int], None]]):
+        """Consumes encoded batches and writes them with unordered bulk writes."""
+        while True:
+            item = uploads.get()
+            if item is None:
+                return
+            batch_number, documents = item
+            start = time.perf_counter()
+            if upsert:
+                requests = [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in documents]
+            else:
+                requests = [InsertOne(d) for d in documents]
+            try:
+                self.collection.bulk_write(requests, ordered=False)
+                log.info(f"Successfully uploaded batch {batch_number}/{total_batches}")
+                if on_batch_uploaded is not None:
+                    on_batch_uploaded(batch_number)
+            except BulkWriteError as e:
+                written = e.details.get("nInserted", 0) + e.details.get("nUpserted", 0) + e.details.get("nModified", 0)
+                log.error(f"Batch {batch_number}: {len(documents) - written} documents failed to upload")
+            except Exception as e:
+                log.error(f"Error uploading batch {batch_number}: {e}")
+            stats["upload"].add(len(documents), time.perf_counter() - start)
+
+    def generate_embeddings(self,
+                            df: pd.DataFrame,
+                            batch_size: int = 100,
+                            queue_depth: int = 4,
+                            upsert: bool = False,
+                            skip_batches: int = 0,
+                            on_batch_uploaded: Optional[Callable[[int], None]] = None,
+                            quantization: Optional[str] = None) -> Dict[str, StageStats]:
         """
         Generate embeddings for the fashion items and upload to MongoDB in batches.
+
+        Text building is vectorized over the whole frame, rows are sorted by text
+        length so each encode batch pads as little as possible, and a background
+        thread uploads batch N while batch N+1 is being encoded.
         
         Args:
             df: DataFrame containing fashion items
             batch_size: Number of items to process in each batch
+            queue_depth: Encoded batches allowed to wait for upload before encoding blocks
+            upsert: Replace existing documents with the same `_id` instead of inserting
+            skip_batches: Number of leading batches already uploaded by an earlier run
+            on_batch_uploaded: Called with the batch number after each successful upload
+            quantization: Also store "int8" or "binary" codes next to each float vector
+
+        Returns:
+            Per-stage row counts, busy time and throughput
         """
+        stats = {name: StageStats(name) for name in ("prepare", "encode", "upload")}
         total_batches = len(df) // batch_size + (1 if len(df) % batch_size != 0 else 0)
-        
-        for i in tqdm(range(0, len(df), batch_size), 
-                     desc="Generating embeddings", 
-                     total=total_batches):
-            batch_df = df.iloc[i:i+batch_size]
-            texts = [self.create_text_representation(row) for _, row in batch_df.iterrows()]
-            
-            try:
-                embeddings = self.model.encode(texts)
-                documents = []
-                for j, (_, row) in enumerate(batch_df.iterrows()):
-                    document = {
-                        "_id": str(row['id']),
-                        "embedding": embeddings[j].tolist(),
-                        "metadata": {
-                            "image_id": row['id'],
-                            "text": texts[j],
-                            "gender": row['gender'],
-                            "masterCategory": row['masterCategory'],
-                            "subCategory": row['subCategory'],
-                            "articleType": row['articleType'],
-                            "baseColour": row['baseColour'],
-                            "season": row['season'],
-                            "year": str(row['year']),
-                            "usage": row['usage'],
-                            "productDisplayName": row['productDisplayName']
-                        }
-                    }
-                    documents.append(document)
-                
-                self.collection.insert_many(documents)
-                log.info(f"Successfully uploaded batch {i // batch_size + 1}/{total_batches}")
-            except Exception as e:
-                log.error(f"Error processing batch {i // batch_size + 1}: {e}")
-                continue
+
+        start = time.perf_counter()
+        # Concatenated or filtered frames can repeat index labels, which `.loc` would fan out.
+        df = df.reset_index(drop=True)
+        texts = self.build_text_representations(df)
+        order = texts.str.len().sort_values(kind="stable").index
+        texts = texts.loc[order]
+        frame = df.loc[order]
+        metadata = self.build_metadata(frame, texts)
+        ids = frame['id'].astype(str).tolist()
+        hashes = texts.map(content_hash).tolist()
+        stats["prepare"].add(len(df), time.perf_counter() - start)
+
+        uploads: queue.Queue = queue.Queue(maxsize=queue_depth)
+        uploader = threading.Thread(
+            target=self._upload_worker,
+            args=(uploads, stats, total_batches, upsert, on_batch_uploaded),
+            daemon=True
+        )
+        uploader.start()
+        try:
+            for i in tqdm(range(skip_batches * batch_size, len(df), batch_size),
+                         desc="Generating embeddings",
+                         total=total_batches - skip_batches):
+                batch_number = i // batch_size + 1
+                try:
+                    start = time.perf_counter()
+                    embeddings = self.model.encode(texts.iloc[i:i+batch_size].tolist(), batch_size=batch_size)
+                    stats["encode"].add(len(embeddings), time.perf_counter() - start)
+                    documents = [
+                        {"_id": _id, "embedding": embedding.tolist(), "content_hash": digest, "metadata": meta}
+                        for _id, embedding, digest, meta in zip(
+                            ids[i:i+batch_size],
+                            embeddings,
+                            hashes[i:i+batch_size],
+                            metadata.iloc[i:i+batch_size].to_dict("records"),
+                        )
+                    ]
+                    if quantization:
+                        for document, fields in zip(documents, quantized_fields(embeddings, quantization)):
+                            document.update(fields)
+                    uploads.put((batch_number, documents))
+                except Exception as e:
+                    log.error(f"Error processing batch {batch_number}: {e}")
+                    continue
+        finally:
+            uploads.put(None)
+            uploader.join()
+
+        for stage in stats.values():
+            log.info(str(stage))
+        return stats
+
+    def _save_checkpoint(self, path: str, checkpoint: Dict[str, Any]) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+    def _plan_sync(self, ids: pd.Series, hashes: pd.Series) -> Dict[str, Any]:
+        """Diffs the catalog against the stored content hashes."""
+        stored = {
+            doc["_id"]: doc.get("content_hash")
+            for doc in self.collection.find({}, {"content_hash": 1})
+        }
+        current = dict(zip(ids, hashes))
+        return {
+            "pending_ids": [i for i, digest in current.items() if stored.get(i) != digest],
+            "removed_ids": sorted(set(stored) - set(current)),
+            "deleted": False,
+            "completed_batches": 0,
+        }
+
+    def sync_catalog(self,
+                     df: pd.DataFrame,
+                     batch_size: int = 100,
+                     queue_depth: int = 4,
+                     checkpoint_path: str = "ingest_checkpoint.json",
+                     quantization: Optional[str] = None) -> Dict[str, int]:
+        """
+        Incrementally bring the collection in line with the catalog.
+
+        Only new or changed rows (by content hash of their text representation)
+        are re-encoded and upserted, and rows no longer in the catalog are
+        deleted. Progress is checkpointed after every uploaded batch, so a
+        crashed run over the same catalog resumes where it stopped.
+
+        Args:
+            df: DataFrame containing fashion items
+            batch_size: Number of items to process in each batch
+            queue_depth: Encoded batches allowed to wait for upload
+            checkpoint_path: File recording the sync plan and progress
+            quantization: Also store "int8" or "binary" codes next to each float vector
+
+        Returns:
+            Counts of upserted, failed, deleted and unchanged rows; `failed` rows
+            were in batches Mongo did not acknowledge and are retried on resume
+        """
+        ids = df['id'].astype(str)
+        hashes = self.build_text_representations(df).map(content_hash)
+        catalog_digest = content_hash("\n".join(sorted(ids + ":" + hashes)))
+
+        checkpoint = None
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("catalog_digest") != catalog_digest or checkpoint.get("batch_size") != batch_size:
+                log.info("Catalog changed since the last checkpoint, planning a fresh sync")
+                checkpoint = None
+            else:
+                log.info(f"Resuming sync after {checkpoint['completed_batches']} batches")
+        if checkpoint is None:
+            checkpoint = self._plan_sync(ids, hashes)
+            checkpoint.update(catalog_digest=catalog_digest, batch_size=batch_size)
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+        removed = checkpoint["removed_ids"]
+        if removed and not checkpoint["deleted"]:
+            self.collection.bulk_write([
+                DeleteMany({"_id": {"$in": removed[i:i+DELETE_BATCH_SIZE]}})
+                for i in range(0, len(removed), DELETE_BATCH_SIZE)
+            ], ordered=False)
+            checkpoint["deleted"] = True
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+        uploaded = set()
+
+        def on_batch_uploaded(batch_number: int) -> None:
+            # Only advance over a contiguous run, so a failed batch is retried on resume.
+            uploaded.add(batch_number)
+            while checkpoint["completed_batches"] + 1 in uploaded:
+                checkpoint["completed_batches"] += 1
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+        pending = checkpoint["pending_ids"]
+        resumed_batches = checkpoint["completed_batches"]
+        self.generate_embeddings(
+            df[ids.isin(set(pending))],
+            batch_size=batch_size,
+            queue_depth=queue_depth,
+            upsert=True,
+            skip_batches=resumed_batches,
+            on_batch_uploaded=on_batch_uploaded,
+            quantization=quantization,
+        )
+
+        total_batches = -(-len(pending) // batch_size)
+        if checkpoint["completed_batches"] >= total_batches:
+            os.remove(checkpoint_path)
+        else:
+            log.warning(f"Sync incomplete, checkpoint kept at {checkpoint_path}")
+
+        # Batches acknowledged by Mongo, in this run or the one it resumed.
+        acknowledged = uploaded | set(range(1, resumed_batches + 1))
+        upserted = sum(
+            min(batch_size, len(pending) - (batch_number - 1) * batch_size)
+            for batch_number in acknowledged
+        )
+        summary = {
+            "upserted": upserted,
+            "failed": len(pending) - upserted,
+            "deleted": len(removed),
+            "unchanged": len(df) - len(pending),
+        }
+        log.info(f"Catalog sync finished: {summary}")
+        return summary
 
     def query_similar_items(self, 
                             query_text: str, 
@@ -114,23 +369,8 @@ class FashionEmbeddingManager:
             List of search results
         """
         try:
-            query_embedding = self.model.encode(query_text).tolist()
-            pipeline = [
-                {
-                    "$search": {
-                        "knnBeta": {
-                            "vector": query_embedding,
-                            "path": "embedding",
-                            "k": n_results
-                        }
-                    }
-                }
-            ]
-            if filter_dict:
-                pipeline[0]["$search"]["knnBeta"]["filter"] = filter_dict
-
-            results = list(self.collection.aggregate(pipeline))
-            return results
+            query_embedding = self.embedding_cache.encode(self.model, [query_text])[0]
+            return self.vector_store.search(query_embedding, k=n_results, filters=filter_dict)
         except Exception as e:
             log.error(f"Error querying similar items: {e}")
             return []
@@ -152,16 +392,18 @@ def main():
         mongodb_conn_string=mongodb_conn_string,
         db_name=db_name,
         collection_name=collection_name,
-        model_name=model_name
+        model_name=model_name,
+        embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+        onnx_model_dir=os.getenv("ONNX_MODEL_DIR")
     )
 
     # Clean the data
     log.info("Cleaning data...")
     df_cleaned = embedding_manager.clean_data(df)
 
-    # Generate and store embeddings
-    log.info("Generating and storing embeddings...")
-    embedding_manager.generate_embeddings(df_cleaned)
+    # Generate and store embeddings for new or changed items only
+    log.info("Syncing embeddings with the catalog...")
+    embedding_manager.sync_catalog(df_cleaned)
 
     # Example query
     log.info("Testing with example query...")
@@ -0,0 +1,238 @@
+"""Inventory, diff and sync of catalog vectors between Mongo and Pinecone.
+
+Mongo is the source of truth. Each side's ids (and, optionally, content hashes)
+are streamed to a sorted JSONL inventory, the two inventories are merged in one
+pass into a JSONL diff, and the diff is applied with batched upserts and
+deletes. Every step streams, so memory stays flat however large the index is.
+
+Run from the backend directory:
+    python -m utils.index_sync --index fashion --workdir .cache/index_sync --apply
+"""
+
+import argparse
+import heapq
+import json
+import os
+import tempfile
+import typing as t
+
+from common import logger
+from common.constants import _MONGODB_COLLECTION_NAME, _MONGODB_CONN_STRING, _MONGODB_DB_NAME
+from utils.pinecone_utils import ChunkReport, bulk_upsert, delete_ids, iter_ids
+
+log = logger.create_logger()
+
+# Inventory lines are {"id": ..., "hash": ...}; hash is None when not compared.
+Entry = tuple[str, t.Optional[str]]
+
+_SORT_RUN_SIZE = 100_000
+
+
+def _write_entries(entries: t.Iterable[Entry], path: str) -> tuple[int, bool]:
+    """Writes entries as JSONL, returning the count and whether ids arrived sorted."""
+    count, in_order, previous = 0, True, None
+    with open(path, "w", encoding="utf-8") as f:
+        for vector_id, digest in entries:
+            if previous is not None and vector_id < previous:
+                in_order = False
+            previous = vector_id
+            f.write(json.dumps({"id": vector_id, "hash": digest}) + "\n")
+            count += 1
+    return count, in_order
+
+
+def read_inventory(path: str) -> t.Iterator[Entry]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            yield entry["id"], entry.get("hash")
+
+
+def _sort_inventory(path: str, run_size: int = _SORT_RUN_SIZE) -> None:
+    """External merge sort by id: sorted runs on disk, then one heap merge."""
+    runs = []
+    try:
+        entries = read_inventory(path)
+        while True:
+            run = sorted((entry for _, entry in zip(range(run_size), entries)), key=lambda entry: entry[0])
+            if not run:
+                break
+            fd, run_path = tempfile.mkstemp(suffix=".jsonl", dir=os.path.dirname(path) or ".")
+            os.close(fd)
+            _write_entries(run, run_path)
+            runs.append(run_path)
+        tmp_path = f"{path}.sorted"
+        _write_entries(heapq.merge(*(read_inventory(run) for run in runs), key=lambda entry: entry[0]), tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        for run_path in runs:
+            os.remove(run_path)
+
+
+def write_inventory(entries: t.Iterable[Entry], path: str) -> int:
+    """Streams entries to a JSONL inventory sorted by id, sorting on disk if needed."""
+    count, in_order = _write_entries(entries, path)
+    if not in_order:
+        _sort_inventory(path)
+    log.info(f"Wrote {count} ids to {path}")
+    return count
+
+
+def iter_mongo_entries(collection, with_hashes: bool = True, batch_size: int = 1000) -> t.Iterator[Entry]:
+    """Ids in `_id` order (served from the `_id` index) with their content hashes."""
+    projection = {"content_hash": 1} if with_hashes else {"_id": 1}
+    cursor = collection.find({}, projection, batch_size=batch_size).sort("_id", 1)
+    for doc in cursor:
+        yield str(doc["_id"]), doc.get("content_hash") if with_hashes else None
+
+
+def iter_pinecone_entries(
+    index, namespace: str = "", with_hashes: bool = True, page_size: int = 100
+) -> t.Iterator[Entry]:
+    """Ids from the list endpoint, with hashes fetched from metadata one page at a time."""
+    for page in iter_ids(index, namespace, page_size=page_size):
+        if not with_hashes:
+            yield from ((vector_id, None) for vector_id in page)
+            continue
+        vectors = index.fetch(ids=page, namespace=namespace)["vectors"]
+        for vector_id in page:
+            metadata = (vectors.get(vector_id) or {}).get("metadata") or {}
+            yield vector_id, metadata.get("content_hash")
+
+
+def diff_inventories(source_path: str, target_path: str) -> t.Iterator[dict[str, str]]:
+    """Sorted merge of two inventories into upsert/delete operations on the target.
+
+    Ids only in the source, or whose hashes differ, are upserted; ids only in
+    the target are deleted.
+    """
+    source, target = read_inventory(source_path), read_inventory(target_path)
+    left, right = next(source, None), next(target, None)
+    while left is not None or right is not None:
+        if right is None or (left is not None and left[0] < right[0]):
+            yield {"op": "upsert", "id": left[0]}
+            left = next(source, None)
+        elif left is None or right[0] < left[0]:
+            yield {"op": "delete", "id": right[0]}
+            right = next(target, None)
+        else:
+            if left[1] != right[1]:
+                yield {"op": "upsert", "id": left[0]}
+            left, right = next(source, None), next(target, None)
+
+
+def write_diff(source_path: str, target_path: str, diff_path: str) -> dict[str, int]:
+    counts = {"upsert": 0, "delete": 0}
+    with open(diff_path, "w", encoding="utf-8") as f:
+        for operation in diff_inventories(source_path, target_path):
+            counts[operation["op"]] += 1
+            f.write(json.dumps(operation) + "\n")
+    log.info(f"Diff written to {diff_path}: {counts}")
+    return counts
+
+
+def _read_ops(diff_path: str, op: str) -> t.Iterator[str]:
+    with open(diff_path, encoding="utf-8") as f:
+        for line in f:
+            operation = json.loads(line)
+            if operation["op"] == op:
+                yield operation["id"]
+
+
+def _pinecone_metadata(doc: dict[str, t.Any]) -> dict[str, t.Any]:
+    """Pinecone rejects null metadata values, so those are dropped."""
+    metadata = {key: value for key, value in (doc.get("metadata") or {}).items() if value is not None}
+    if doc.get("content_hash"):
+        metadata["content_hash"] = doc["content_hash"]
+    return metadata
+
+
+def _iter_vectors(collection, ids: t.Iterable[str], batch_size: int = 500) -> t.Iterator[dict[str, t.Any]]:
+    """Looks up Mongo documents for `ids` a batch at a time, as Pinecone vectors."""
+    projection = {"embedding": 1, "metadata": 1, "content_hash": 1}
+    batch: list[str] = []
+
+    def lookup(batch_ids: list[str]) -> t.Iterator[dict[str, t.Any]]:
+        for doc in collection.find({"_id": {"$in": batch_ids}}, projection):
+            yield {"id": str(doc["_id"]), "values": doc["embedding"], "metadata": _pinecone_metadata(doc)}
+
+    for vector_id in ids:
+        batch.append(vector_id)
+        if len(batch) >= batch_size:
+            yield from lookup(batch)
+            batch = []
+    if batch:
+        yield from lookup(batch)
+
+
+def apply_diff(
+    diff_path: str,
+    collection,
+    index,
+    namespace: str = "",
+    chunk_size: int = 100,
+    max_workers: int = 4,
+) -> dict[str, t.Any]:
+    """Brings the index in line with Mongo: streamed bulk upserts, then batched deletes."""
+    reports: list[ChunkReport] = bulk_upsert(
+        index,
+        _iter_vectors(collection, _read_ops(diff_path, "upsert")),
+        namespace=namespace,
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+    )
+    deleted = delete_ids(index, _read_ops(diff_path, "delete"), namespace=namespace)
+    return {
+        "upserted": sum(report.vectors for report in reports if report.ok),
+        "failed_chunks": [report.chunk for report in reports if not report.ok],
+        "deleted": deleted,
+    }
+
+
+def sync(
+    collection,
+    index,
+    workdir: str,
+    namespace: str = "",
+    with_hashes: bool = True,
+    apply: bool = False,
+) -> dict[str, t.Any]:
+    """Inventories both sides into `workdir`, diffs them and optionally applies the diff."""
+    os.makedirs(workdir, exist_ok=True)
+    mongo_path = os.path.join(workdir, "mongo_ids.jsonl")
+    pinecone_path = os.path.join(workdir, "pinecone_ids.jsonl")
+    diff_path = os.path.join(workdir, "diff.jsonl")
+
+    summary: dict[str, t.Any] = {
+        "mongo": write_inventory(iter_mongo_entries(collection, with_hashes), mongo_path),
+        "pinecone": write_inventory(iter_pinecone_entries(index, namespace, with_hashes), pinecone_path),
+    }
+    summary["diff"] = write_diff(mongo_path, pinecone_path, diff_path)
+    if apply:
+        summary["applied"] = apply_diff(diff_path, collection, index, namespace=namespace)
+    log.info(f"Index sync: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index", required=True, help="Pinecone index name")
+    parser.add_argument("--namespace", default="")
+    parser.add_argument("--workdir", default=".cache/index_sync")
+    parser.add_argument("--ids-only", action="store_true", help="Skip the content hash comparison")
+    parser.add_argument("--apply", action="store_true", help="Apply the diff instead of only writing it")
+    args = parser.parse_args()
+
+    from common.resources import init_mongodb
+    from utils.pinecone_utils import initialize_index
+
+    collection = init_mongodb(_MONGODB_CONN_STRING, _MONGODB_DB_NAME, _MONGODB_COLLECTION_NAME)
+    index = initialize_index(args.index)
+    print(json.dumps(
+        sync(collection, index, args.workdir, args.namespace, not args.ids_only, args.apply),
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
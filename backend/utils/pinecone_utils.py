@@ -1,7 +1,12 @@
 """Contains the logic to interact with the Pinecone vector database."""
 
+import json
 import os
+import random
+import time
 import typing as t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pinecone import Pinecone, ServerlessSpec
 
 from common import logger
@@ -12,6 +17,12 @@ log = logger.create_logger()
 _DEFAULT_DIMENSION = 384
 _DEFAULT_METRIC = "cosine"
 
+# Pinecone rejects upsert requests over 1000 vectors or 2MB.
+_MAX_VECTORS_PER_REQUEST = 1000
+_MAX_REQUEST_BYTES = 2 * 1024 * 1024
+# Chunk against a lower bound, since request size is only estimated.
+_SAFE_REQUEST_BYTES = int(_MAX_REQUEST_BYTES * 0.9)
+
 
 def initialize_index(
     index_name: str, dimension: int = _DEFAULT_DIMENSION, metric: str = _DEFAULT_METRIC
@@ -46,16 +57,24 @@ def fetch_matching_vectors_metadata(
     similarity_threshold: float = 0.9,
     apply_threshold: bool = True,
     filters: t.Optional[dict[str, t.Any]] = None,
+    namespace: str = "",
+    include_values: bool = False,
 ) -> list[dict]:
-    """Fetches the matching metadata."""
+    """Fetches the matching metadata, and the stored vectors as "embedding" if `include_values`."""
     similar_queries = index.query(
-        vector=query_embedding, top_k=top_k, include_metadata=True, filter=filters
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True,
+        include_values=include_values,
+        filter=filters,
+        namespace=namespace,
     )
     similar_vectors_metadata = [
         {
             "id": match["id"],
             "score": match["score"],
             "metadata": match.get("metadata", dict()),
+            **({"embedding": match["values"]} if match.get("values") else {}),
         }
         for match in similar_queries["matches"]
     ]
@@ -93,82 +112,186 @@ def upsert_single_vector(
 
 def upsert_multiple_vector(
     index: Pinecone.Index,
-    vectors: list[dict[str, t.Any]],
+    vectors: t.Iterable[dict[str, t.Any]],
+    namespace: str = "",
 ) -> None:
     """Upserts multiple vectors to pinecone index."""
-    try:
-        response = index.upsert(vectors=vectors)
-        log.info(f"Ingested multiple vectors with response: `{response}`")
-    except Exception as e:
-        log.error(f"Error upserting multiple vectors to pinecone - {e}")
-
-
-# def fetch_all_ids(index: Pinecone.Index, namespace: str = "") -> list[str]:
-#     """Fetches all the ingested ids for an index."""
-#     try:
-#         index_stats = index.describe_index_stats()
-#         namespaces_metadata = index_stats["namespaces"]
-#         if (
-#             index_stats["total_vector_count"] > 0
-#             and namespace in namespaces_metadata.keys()
-#         ):
-#             vector_count = namespaces_metadata[namespace]["vector_count"]
-#             dimension = index_stats["dimension"]
-#             all_vectors = index.query(
-#                 vector=[0] * dimension, top_k=vector_count, include_metadata=False
-#             )
-#             ids = [vector["id"] for vector in all_vectors["matches"]]
-#             log.info(f"Found {len(ids)} in index.")
-#             return ids
-#     except Exception as e:
-#         log.error(f"Error in reading all vector ids: `{e}`")
-#     return []
-import json
-import logging
-from pinecone import Index
+    reports = bulk_upsert(index, vectors, namespace=namespace)
+    failed = [report for report in reports if not report.ok]
+    upserted = sum(report.vectors for report in reports if report.ok)
+    log.info(f"Ingested {upserted} vectors in {len(reports)} chunks")
+    for report in failed:
+        log.error(f"Chunk {report.chunk} ({report.vectors} vectors) failed: {report.error}")
+
+
+@dataclass
+class ChunkReport:
+    """Outcome of one upsert request."""
+    chunk: int
+    vectors: int
+    attempts: int = 0
+    seconds: float = 0.0
+    error: t.Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
-# Initialize logger
-logging.basicConfig(level=logging.INFO)
-log = logging.getLogger(__name__)
+def _vector_id(vector: t.Any) -> str:
+    return vector["id"] if isinstance(vector, dict) else vector[0]
+
+
+def _estimated_bytes(vector: t.Any) -> int:
+    """Rough request size of one vector: JSON-encoded floats, id and metadata."""
+    if isinstance(vector, dict):
+        values, metadata = vector.get("values", ()), vector.get("metadata")
+    else:
+        values, metadata = vector[1], vector[2] if len(vector) > 2 else None
+    size = 22 * len(values) + len(_vector_id(vector)) + 32
+    if metadata:
+        size += len(json.dumps(metadata, default=str))
+    return size
+
+
+def chunk_vectors(
+    vectors: t.Iterable[t.Any],
+    max_vectors: int = 100,
+    max_bytes: int = _SAFE_REQUEST_BYTES,
+) -> t.Iterator[list[t.Any]]:
+    """Lazily groups vectors into chunks under both the count and the byte limit."""
+    max_vectors = min(max_vectors, _MAX_VECTORS_PER_REQUEST)
+    chunk, chunk_bytes = [], 0
+    for vector in vectors:
+        size = _estimated_bytes(vector)
+        if chunk and (len(chunk) >= max_vectors or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(vector)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors other than rate limiting will fail the same way again."""
+    status = getattr(error, "status", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+
+def _upsert_chunk(
+    index: Pinecone.Index,
+    chunk_number: int,
+    chunk: list[t.Any],
+    namespace: str,
+    max_retries: int,
+    backoff: float,
+) -> ChunkReport:
+    report = ChunkReport(chunk=chunk_number, vectors=len(chunk))
+    start = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        report.attempts = attempt + 1
+        try:
+            index.upsert(vectors=chunk, namespace=namespace)
+            report.error = None
+            break
+        except Exception as e:
+            report.error = str(e)
+            if attempt == max_retries or not _is_retryable(e):
+                break
+            # Exponential backoff with jitter so retries from parallel workers spread out.
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+    report.seconds = time.perf_counter() - start
+    return report
 
-def fetch_all_ids(index: Index, namespace: str = "") -> list[str]:
+
+def bulk_upsert(
+    index: Pinecone.Index,
+    vectors: t.Iterable[t.Any],
+    namespace: str = "",
+    chunk_size: int = 100,
+    max_request_bytes: int = _SAFE_REQUEST_BYTES,
+    max_workers: int = 4,
+    max_in_flight: t.Optional[int] = None,
+    max_retries: int = 3,
+    backoff: float = 0.5,
+) -> list[ChunkReport]:
+    """Upserts `vectors` in request-size-safe chunks on a bounded thread pool.
+
+    `vectors` may be any iterable, including a generator over the whole catalog:
+    chunks are pulled only as workers free up, so at most `max_in_flight` chunks
+    are held in memory. Failed chunks are retried with exponential backoff, and
+    every chunk gets a report, in chunk order.
     """
-    Fetches all the ingested IDs for an index and saves them to a JSON file.
-    
-    Args:
-        index (Index): Pinecone index object.
-        namespace (str): Namespace to filter vectors by.
-    
-    Returns:
-        list[str]: List of IDs.
+    max_in_flight = max_in_flight or 2 * max_workers
+    chunks = chunk_vectors(vectors, chunk_size, max_request_bytes)
+    reports: list[ChunkReport] = []
+    pending: set[Future] = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_number, chunk in enumerate(chunks, 1):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                reports.extend(future.result() for future in done)
+            pending.add(executor.submit(
+                _upsert_chunk, index, chunk_number, chunk, namespace, max_retries, backoff
+            ))
+        reports.extend(future.result() for future in wait(pending).done)
+
+    reports.sort(key=lambda report: report.chunk)
+    failed = sum(1 for report in reports if not report.ok)
+    retried = sum(1 for report in reports if report.attempts > 1)
+    log.info(
+        f"Bulk upsert: {sum(r.vectors for r in reports if r.ok)} vectors in {len(reports)} chunks, "
+        f"{retried} retried, {failed} failed"
+    )
+    return reports
+
+
+def iter_ids(index: Pinecone.Index, namespace: str = "", page_size: int = 100) -> t.Iterator[list[str]]:
+    """Yields pages of vector ids through the paginated list endpoint (serverless indexes)."""
+    for page in index.list(namespace=namespace, limit=page_size):
+        if page:
+            yield list(page)
+
+
+def fetch_all_ids(
+    index: Pinecone.Index,
+    namespace: str = "",
+    json_file_name: t.Optional[str] = None,
+) -> list[str]:
+    """Fetches all the ingested ids for an index, optionally saving them to a JSON file.
+
+    For large indexes, stream `iter_ids` instead of holding the list.
     """
     try:
-        # index_stats = index.describe_index_stats()
-        # namespaces_metadata = "default"
-        
-        # vector_count = namespaces_metadata[namespace].get("vector_count", 0)
-            # dimension = index_stats["dimension"]
-        dimension = 384
-        all_vectors = index.query(
-            vector=[0] * dimension, top_k=vector_count, include_metadata=True
-        )
-        ids = [vector["id"] for vector in all_vectors.get("matches", [])]
-            
-        log.info(f"Found {len(ids)} IDs in index.")
-
-            # Save IDs to a JSON file
-        json_file_name = f"vector_ids_default.json"
+        ids = [vector_id for page in iter_ids(index, namespace) for vector_id in page]
+    except Exception as e:
+        log.error(f"Error in reading all vector ids: `{e}`")
+        return []
+    log.info(f"Found {len(ids)} ids in index.")
+    if json_file_name:
         with open(json_file_name, "w") as json_file:
             json.dump(ids, json_file, indent=4)
-        log.info(f"Exported IDs to `{json_file_name}`.")
-            
-        return ids
-    except Exception as e:
-        log.error(f"Error in reading all vector IDs: `{e}`")
-    return []
+        log.info(f"Exported ids to `{json_file_name}`.")
+    return ids
 
 
-
-def delete_ids(index: Pinecone.Index, vector_ids: list[str], namespace: str = ""):
-    """Deletes the vector ids from specific index."""
-    index.delete(ids=vector_ids, namespace=namespace)
\ No newline at end of file
+def delete_ids(
+    index: Pinecone.Index,
+    vector_ids: t.Iterable[str],
+    namespace: str = "",
+    batch_size: int = _MAX_VECTORS_PER_REQUEST,
+) -> int:
+    """Deletes the vector ids from specific index, in request-sized batches."""
+    deleted = 0
+    batch: list[str] = []
+    for vector_id in vector_ids:
+        batch.append(vector_id)
+        if len(batch) >= batch_size:
+            index.delete(ids=batch, namespace=namespace)
+            deleted += len(batch)
+            batch = []
+    if batch:
+        index.delete(ids=batch, namespace=namespace)
+        deleted += len(batch)
+    return deleted
@@ -0,0 +1,87 @@
+"""Creates or updates the Atlas vector index that `MongoVectorStore` searches.
+
+The definition in atlas_vector_index.json declares the embedding path and a
+`filter` path for every field in `data.filters.PUSHDOWN_FIELDS`. Atlas rejects a
+`$vectorSearch` filter on any path the index does not declare, so set
+MONGO_FILTER_PUSHDOWN=true only once this index has finished building.
+
+Run from the backend directory:
+    python -m vector_store.atlas_index --wait
+"""
+
+import argparse
+import json
+import os
+import time
+import typing as t
+
+from common import logger
+from common.constants import _MONGODB_COLLECTION_NAME, _MONGODB_CONN_STRING, _MONGODB_DB_NAME
+from data.filters import PUSHDOWN_FIELDS
+
+log = logger.create_logger()
+
+DEFINITION_PATH = os.path.join(os.path.dirname(__file__), "atlas_vector_index.json")
+INDEX_NAME = "vector_index"
+
+
+def load_definition(path: str = DEFINITION_PATH) -> dict[str, t.Any]:
+    with open(path, encoding="utf-8") as f:
+        definition = json.load(f)
+    declared = {field["path"] for field in definition["fields"] if field["type"] == "filter"}
+    missing = [field for field in PUSHDOWN_FIELDS if f"metadata.{field}" not in declared]
+    if missing:
+        raise ValueError(f"{path} does not declare filter paths for {missing}")
+    return definition
+
+
+def filter_paths(collection, index_name: str = INDEX_NAME) -> t.Optional[set[str]]:
+    """Filter paths the live index declares, or None if the index does not exist."""
+    for index in collection.list_search_indexes(index_name):
+        fields = (index.get("latestDefinition") or {}).get("fields", [])
+        return {field["path"] for field in fields if field.get("type") == "filter"}
+    return None
+
+
+def ensure_index(collection, definition: dict[str, t.Any], index_name: str = INDEX_NAME) -> str:
+    """Creates the index, or updates it in place if one with the same name exists."""
+    from pymongo.operations import SearchIndexModel
+
+    if filter_paths(collection, index_name) is None:
+        collection.create_search_index(
+            SearchIndexModel(definition=definition, name=index_name, type="vectorSearch")
+        )
+        return "created"
+    collection.update_search_index(index_name, definition)
+    return "updated"
+
+
+def wait_until_queryable(collection, index_name: str = INDEX_NAME, timeout: float = 600.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for index in collection.list_search_indexes(index_name):
+            if index.get("queryable") and index.get("status") == "READY":
+                return True
+        time.sleep(5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--index-name", default=INDEX_NAME)
+    parser.add_argument("--definition", default=DEFINITION_PATH)
+    parser.add_argument("--wait", action="store_true", help="Block until the index is queryable")
+    args = parser.parse_args()
+
+    from common.resources import init_mongodb
+
+    collection = init_mongodb(_MONGODB_CONN_STRING, _MONGODB_DB_NAME, _MONGODB_COLLECTION_NAME)
+    action = ensure_index(collection, load_definition(args.definition), args.index_name)
+    log.info(f"Vector index {args.index_name} {action}")
+    if args.wait:
+        ready = wait_until_queryable(collection, args.index_name)
+        log.info(f"Vector index {args.index_name} {'is queryable' if ready else 'is still building'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Common interface for the catalog's vector search backends."""
+
+import abc
+import asyncio
+import functools
+import typing as t
+from concurrent.futures import Executor
+
+import numpy as np
+
+# Each hit is {"id": str, "score": float, "metadata": dict}, plus the stored
+# vector under "embedding" when the backend returns it.
+SearchResult = dict[str, t.Any]
+
+
+class VectorStore(abc.ABC):
+    """Top-k similarity search over normalized catalog embeddings."""
+
+    @abc.abstractmethod
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[SearchResult]:
+        """Returns the `k` most similar items, best first."""
+
+    def search_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[list[SearchResult]]:
+        """Runs several searches; backends override this when they can batch."""
+        return [self.search(query, k=k, filters=filters) for query in query_embeddings]
+
+    async def asearch(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+        executor: t.Optional[Executor] = None,
+    ) -> list[SearchResult]:
+        """`search` without blocking the event loop: runs on `executor` unless overridden."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.search, query_embedding, k=k, filters=filters)
+        )
+
+    async def asearch_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+        executor: t.Optional[Executor] = None,
+    ) -> list[list[SearchResult]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.search_many, query_embeddings, k=k, filters=filters)
+        )
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first, without a full sort."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
@@ -0,0 +1,41 @@
+"""Per-field bitmap indexes for filtering the local vector stores."""
+
+import typing as t
+
+import numpy as np
+
+
+class BitmapIndex:
+    """One packed bitmap per (field, value): OR within a field, AND across fields."""
+
+    def __init__(self, metadata: t.Sequence[dict[str, t.Any]], fields: t.Sequence[str]):
+        self.size = len(metadata)
+        self.fields = tuple(fields)
+        self._bitmaps: dict[str, dict[t.Any, np.ndarray]] = {}
+        for field in self.fields:
+            values = np.array([str(meta.get(field)) for meta in metadata], dtype=object)
+            codes, inverse = np.unique(values, return_inverse=True)
+            self._bitmaps[field] = {
+                code: np.packbits(inverse == i) for i, code in enumerate(codes)
+            }
+
+    def covers(self, filters: dict[str, t.Any]) -> bool:
+        return all(field in self._bitmaps for field in filters)
+
+    def bitmap(self, filters: dict[str, t.Any]) -> np.ndarray:
+        """Packed bitmap of the rows matching every field's values."""
+        result = None
+        for field, values in filters.items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            field_bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for value in values:
+                bits = self._bitmaps[field].get(str(value))
+                if bits is not None:
+                    field_bits |= bits
+            result = field_bits if result is None else result & field_bits
+        return result
+
+    def rows(self, filters: dict[str, t.Any]) -> np.ndarray:
+        """Row numbers matching `filters`, in ascending order."""
+        return np.flatnonzero(np.unpackbits(self.bitmap(filters), count=self.size))
@@ -0,0 +1,198 @@
+"""Inverted-file (IVF) approximate backend for large catalogs."""
+
+import json
+import typing as t
+
+import numpy as np
+
+from common import logger
+from vector_store.base import SearchResult, top_k_indices
+from vector_store.local_store import LocalVectorStore
+
+log = logger.create_logger()
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: int = 20,
+    seed: int = 0,
+    chunk_size: int = 65536,
+) -> np.ndarray:
+    """Clusters L2-normalized vectors by cosine similarity and returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign_to_centroids(vectors, centroids, chunk_size)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[order], starts[filled])
+        empty = np.flatnonzero(~filled)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+def assign_to_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536
+) -> np.ndarray:
+    """Index of the most similar centroid for each vector, computed in chunks."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        assignment[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+class IVFVectorStore(LocalVectorStore):
+    """Partitions the catalog into `n_lists` clusters and scores only the `n_probe` closest.
+
+    Rows are stored grouped by cluster, so each probed list is a contiguous slice
+    of the embedding matrix.
+    """
+
+    def __init__(
+        self,
+        ids: t.Sequence[str],
+        embeddings: np.ndarray,
+        metadata: t.Sequence[dict[str, t.Any]],
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        n_probe: int = 8,
+    ):
+        super().__init__(ids, embeddings, metadata)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.embeddings.nbytes + self.centroids.nbytes + self.list_offsets.nbytes
+
+    @classmethod
+    def build(
+        cls,
+        ids: t.Sequence[str],
+        embeddings: np.ndarray,
+        metadata: t.Sequence[dict[str, t.Any]],
+        n_lists: t.Optional[int] = None,
+        n_probe: int = 8,
+        train_size: int = 100_000,
+        iterations: int = 20,
+        seed: int = 0,
+    ) -> "IVFVectorStore":
+        """Trains centroids on a sample and groups every row by its nearest centroid."""
+        store = LocalVectorStore(ids, embeddings, metadata)
+        vectors = store.embeddings
+        n_lists = n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+
+        rng = np.random.default_rng(seed)
+        sample = vectors
+        if len(vectors) > train_size:
+            sample = vectors[rng.choice(len(vectors), train_size, replace=False)]
+        centroids = spherical_kmeans(sample, n_lists, iterations=iterations, seed=seed)
+
+        assignment = assign_to_centroids(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=n_lists))]
+        )
+        log.info(f"Built IVF index with {n_lists} lists over {len(vectors)} vectors")
+        return cls(
+            [store.ids[row] for row in order],
+            vectors[order],
+            [store.metadata[row] for row in order],
+            centroids,
+            list_offsets,
+            n_probe=n_probe,
+        )
+
+    @classmethod
+    def from_collection(cls, collection, batch_size: int = 1000, **params) -> "IVFVectorStore":
+        """Builds the index from the embeddings stored by `generate_embeddings`."""
+        store = LocalVectorStore.from_collection(collection, batch_size=batch_size)
+        return cls.build(store.ids, store.embeddings, store.metadata, **params)
+
+    def _probe_rows(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        lists = top_k_indices(self.centroids @ query, n_probe)
+        return np.concatenate(
+            [np.arange(self.list_offsets[i], self.list_offsets[i + 1]) for i in lists]
+        )
+
+    def _filtered_probe_rows(
+        self, query: np.ndarray, n_probe: int, filter_rows: np.ndarray, k: int
+    ) -> np.ndarray:
+        """Filtered rows from the closest lists, widening the probe until `k` are collected.
+
+        When the filter is more selective than the probed lists are large, the
+        whole filtered subset is scored exactly instead.
+        """
+        order = np.argsort(-(self.centroids @ query), kind="stable")
+        sizes = np.diff(self.list_offsets)
+        if len(filter_rows) <= sizes[order[:n_probe]].sum():
+            return filter_rows
+        # filter_rows is sorted and lists are contiguous, so each list's matches are one slice.
+        bounds = np.searchsorted(filter_rows, self.list_offsets)
+        collected = np.cumsum(np.diff(bounds)[order])
+        needed = int(np.searchsorted(collected, min(k, len(filter_rows)))) + 1
+        lists = order[:max(n_probe, needed)]
+        return np.concatenate([filter_rows[bounds[i]:bounds[i + 1]] for i in lists])
+
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+        n_probe: t.Optional[int] = None,
+    ) -> list[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        filter_rows = self.candidate_rows(filters)
+        if filter_rows is None:
+            rows = self._probe_rows(query, n_probe)
+        else:
+            rows = self._filtered_probe_rows(query, n_probe, filter_rows, k)
+        scores = self.embeddings[rows] @ query
+        top = top_k_indices(scores, k)
+        return self._results(rows[top], scores[top])
+
+    def search_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[list[SearchResult]]:
+        return [self.search(query, k=k, filters=filters) for query in query_embeddings]
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            ids=np.array(self.ids, dtype=str),
+            embeddings=self.embeddings,
+            metadata=np.array(json.dumps(self.metadata)),
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            n_probe=np.array(self.n_probe),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFVectorStore":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["ids"].tolist(),
+                data["embeddings"],
+                json.loads(str(data["metadata"])),
+                data["centroids"],
+                data["list_offsets"],
+                n_probe=int(data["n_probe"]),
+            )
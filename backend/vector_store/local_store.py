@@ -0,0 +1,163 @@
+"""Exact in-process backend over a contiguous float32 matrix."""
+
+import json
+import typing as t
+
+import numpy as np
+
+from common import logger
+from data.filters import VALID_FILTERS
+from vector_store.base import SearchResult, VectorStore, top_k_indices
+from vector_store.bitmap_index import BitmapIndex
+
+log = logger.create_logger()
+
+# Above this fraction of matching rows, scoring everything and masking beats
+# gathering the matching rows into a new matrix.
+_GATHER_MAX_FRACTION = 0.3
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore(VectorStore):
+    """Brute-force cosine search: one matrix-vector product plus `argpartition`."""
+
+    def __init__(
+        self,
+        ids: t.Sequence[str],
+        embeddings: np.ndarray,
+        metadata: t.Sequence[dict[str, t.Any]],
+    ):
+        if len(ids) != len(embeddings) or len(ids) != len(metadata):
+            raise ValueError("ids, embeddings and metadata must have the same length")
+        self.ids = [str(i) for i in ids]
+        self.embeddings = np.ascontiguousarray(
+            _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        )
+        self.metadata = list(metadata)
+        self._bitmap_index: t.Optional[BitmapIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    @property
+    def bitmap_index(self) -> BitmapIndex:
+        """Bitmaps over the catalog filter fields, built on first use."""
+        if self._bitmap_index is None:
+            self._bitmap_index = BitmapIndex(self.metadata, tuple(VALID_FILTERS))
+        return self._bitmap_index
+
+    def candidate_rows(self, filters: t.Optional[dict[str, t.Any]]) -> t.Optional[np.ndarray]:
+        """Rows that satisfy `filters`, or None when every row is a candidate.
+
+        Each filter value may be a single value or a list of accepted values.
+        """
+        if not filters:
+            return None
+        if self.bitmap_index.covers(filters):
+            return self.bitmap_index.rows(filters)
+        accepted = {
+            field: set(values) if isinstance(values, (list, tuple, set)) else {values}
+            for field, values in filters.items()
+        }
+        mask = np.fromiter(
+            (
+                all(meta.get(field) in values for field, values in accepted.items())
+                for meta in self.metadata
+            ),
+            dtype=bool,
+            count=len(self.metadata),
+        )
+        return np.flatnonzero(mask)
+
+    def _results(self, rows: np.ndarray, scores: np.ndarray) -> list[SearchResult]:
+        return [
+            {
+                "id": self.ids[row],
+                "score": float(score),
+                "metadata": self.metadata[row],
+                "embedding": self.embeddings[row],
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        rows = self.candidate_rows(filters)
+        if rows is None:
+            scores = self.embeddings @ query
+            top = top_k_indices(scores, k)
+            return self._results(top, scores[top])
+        if len(rows) > _GATHER_MAX_FRACTION * len(self.ids):
+            scores = (self.embeddings @ query)[rows]
+        else:
+            scores = self.embeddings[rows] @ query
+        top = top_k_indices(scores, k)
+        return self._results(rows[top], scores[top])
+
+    def search_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[list[SearchResult]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        rows = self.candidate_rows(filters)
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+        scores = queries @ matrix.T
+        results = []
+        for row_scores in scores:
+            top = top_k_indices(row_scores, k)
+            hits = top if rows is None else rows[top]
+            results.append(self._results(hits, row_scores[top]))
+        return results
+
+    @classmethod
+    def from_collection(cls, collection, batch_size: int = 1000) -> "LocalVectorStore":
+        """Loads every embedding and its metadata from the Mongo catalog collection."""
+        count = collection.estimated_document_count()
+        ids, metadata, embeddings = [], [], None
+        cursor = collection.find({}, {"embedding": 1, "metadata": 1}, batch_size=batch_size)
+        for row, doc in enumerate(cursor):
+            vector = np.asarray(doc["embedding"], dtype=np.float32)
+            if embeddings is None:
+                embeddings = np.empty((max(count, 1), len(vector)), dtype=np.float32)
+            elif row >= len(embeddings):
+                embeddings = np.resize(embeddings, (len(embeddings) * 2, len(vector)))
+            embeddings[row] = vector
+            ids.append(str(doc["_id"]))
+            metadata.append(doc.get("metadata", {}))
+        if embeddings is None:
+            raise ValueError("Catalog collection has no embeddings")
+        log.info(f"Loaded {len(ids)} catalog vectors into the local store")
+        return cls(ids, embeddings[:len(ids)], metadata)
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            ids=np.array(self.ids, dtype=str),
+            embeddings=self.embeddings,
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorStore":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["ids"].tolist(),
+                data["embeddings"],
+                json.loads(str(data["metadata"])),
+            )
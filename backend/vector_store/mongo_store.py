@@ -0,0 +1,156 @@
+"""MongoDB Atlas `$vectorSearch` backend."""
+
+import asyncio
+import re
+import typing as t
+from concurrent.futures import Executor
+
+import numpy as np
+
+from common import logger
+from vector_store.base import SearchResult, VectorStore
+
+log = logger.create_logger()
+
+# Atlas answers a filter on a path the index does not declare with, for example,
+# "Path 'metadata.gender' needs to be indexed as filter". Other failures, such as
+# timeouts, say nothing about the index and leave pushdown on.
+_UNINDEXED_FILTER = re.compile(r"needs to be indexed as filter", re.IGNORECASE)
+
+
+class MongoVectorStore(VectorStore):
+    """Searches the catalog collection through an Atlas vector index.
+
+    With `async_collection` (a pymongo `AsyncCollection`), `asearch` awaits the
+    aggregation on the event loop instead of holding a worker thread.
+
+    Metadata filters are only sent to Atlas with `filter_pushdown`, which needs
+    the index from `python -m vector_store.atlas_index`; without it they are
+    ignored. If Atlas still rejects a filter, the query is retried unfiltered
+    and pushdown is switched off for the rest of the process.
+    """
+
+    def __init__(
+        self,
+        collection,
+        index_name: str = "vector_index",
+        path: str = "embedding",
+        num_candidates_factor: int = 2,
+        async_collection=None,
+        filter_pushdown: bool = False,
+    ):
+        self.collection = collection
+        self.async_collection = async_collection
+        self.index_name = index_name
+        self.path = path
+        self.num_candidates_factor = num_candidates_factor
+        self.filter_pushdown = filter_pushdown
+
+    def _build_filter(self, filters: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Translates `{field: value or [values]}` into a `$vectorSearch` pre-filter.
+
+        Every field must be declared as a `filter` path on the Atlas vector index.
+        """
+        clauses = []
+        for field, values in filters.items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            values = list(values)
+            operator = {"$eq": values[0]} if len(values) == 1 else {"$in": values}
+            clauses.append({f"metadata.{field}": operator})
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def _pipeline(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int,
+        filters: t.Optional[dict[str, t.Any]],
+    ) -> list[dict[str, t.Any]]:
+        vector_search = {
+            "index": self.index_name,
+            "queryVector": np.asarray(query_embedding).tolist(),
+            "path": self.path,
+            "limit": k,
+            "numCandidates": k * self.num_candidates_factor,
+        }
+        if filters and self.filter_pushdown:
+            vector_search["filter"] = self._build_filter(filters)
+
+        return [
+            {"$vectorSearch": vector_search},
+            {
+                "$project": {
+                    "_id": 1,
+                    "metadata": 1,
+                    "embedding": f"${self.path}",
+                    "score": {"$meta": "vectorSearchScore"},
+                }
+            },
+        ]
+
+    @staticmethod
+    def _hit(doc: dict[str, t.Any]) -> SearchResult:
+        hit = {"id": str(doc["_id"]), "score": doc["score"], "metadata": doc.get("metadata", {})}
+        if doc.get("embedding") is not None:
+            hit["embedding"] = np.asarray(doc["embedding"], dtype=np.float32)
+        return hit
+
+    def _filter_rejected(self, error: Exception, filters: t.Optional[dict[str, t.Any]]) -> bool:
+        """Whether `error` is Atlas refusing a pushed-down filter, in which case pushdown is disabled."""
+        from pymongo.errors import OperationFailure
+
+        if not (filters and self.filter_pushdown and isinstance(error, OperationFailure)):
+            return False
+        if not _UNINDEXED_FILTER.search(str(error)):
+            return False
+        log.warning(
+            f"Atlas rejected the vector search filter on {sorted(filters)}, searching unfiltered "
+            f"from now on; check that index {self.index_name} declares them as filter paths: {error}"
+        )
+        self.filter_pushdown = False
+        return True
+
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[SearchResult]:
+        try:
+            docs = list(self.collection.aggregate(self._pipeline(query_embedding, k, filters)))
+        except Exception as e:
+            if not self._filter_rejected(e, filters):
+                raise
+            docs = list(self.collection.aggregate(self._pipeline(query_embedding, k, None)))
+        return [self._hit(doc) for doc in docs]
+
+    async def asearch(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+        executor: t.Optional[Executor] = None,
+    ) -> list[SearchResult]:
+        if self.async_collection is None:
+            return await super().asearch(query_embedding, k=k, filters=filters, executor=executor)
+        try:
+            cursor = await self.async_collection.aggregate(self._pipeline(query_embedding, k, filters))
+            return [self._hit(doc) async for doc in cursor]
+        except Exception as e:
+            if not self._filter_rejected(e, filters):
+                raise
+        cursor = await self.async_collection.aggregate(self._pipeline(query_embedding, k, None))
+        return [self._hit(doc) async for doc in cursor]
+
+    async def asearch_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+        executor: t.Optional[Executor] = None,
+    ) -> list[list[SearchResult]]:
+        if self.async_collection is None:
+            return await super().asearch_many(query_embeddings, k=k, filters=filters, executor=executor)
+        return list(await asyncio.gather(
+            *(self.asearch(query, k=k, filters=filters) for query in query_embeddings)
+        ))
@@ -0,0 +1,38 @@
+"""Pinecone backend."""
+
+import typing as t
+
+import numpy as np
+
+from utils.pinecone_utils import fetch_matching_vectors_metadata
+from vector_store.base import SearchResult, VectorStore
+
+
+class PineconeVectorStore(VectorStore):
+    """Searches a Pinecone index whose metadata mirrors the Mongo documents."""
+
+    def __init__(self, index, namespace: str = ""):
+        self.index = index
+        self.namespace = namespace
+
+    def _build_filter(self, filters: dict[str, t.Any]) -> dict[str, t.Any]:
+        return {
+            field: {"$in": list(values)} if isinstance(values, (list, tuple, set)) else {"$eq": values}
+            for field, values in filters.items()
+        }
+
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[SearchResult]:
+        return fetch_matching_vectors_metadata(
+            self.index,
+            np.asarray(query_embedding).tolist(),
+            top_k=k,
+            apply_threshold=False,
+            filters=self._build_filter(filters) if filters else None,
+            namespace=self.namespace,
+            include_values=True,
+        )
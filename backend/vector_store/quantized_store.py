@@ -0,0 +1,236 @@
+"""Local backend that scans compact int8 or binary codes and rescores in float32."""
+
+import json
+import typing as t
+
+import numpy as np
+
+from common import logger
+from vector_store.base import SearchResult, top_k_indices
+from vector_store.local_store import _GATHER_MAX_FRACTION, LocalVectorStore, _normalize_rows
+
+log = logger.create_logger()
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# First-pass candidates kept per result. Sign bits lose far more ordering than
+# int8, so binary needs a much wider shortlist for the same recall.
+_DEFAULT_RESCORE_FACTOR = {"int8": 4, "binary": 50}
+
+# Rows converted to float32 at a time when scoring int8 codes, small enough to stay in cache.
+_INT8_BLOCK_ROWS = 4096
+
+# Set bits per byte value, for NumPy releases without `np.bitwise_count` (added in 2.0).
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(embeddings: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row scalar quantization: `x ~= codes * scales[:, None]`.
+
+    Scales are per row so vectors can be quantized one batch at a time.
+    """
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(embeddings / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(embeddings: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed eight to a byte."""
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    return np.packbits(embeddings > 0, axis=1)
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Approximate inner products of `query` with int8-coded rows."""
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), _INT8_BLOCK_ROWS):
+        block = codes[start:start + _INT8_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+    return scores * scales
+
+
+def hamming_similarity(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Number of matching sign bits; higher is closer."""
+    xor = np.bitwise_xor(codes, query_code)
+    bits = np.bitwise_count(xor) if hasattr(np, "bitwise_count") else _POPCOUNT[xor]
+    differing = bits.sum(axis=1, dtype=np.int32)
+    return codes.shape[1] * 8 - differing
+
+
+class QuantizedVectorStore(LocalVectorStore):
+    """Two-pass search: a scan over quantized codes picks `k * rescore_factor`
+    candidates, which are then rescored exactly against the float32 vectors.
+
+    Only the codes are scanned per query, so the float32 matrix can stay on disk
+    (see `load(..., mmap=True)`) and is touched only for the candidate rows.
+    """
+
+    def __init__(
+        self,
+        ids: t.Sequence[str],
+        embeddings: np.ndarray,
+        metadata: t.Sequence[dict[str, t.Any]],
+        mode: str = "int8",
+        rescore_factor: t.Optional[int] = None,
+        codes: t.Optional[np.ndarray] = None,
+        scales: t.Optional[np.ndarray] = None,
+    ):
+        """`codes` (and `scales` for int8) skip quantizing when they were stored at ingest."""
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        super().__init__(ids, embeddings, metadata)
+        self.mode = mode
+        self.rescore_factor = rescore_factor or _DEFAULT_RESCORE_FACTOR[mode]
+        if codes is not None and _codes_match(mode, codes, scales, self.embeddings.shape):
+            self.codes, self.scales = codes, scales
+        else:
+            self._quantize()
+
+    def _quantize(self) -> None:
+        if self.mode == "int8":
+            self.codes, self.scales = quantize_int8(self.embeddings)
+        else:
+            self.codes, self.scales = quantize_binary(self.embeddings), None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes scanned per query: the codes and, for int8, their scales."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _first_pass(self, query: np.ndarray, rows: t.Optional[np.ndarray]) -> np.ndarray:
+        """Approximate scores for every row, or for `rows` when given."""
+        codes, scales = self.codes, self.scales
+        if rows is not None and len(rows) <= _GATHER_MAX_FRACTION * len(self.ids):
+            codes = codes[rows]
+            scales = scales[rows] if scales is not None else None
+            rows = None
+        if self.mode == "int8":
+            scores = int8_scores(codes, scales, query)
+        else:
+            scores = hamming_similarity(codes, quantize_binary(query)[0])
+        return scores if rows is None else scores[rows]
+
+    def search(
+        self,
+        query_embedding: t.Sequence[float],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        rows = self.candidate_rows(filters)
+        approximate = self._first_pass(query, rows)
+        candidates = top_k_indices(approximate, k * self.rescore_factor)
+        if rows is not None:
+            candidates = rows[candidates]
+        candidates = np.sort(candidates)  # sequential reads when the float32 matrix is mapped
+        exact = np.asarray(self.embeddings[candidates]) @ query
+        top = top_k_indices(exact, k)
+        return self._results(candidates[top], exact[top])
+
+    def search_many(
+        self,
+        query_embeddings: t.Sequence[t.Sequence[float]],
+        k: int = 5,
+        filters: t.Optional[dict[str, t.Any]] = None,
+    ) -> list[list[SearchResult]]:
+        return [self.search(query, k=k, filters=filters) for query in query_embeddings]
+
+    @classmethod
+    def from_collection(
+        cls,
+        collection,
+        mode: str = "int8",
+        rescore_factor: t.Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> "QuantizedVectorStore":
+        """Loads the catalog, reusing the codes ingest stored (see `quantized_fields`) when every row has them."""
+        code_fields = _CODE_FIELDS.get(mode, ())
+        projection = {"embedding": 1, "metadata": 1, **{field: 1 for field in code_fields}}
+        ids, metadata, vectors = [], [], []
+        codes: t.Optional[list[bytes]] = []
+        scales: list[float] = []
+        for doc in collection.find({}, projection, batch_size=batch_size):
+            ids.append(str(doc["_id"]))
+            metadata.append(doc.get("metadata", {}))
+            vectors.append(np.asarray(doc["embedding"], dtype=np.float32))
+            if codes is not None and code_fields and all(field in doc for field in code_fields):
+                codes.append(bytes(doc[code_fields[0]]))
+                if mode == "int8":
+                    scales.append(doc["embedding_int8_scale"])
+            else:
+                codes = None
+        if not vectors:
+            raise ValueError("Catalog collection has no embeddings")
+
+        stored_codes = stored_scales = None
+        if codes:
+            dtype = np.int8 if mode == "int8" else np.uint8
+            stored_codes = np.frombuffer(b"".join(codes), dtype=dtype).reshape(len(codes), -1)
+            stored_scales = np.asarray(scales, dtype=np.float32) if mode == "int8" else None
+            log.info(f"Loaded {len(codes)} stored {mode} codes")
+        else:
+            log.info(f"No stored {mode} codes on every document, quantizing the float vectors")
+        return cls(
+            ids, np.stack(vectors), metadata,
+            mode=mode, rescore_factor=rescore_factor, codes=stored_codes, scales=stored_scales,
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the codes to `path` (.npz) and the float32 vectors beside it as `.f32.npy`."""
+        np.savez(
+            path,
+            ids=np.array(self.ids, dtype=str),
+            codes=self.codes,
+            scales=self.scales if self.scales is not None else np.empty(0, dtype=np.float32),
+            mode=np.array(self.mode),
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+        np.save(_embeddings_path(path), self.embeddings)
+
+    @classmethod
+    def load(cls, path: str, rescore_factor: t.Optional[int] = None, mmap: bool = True) -> "QuantizedVectorStore":
+        """Loads a saved store; with `mmap` the float32 vectors stay on disk."""
+        store = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            store.ids = data["ids"].tolist()
+            store.codes = data["codes"]
+            store.mode = str(data["mode"])
+            store.scales = data["scales"] if store.mode == "int8" else None
+            store.metadata = json.loads(str(data["metadata"]))
+        store.embeddings = np.load(_embeddings_path(path), mmap_mode="r" if mmap else None)
+        store.rescore_factor = rescore_factor or _DEFAULT_RESCORE_FACTOR[store.mode]
+        store._bitmap_index = None
+        return store
+
+
+# Document fields written by `quantized_fields`, the codes field first.
+_CODE_FIELDS = {"int8": ("embedding_int8", "embedding_int8_scale"), "binary": ("embedding_binary",)}
+
+
+def _codes_match(mode: str, codes: np.ndarray, scales: t.Optional[np.ndarray], shape: tuple[int, int]) -> bool:
+    rows, dimension = shape
+    width = dimension if mode == "int8" else -(-dimension // 8)
+    if codes.shape != (rows, width):
+        log.warning(f"Stored {mode} codes have shape {codes.shape}, expected {(rows, width)}; re-quantizing")
+        return False
+    return mode != "int8" or (scales is not None and len(scales) == rows)
+
+
+def _embeddings_path(path: str) -> str:
+    return (path[:-4] if path.endswith(".npz") else path) + ".f32.npy"
+
+
+def quantized_fields(embeddings: np.ndarray, mode: str) -> list[dict[str, t.Any]]:
+    """Per-document fields holding the codes, for writing alongside the float vectors."""
+    embeddings = _normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+    if mode == "int8":
+        codes, scales = quantize_int8(embeddings)
+        return [
+            {"embedding_int8": code.tobytes(), "embedding_int8_scale": float(scale)}
+            for code, scale in zip(codes, scales)
+        ]
+    if mode == "binary":
+        return [{"embedding_binary": code.tobytes()} for code in quantize_binary(embeddings)]
+    raise ValueError(f"Unknown quantization mode: {mode}")